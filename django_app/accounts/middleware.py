@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
 from django.utils import timezone
 
 from .models import UserActivityLog
@@ -8,16 +9,30 @@ from .models import UserActivityLog
 class UserActivityLoggingMiddleware:
     """
     인증된 사용자의 요청 중요 정보를 UserActivityLog에 저장한다.
+    sync / async 모두 지원 - ASGI에서 async view(채팅 API)가 워커 스레드로 넘어가지 않도록
+    async 체인에서는 로그 저장(ORM)만 sync_to_async로 실행한다.
     """
 
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
         response = self.get_response(request)
         self._log_request(request)
         return response
 
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        await sync_to_async(self._log_request)(request)
+        return response
+
     def _log_request(self, request):
         user = getattr(request, "user", None)
         if not user or not user.is_authenticated:
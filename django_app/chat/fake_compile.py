@@ -63,7 +63,13 @@ class FakeCompileLLM:
         self.llm = llm
 
     def invoke(self, messages):
-        response = self.llm.invoke(messages)
+        return self._with_citations(self.llm.invoke(messages))
+
+    async def ainvoke(self, messages):
+        return self._with_citations(await self.llm.ainvoke(messages))
+
+    @staticmethod
+    def _with_citations(response):
         if not isinstance(response, AIMessage):
             response = AIMessage(content=str(response))
         extras = response.additional_kwargs or {}
@@ -2,9 +2,12 @@ from __future__ import annotations
 
 import sys
 import json
+import asyncio
+import threading
 from pathlib import Path
-from typing import Any, Dict, List, Sequence
+from typing import Any, AsyncIterator, Dict, List, Sequence
 
+from asgiref.sync import sync_to_async
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 
 try:
@@ -23,13 +26,60 @@ if str(PROJECT_ROOT) not in sys.path:
 
 try:
     from graph.compile import create_medical_rag_workflow
+    from graph.llm_client import aclose_async_client
 except ImportError as exc:  # pragma: no cover - 환경에 따라 graph 패키지가 없을 수 있음
     create_medical_rag_workflow = None
+    aclose_async_client = None
     _GRAPH_IMPORT_ERROR = exc
 else:
     _GRAPH_IMPORT_ERROR = None
 
+try:
+    from rag.services.embedder import aclose_async_openai_client, warm_embedding_cache
+    from rag.services.answer_cache import get_answer_cache
+    from rag.services.relevance import get_similarity_gate, warm_relevance_scorer
+except ImportError:  # pragma: no cover - 환경에 따라 rag 패키지가 없을 수 있음
+    warm_embedding_cache = None
+    aclose_async_openai_client = None
+    get_answer_cache = None
+    get_similarity_gate = None
+    warm_relevance_scorer = None
+
+try:
+    from rag.services.binary_search import aclose_async_binary_pool
+except ImportError:  # pragma: no cover - psycopg(3) 미설치 환경
+    aclose_async_binary_pool = None
+
 _graph_app: Any | None = None
+_async_graph_app: Any | None = None
+_quick_templates_warmed = False
+# uvicorn 등 ASGI 서버는 워커당 이벤트 루프 하나를 계속 쓰므로 루프별 DB 풀 / AsyncOpenAI 클라이언트를 재사용한다.
+# WSGI(runserver, gunicorn)에서는 async 뷰가 요청마다 새 루프에서 실행되므로 요청 끝에서 닫는다.
+_long_lived_loop = False
+
+
+def mark_long_lived_loop() -> None:
+    """config.asgi에서 호출 - 이후 요청 단위 풀/클라이언트 정리를 생략"""
+    global _long_lived_loop
+    _long_lived_loop = True
+
+
+async def _release_request_loop_resources() -> None:
+    """
+    요청 단위 루프(WSGI의 async 뷰)에서 만든 psycopg3 비동기 풀과 AsyncOpenAI 클라이언트를 닫는다.
+    루프가 닫힌 뒤에는 close()를 await할 수 없어 커넥션이 남으므로 그래프 실행 직후 호출한다.
+    """
+    if _long_lived_loop:
+        return
+    closers = [
+        closer
+        for closer in (aclose_async_binary_pool, aclose_async_openai_client, aclose_async_client)
+        if closer is not None
+    ]
+    results = await asyncio.gather(*(closer() for closer in closers), return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"[async resources] close failed: {result!r}")
 
 
 def _use_fake_backend() -> bool:
@@ -53,6 +103,75 @@ def _get_graph_app():
     return _graph_app
 
 
+def _get_async_graph_app():
+    """
+    비동기 노드로 구성된 LangGraph 워크플로우 (ainvoke 전용)
+    """
+    global _async_graph_app
+    if create_medical_rag_workflow is None:
+        raise RuntimeError("LangGraph 모듈을 불러올 수 없습니다.") from _GRAPH_IMPORT_ERROR
+    if _async_graph_app is None:
+        _async_graph_app = create_medical_rag_workflow(use_async=True)
+    return _async_graph_app
+
+
+def warm_quick_template_embeddings(sections: List[Dict[str, Any]]) -> None:
+    """
+    빠른 질문 템플릿 문구를 백그라운드에서 미리 임베딩해 embedding cache에 적재한다.
+    템플릿 질문은 프로세스당 최대 한 번(영구 캐시 사용 시 최초 1회)만 임베딩 비용이 든다.
+    """
+    global _quick_templates_warmed
+    if _quick_templates_warmed or warm_embedding_cache is None or _use_fake_backend():
+        return
+    _quick_templates_warmed = True
+    texts = [item for section in sections for item in section.get("items", [])]
+
+    def _warm():
+        try:
+            created = warm_embedding_cache(texts)
+            print(f"[embedding cache] quick templates warmed (new={created}, total={len(texts)})")
+        except Exception as exc:
+            print(f"[embedding cache] quick template warm-up failed: {exc}")
+
+    threading.Thread(target=_warm, name="quick-template-warmup", daemon=True).start()
+
+
+def warm_relevance_model() -> None:
+    """
+    evaluate_chunk 관련성 모델(RELEVANCE_MODE=cross_encoder)을 서버 프로세스 시작 시 백그라운드 로드.
+    첫 RAG 요청이 모델 로드(수 초)를 기다리지 않도록 asgi/wsgi에서 호출한다.
+    """
+    if warm_relevance_scorer is None or _use_fake_backend():
+        return
+    warm_relevance_scorer()
+
+
+def answer_cache_stats() -> Dict[str, Any]:
+    """
+    답변 캐시 모니터링 지표
+    - process: 현재 워커의 hit/miss/hit_rate/saved_tokens
+    - table: answer_cache 테이블 누적값 (전체 워커 합산 hit, 절약 토큰 추정치)
+    """
+    if get_answer_cache is None:
+        raise RuntimeError("rag 모듈을 불러올 수 없습니다.")
+    cache = get_answer_cache()
+    return {"process": cache.snapshot(), "table": cache.table_stats()}
+
+
+def relevance_gate_stats() -> Dict[str, Any]:
+    """
+    evaluate_chunk 유사도 게이트 단계별 건수 (현재 워커 기준)
+    - accepted / rejected: 점수기(LLM) 호출 없이 결정 / judged: gray zone에서 점수기 호출
+    - skip_rate: 점수기 호출을 건너뛴 비율
+    """
+    if get_similarity_gate is None:
+        raise RuntimeError("rag 모듈을 불러올 수 없습니다.")
+    gate = get_similarity_gate()
+    if gate is None:
+        return {"enabled": False}
+    return {"enabled": True, **gate.snapshot()}
+
+
 def _format_citations(raw_result: Dict[str, Any]) -> tuple[List[Dict[str, Any]], str]:
     """
     LangGraph state에서 전달된 reference 정보를 프론트엔드가 기대하는 포맷으로 변환.
@@ -99,18 +218,42 @@ def _extract_scores(raw_result: Dict[str, Any]) -> Dict[str, Any]:
                 return value
         return None
 
+    # generate_answer 토큰 수 (tiktoken 기준, Message.tokens_prompt / tokens_completion)
+    usage = raw_result.get("token_usage") or {}
+
     return {
         "llm_score": _first(structured.get("llm_score"), raw_result.get("llm_score")),
         "relevance_score": _first(
             structured.get("relevance_score"), raw_result.get("relevance_score")
         ),
+        "tokens_prompt": usage.get("prompt"),
+        "tokens_completion": usage.get("completion"),
+        "model_name": usage.get("model", ""),
+        # evaluate_chunk chunk별 관련성 점수 (Message.metadata["chunk_scores"])
+        "chunk_scores": raw_result.get("chunk_scores") or [],
+        "relevance_tier": raw_result.get("relevance_tier", ""),
     }
 
 
-def _build_history(conversation: ChatConversation) -> list:
-    """기존 대화 메시지를 LangChain 메시지 포맷으로 변환."""
+# fake 백엔드에 전달할 최근 대화 턴 수 (graph memory_read 기본값과 동일)
+HISTORY_TURNS = 5
+
+
+def _build_history(conversation: ChatConversation, turns: int = HISTORY_TURNS) -> list:
+    """
+    최근 turns개 턴의 대화 메시지를 LangChain 메시지 포맷으로 변환.
+    (conversation, created_at) 인덱스로 최신 메시지만 읽고, 방금 저장된 현재 질문은
+    prompt로 따로 전달되므로 제외한다.
+    """
+    recent = list(
+        conversation.messages.filter(role__in=("user", "assistant"))
+        .order_by("-created_at")
+        .only("role", "content")[: turns * 2 + 1]
+    )
+    if recent and recent[0].role == "user":
+        recent = recent[1:]
     messages = []
-    for msg in conversation.messages.order_by("created_at").only("role", "content"):
+    for msg in reversed(recent[: turns * 2]):
         if msg.role == "user":
             messages.append(HumanMessage(content=msg.content))
         elif msg.role == "assistant":
@@ -141,6 +284,93 @@ def generate_ai_response(conversation: ChatConversation, prompt: str) -> tuple[s
         "conversation_id": str(conversation.id),
     }
     result_state = app.invoke(payload)
+    return _to_response(result_state)
+
+
+async def agenerate_ai_response(conversation: ChatConversation, prompt: str) -> tuple[str, list, dict, str]:
+    """
+    generate_ai_response의 비동기 버전.
+    비동기 노드 그래프를 ainvoke로 실행하므로 LLM/DB 대기 중에 워커 스레드를 점유하지 않는다.
+    """
+    if _use_fake_backend():
+        llm = fake_build()
+        history = await sync_to_async(_build_history)(conversation)
+        system_prompt = SystemMessage(
+            content="당신은 의료 연구 도우미입니다. 한국어로 짧고 명확하게 답변하세요."
+        )
+        messages = [system_prompt, *history, HumanMessage(content=prompt)]
+        response = await llm.ainvoke(messages)
+        content = response.content if hasattr(response, "content") else str(response)
+        metadata = getattr(response, "additional_kwargs", {}) or {}
+        citations = metadata.get("citations", [])
+        return content, citations, {"llm_score": None, "relevance_score": None}, "internal"
+
+    app = _get_async_graph_app()
+    payload = {
+        "question": prompt,
+        "conversation_id": str(conversation.id),
+    }
+    try:
+        result_state = await app.ainvoke(payload)
+    finally:
+        await _release_request_loop_resources()
+    return _to_response(result_state)
+
+
+async def astream_ai_response(conversation: ChatConversation, prompt: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    agenerate_ai_response의 스트리밍 버전. 이벤트를 생성되는 대로 yield 한다.
+
+    - {"type": "progress", "node": "retrieval"}: 그래프 노드 완료
+    - {"type": "token", "text": "..."}: generate_answer 답변 토큰 (LLM 원문 인용 번호 그대로)
+    - {"type": "done", "content", "citations", "scores", "reference_type"}: 마지막 이벤트.
+      content는 출처 재번호화가 적용된 최종 답변이므로 토큰 누적본을 대체한다.
+    """
+    if _use_fake_backend():
+        content, citations, scores, reference_type = await agenerate_ai_response(conversation, prompt)
+        yield {"type": "token", "text": content}
+        yield {
+            "type": "done",
+            "content": content,
+            "citations": citations,
+            "scores": scores,
+            "reference_type": reference_type,
+        }
+        return
+
+    app = _get_async_graph_app()
+    payload = {
+        "question": prompt,
+        "conversation_id": str(conversation.id),
+    }
+    result_state: Dict[str, Any] = {}
+    try:
+        async for mode, chunk in app.astream(payload, stream_mode=["updates", "custom", "values"]):
+            if mode == "custom":
+                yield chunk
+            elif mode == "updates":
+                for node in chunk:
+                    yield {"type": "progress", "node": node}
+            else:
+                result_state = chunk
+    finally:
+        await _release_request_loop_resources()
+
+    content, citations, scores, reference_type = _to_response(result_state)
+    yield {
+        "type": "done",
+        "content": content,
+        "citations": citations,
+        "scores": scores,
+        "reference_type": reference_type,
+    }
+
+
+def _to_response(result_state: Dict[str, Any]) -> tuple[str, list, dict, str]:
+    """그래프 최종 state를 (답변, 참고문헌, 점수, reference_type)로 변환."""
+    timings = result_state.get("node_timings")
+    if timings:
+        print(f"[graph timings] {', '.join(f'{name}={ms:.0f}ms' for name, ms in timings.items())}")
     structured = result_state.get("structured_answer") or {}
     content = (
         result_state.get("final_answer")
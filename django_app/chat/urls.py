@@ -15,6 +15,11 @@ urlpatterns = [
         views.conversation_messages,
         name="conversation_messages",
     ),
+    path(
+        "api/conversations/<int:conversation_id>/messages/stream/",
+        views.conversation_messages_stream,
+        name="conversation_messages_stream",
+    ),
     path(
         "api/messages/<int:message_id>/feedback/",
         views.message_feedback,
@@ -30,4 +35,14 @@ urlpatterns = [
         views.message_related_questions,
         name="message_related_questions",
     ),
+    path(
+        "api/answer-cache/stats/",
+        views.answer_cache_stats_view,
+        name="answer_cache_stats",
+    ),
+    path(
+        "api/relevance-gate/stats/",
+        views.relevance_gate_stats_view,
+        name="relevance_gate_stats",
+    ),
 ]
@@ -1,19 +1,24 @@
 import json
 from pathlib import Path
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
-from django.shortcuts import get_object_or_404, render
+from django.http import JsonResponse, StreamingHttpResponse
+from django.shortcuts import aget_object_or_404, get_object_or_404, render
 from django.urls import NoReverseMatch, reverse
 from django.utils import timezone
 from django.views.decorators.http import require_POST
 
 from .models import ChatConversation, Message, MessageFeedback
 from .services import (
-    generate_ai_response,
+    agenerate_ai_response,
+    answer_cache_stats,
+    astream_ai_response,
     generate_concept_graph,
     generate_related_questions,
+    relevance_gate_stats,
     summarize_conversation_title,
+    warm_quick_template_embeddings,
 )
 
 
@@ -117,6 +122,8 @@ def index(request):
     - context를 chat/chat.html 템플릿에 전달.
     """
     user = request.user
+    # 빠른 질문 템플릿 임베딩을 미리 캐시 (최초 1회, 백그라운드)
+    warm_quick_template_embeddings(QUICK_TEMPLATE_SECTIONS)
     conversations = []
     if user.is_authenticated:
         # 인증된 사용자: 본인이 만든, 보관처리 안된 대화만 쿼리, 최신순 정렬
@@ -237,7 +244,7 @@ def conversation_detail(request, conversation_id):
         }
     )
 
-def conversation_messages(request, conversation_id):
+async def conversation_messages(request, conversation_id):
     """
     지정된 대화(conversation)에 새 메시지를 추가
 
@@ -253,16 +260,111 @@ def conversation_messages(request, conversation_id):
     4. content 필드 미입력 시 400 반환
     5. Message 생성(유저 역할, content 저장) 및 마지막 활동 갱신(preview 갱신)
     6. 생성 메시지 json 응답(201 반환)
+
+    LangGraph 호출(수십 초)을 ainvoke로 기다리므로 ASGI(config.asgi)에서
+    요청마다 워커 스레드를 점유하지 않는다 (MIDDLEWARE가 모두 async를 지원해야 함 - accounts.middleware 참고).
+    """
+    turn = await _start_turn(request, conversation_id)
+    if isinstance(turn, JsonResponse):
+        return turn
+    user, conversation, user_message, content = turn
+
+    # 6. AI 응답 생성 및 저장
+    try:
+        ai_text, citations, scores, reference_type = await agenerate_ai_response(conversation, content)
+    except Exception as exc:  # LLM 호출 실패
+        return JsonResponse(
+            {
+                "messages": [
+                    await sync_to_async(_serialize_message)(user_message, user),
+                ],
+                "error": str(exc),
+            },
+            status=201,
+        )
+
+    assistant_message = await _save_assistant_message(
+        conversation, ai_text, citations, scores, reference_type
+    )
+    await _ensure_title(conversation, content)
+
+    return JsonResponse(
+        {
+            "messages": [
+                await sync_to_async(_serialize_message)(user_message, user),
+                await sync_to_async(_serialize_message)(assistant_message, user),
+            ]
+        },
+        status=201,
+    )
+
+
+async def conversation_messages_stream(request, conversation_id):
+    """
+    conversation_messages의 스트리밍 버전 (Server-Sent Events, text/event-stream)
+
+    검증/사용자 메시지 저장은 conversation_messages와 동일하고, 응답은 다음 이벤트 순서로 전달한다.
+    - user_message: 저장된 사용자 메시지
+    - progress: 그래프 노드 완료 ({"node": "retrieval"})
+    - token: 답변 토큰 ({"text": "..."}) - 생성되는 즉시 전달 (time-to-first-token 단축)
+    - done: 저장된 assistant 메시지 ({"messages": [...]}) - 출처 재번호화가 적용된 최종 답변
+    - error: 답변 생성 실패 ({"error": "..."})
+    assistant 메시지는 스트림이 끝까지 완료됐을 때만 저장된다.
+    토큰 단위 전달은 ASGI(uvicorn)에서만 동작한다. WSGI(runserver)는 async iterator를 끝까지 모은 뒤 보낸다.
+    """
+    turn = await _start_turn(request, conversation_id)
+    if isinstance(turn, JsonResponse):
+        return turn
+    user, conversation, user_message, content = turn
+
+    async def event_stream():
+        yield _sse("user_message", {"message": await sync_to_async(_serialize_message)(user_message, user)})
+
+        done = None
+        try:
+            async for event in astream_ai_response(conversation, content):
+                if event["type"] == "done":
+                    done = event
+                else:
+                    yield _sse(event["type"], event)
+        except Exception as exc:  # LLM 호출 실패
+            yield _sse("error", {"error": str(exc)})
+            return
+
+        assistant_message = await _save_assistant_message(
+            conversation, done["content"], done["citations"], done["scores"], done["reference_type"]
+        )
+        yield _sse("done", {"messages": [await sync_to_async(_serialize_message)(assistant_message, user)]})
+        # 제목 요약은 답변 전달 이후에 수행 (클라이언트는 스트림 종료 후 목록 갱신)
+        await _ensure_title(conversation, content)
+
+    response = StreamingHttpResponse(event_stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # nginx 프록시 버퍼링 해제 (토큰이 모였다가 한 번에 전달되지 않도록)
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _start_turn(request, conversation_id):
+    """
+    메시지 API 공통 검증 후 사용자 메시지 저장
+    Returns:
+        (user, conversation, user_message, content) 또는 오류 JsonResponse
     """
     # 1. 인증되지 않은 유저는 401 반환
-    if not request.user.is_authenticated:
+    user = await request.auser()
+    if not user.is_authenticated:
         return JsonResponse({"error": "unauthorized"}, status=401)
 
     # 2. 본인이 만든, 아카이브되지 않은 해당 conversation 발견
-    conversation = get_object_or_404(
+    conversation = await aget_object_or_404(
         ChatConversation,
         id=conversation_id,
-        created_by=request.user,
+        created_by=user,
         is_archived=False,
     )
 
@@ -277,59 +379,49 @@ def conversation_messages(request, conversation_id):
         return JsonResponse({"error": "content_required"}, status=400)
 
     # 5. 사용자 메시지 생성
-    user_message = Message.objects.create(
+    user_message = await Message.objects.acreate(
         conversation=conversation,
         role="user",
         content=content,
     )
-    conversation.update_activity(preview=content)
+    await sync_to_async(conversation.update_activity)(preview=content)
+    return user, conversation, user_message, content
 
-    # 6. AI 응답 생성 및 저장
-    try:
-        ai_text, citations, scores, reference_type = generate_ai_response(conversation, content)
-    except Exception as exc:  # LLM 호출 실패
-        return JsonResponse(
-            {
-                "messages": [
-                    _serialize_message(user_message, request.user),
-                ],
-                "error": str(exc),
-            },
-            status=201,
-        )
 
+async def _save_assistant_message(conversation, ai_text, citations, scores, reference_type) -> Message:
     metadata = {"reference_type": reference_type} if reference_type else {}
-    assistant_message = Message.objects.create(
+    scores = scores if isinstance(scores, dict) else {}
+    if scores.get("chunk_scores"):
+        metadata["chunk_scores"] = scores["chunk_scores"]
+    if scores.get("relevance_tier"):
+        metadata["relevance_tier"] = scores["relevance_tier"]
+    assistant_message = await Message.objects.acreate(
         conversation=conversation,
         role="assistant",
         content=ai_text,
         citations=citations,
-        llm_score=scores.get("llm_score") if isinstance(scores, dict) else None,
-        relevance_score=scores.get("relevance_score") if isinstance(scores, dict) else None,
+        llm_score=scores.get("llm_score"),
+        relevance_score=scores.get("relevance_score"),
+        tokens_prompt=scores.get("tokens_prompt"),
+        tokens_completion=scores.get("tokens_completion"),
+        model_name=scores.get("model_name") or "",
         metadata=metadata or None,
         reference_type=reference_type or "",
     )
-    conversation.update_activity(preview=ai_text)
+    await sync_to_async(conversation.update_activity)(preview=ai_text)
+    return assistant_message
+
 
+async def _ensure_title(conversation, content: str) -> None:
     if not conversation.title or conversation.title == ChatConversation.DEFAULT_TITLE:
         try:
-            summary = summarize_conversation_title(content)
+            summary = await sync_to_async(summarize_conversation_title, thread_sensitive=False)(content)
             conversation.title = summary
-            conversation.save(update_fields=["title"])
+            await conversation.asave(update_fields=["title"])
         except Exception as exc:
             # 요약 실패 시 로그만 남기고 계속 진행
             print(f"[title summarize error] {exc}")
 
-    return JsonResponse(
-        {
-            "messages": [
-                _serialize_message(user_message, request.user),
-                _serialize_message(assistant_message, request.user),
-            ]
-        },
-        status=201,
-    )
-
 
 def message_feedback(request, message_id):
     if not request.user.is_authenticated:
@@ -418,3 +510,25 @@ def message_related_questions(request, message_id):
         return JsonResponse({"error": str(exc)}, status=500)
 
     return JsonResponse({"questions": questions})
+
+
+@login_required(login_url="accounts:login")
+def answer_cache_stats_view(request):
+    """답변 캐시 hit rate / 절약 토큰 (staff 전용)"""
+    if not request.user.is_staff:
+        return JsonResponse({"error": "forbidden"}, status=403)
+    try:
+        return JsonResponse(answer_cache_stats())
+    except Exception as exc:
+        return JsonResponse({"error": str(exc)}, status=503)
+
+
+@login_required(login_url="accounts:login")
+def relevance_gate_stats_view(request):
+    """관련성 유사도 게이트 단계별 건수 / LLM 호출 절약 비율 (staff 전용)"""
+    if not request.user.is_staff:
+        return JsonResponse({"error": "forbidden"}, status=403)
+    try:
+        return JsonResponse(relevance_gate_stats())
+    except Exception as exc:
+        return JsonResponse({"error": str(exc)}, status=503)
@@ -14,3 +14,18 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.DEBUG:
+    # runserver처럼 개발 중에는 uvicorn에서도 /static/ 제공 (운영은 collectstatic 후 프록시에서 제공)
+    from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler  # noqa: E402
+
+    application = ASGIStaticFilesHandler(application)
+
+# 관련성 재순위 모델을 첫 요청 전에 로드 (RELEVANCE_MODE=cross_encoder일 때만)
+from chat.services import mark_long_lived_loop, warm_relevance_model  # noqa: E402
+
+warm_relevance_model()
+# ASGI 워커는 이벤트 루프를 계속 유지하므로 루프별 DB 풀 / OpenAI 클라이언트를 요청 간 재사용
+mark_long_lived_loop()
@@ -78,6 +78,8 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+# 채팅 API(async view + graph.ainvoke)는 ASGI 서버에서 요청당 스레드를 점유하지 않는다
+ASGI_APPLICATION = 'config.asgi.application'
 
 
 # Database
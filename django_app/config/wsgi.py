@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# 관련성 재순위 모델을 첫 요청 전에 로드 (RELEVANCE_MODE=cross_encoder일 때만)
+from chat.services import warm_relevance_model  # noqa: E402
+
+warm_relevance_model()
@@ -16,7 +16,7 @@ document.addEventListener("DOMContentLoaded", () => {
     currentConversationId: null,
     isSending: false,
     isMessagesLoading: false,
-    activeStreamIntervals: [],
+    streamRenderFrame: null,
     pendingFeedbackMessageId: null,
   };
 
@@ -118,7 +118,7 @@ document.addEventListener("DOMContentLoaded", () => {
       });
       if (!res.ok) throw new Error("Failed to load messages");
       const data = await res.json();
-      clearStreamIntervals();
+      cancelStreamRender();
       state.messagesCache[conversationId] = data.messages || [];
     } catch (err) {
       console.error(err);
@@ -360,6 +360,7 @@ document.addEventListener("DOMContentLoaded", () => {
           <div class="loading-dot"></div>
           <div class="loading-dot"></div>
         </div>
+        <div class="loading-status" id="loadingStatus"></div>
       </div>
     `;
 
@@ -372,30 +373,63 @@ document.addEventListener("DOMContentLoaded", () => {
     if (loading) loading.remove();
   }
 
-  function clearStreamIntervals() {
-    state.activeStreamIntervals.forEach((id) => clearInterval(id));
-    state.activeStreamIntervals = [];
+  // 그래프 노드 완료 이벤트 → 로딩 말풍선에 표시할 다음 단계 안내
+  const progressLabels = {
+    memory_read: "질문을 분석하는 중...",
+    classifier: "관련 자료를 찾는 중...",
+    medical_check: "관련 자료를 찾는 중...",
+    prefetch_retrieval: "관련 자료를 찾는 중...",
+    retrieval: "검색된 문서를 검토하는 중...",
+    web_search: "답변을 작성하는 중...",
+    evaluate_chunk: "답변을 작성하는 중...",
+    rewrite_query: "질문을 다듬어 다시 검색하는 중...",
+  };
+
+  function updateLoadingStatus(node) {
+    const status = document.getElementById("loadingStatus");
+    if (status && progressLabels[node]) status.textContent = progressLabels[node];
   }
 
-  function streamAssistantMessage(message) {
-    const conversationMsgs = state.messagesCache[state.currentConversationId] || [];
-    const target = conversationMsgs.find((msg) => msg.id === message.id);
-    if (!target) return;
-    const fullText = target.content || "";
-    target.content = "";
-    renderMessages();
-    let index = 0;
-    const chunk = Math.max(2, Math.floor(fullText.length / 60));
-    const interval = setInterval(() => {
-      index += chunk;
-      target.content = fullText.slice(0, index);
+  // 토큰마다 전체 메시지를 다시 그리지 않도록 프레임당 1회로 묶어서 렌더링
+  function scheduleStreamRender() {
+    if (state.streamRenderFrame) return;
+    state.streamRenderFrame = requestAnimationFrame(() => {
+      state.streamRenderFrame = null;
       renderMessages();
-      if (index >= fullText.length) {
-        clearInterval(interval);
-        state.activeStreamIntervals = state.activeStreamIntervals.filter((id) => id !== interval);
+    });
+  }
+
+  function cancelStreamRender() {
+    if (state.streamRenderFrame) cancelAnimationFrame(state.streamRenderFrame);
+    state.streamRenderFrame = null;
+  }
+
+  /**
+   * SSE(text/event-stream) 응답 본문을 읽어 이벤트마다 onEvent(event, data)를 호출
+   * (POST 요청이라 EventSource 대신 fetch 스트림을 직접 파싱)
+   */
+  async function readEventStream(res, onEvent) {
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    while (true) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let boundary = buffer.indexOf("\n\n");
+      while (boundary !== -1) {
+        const raw = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        let event = "message";
+        const dataLines = [];
+        raw.split("\n").forEach((line) => {
+          if (line.startsWith("event:")) event = line.slice(6).trim();
+          else if (line.startsWith("data:")) dataLines.push(line.slice(5).trim());
+        });
+        if (dataLines.length) onEvent(event, JSON.parse(dataLines.join("\n")));
+        boundary = buffer.indexOf("\n\n");
       }
-    }, 30);
-    state.activeStreamIntervals.push(interval);
+    }
   }
 
   function formatMessageContent(content) {
@@ -529,7 +563,7 @@ document.addEventListener("DOMContentLoaded", () => {
    * - 대화방이 없으면 새 대화 생성
    * - 임시 사용자 메시지 렌더링 및 로딩 메시지 표시
    * - 서버로 메시지 POST 요청 전송
-   * - 정상 응답 시 임시 메시지를 실제 메시지로 대체, assistant 메시지 스트리밍 처리
+   * - SSE로 진행 상황/답변 토큰을 받아 즉시 렌더링, 완료 시 저장된 메시지로 대체
    * - 오류 발생 시 임시 메시지 제거 및 메시지 전송 실패 알림
    * - 항상 로딩 상태, 전송상태 초기화
    * @param {string} content - 사용자가 입력한 메시지
@@ -565,51 +599,79 @@ document.addEventListener("DOMContentLoaded", () => {
     renderMessages();
     showLoadingMessage();
 
+    const conversationId = state.currentConversationId;
+    // 토큰을 누적해 보여줄 임시 assistant 메시지 (done 이벤트에서 저장된 메시지로 대체)
+    const streamingMessage = {
+      id: `stream-${Date.now()}`,
+      role: "assistant",
+      content: "",
+      created_at: new Date().toISOString(),
+      citations: [],
+      feedback: "",
+    };
+
     try {
-      // 서버에 메시지 전송 요청
-      const res = await fetch(`${conversationBaseUrl}${state.currentConversationId}/messages/`, {
+      // 서버에 메시지 전송 요청 (SSE 스트리밍 응답)
+      const res = await fetch(`${conversationBaseUrl}${conversationId}/messages/stream/`, {
         method: "POST",
         credentials: "same-origin",
         headers: {
           "Content-Type": "application/json",
           "X-CSRFToken": getCsrfToken(),
-          Accept: "application/json",
+          Accept: "text/event-stream",
         },
         body: JSON.stringify({ content }),
       });
-      if (!res.ok) throw new Error("send_failed");
-
-      const data = await res.json();
-
-      // 임시 메시지를 대체/제거
-      const conversationMsgs = state.messagesCache[state.currentConversationId] || [];
-      const tempIndex = conversationMsgs.findIndex((msg) => msg.id === tempUserMessage.id);
-      if (tempIndex !== -1) {
-        conversationMsgs.splice(tempIndex, 1);
-      }
+      if (!res.ok || !res.body) throw new Error("send_failed");
+
+      await readEventStream(res, (event, data) => {
+        const conversationMsgs = state.messagesCache[conversationId] || [];
+        const isCurrent = conversationId === state.currentConversationId;
+
+        if (event === "user_message") {
+          // 임시 메시지를 저장된 실제 메시지로 대체
+          const tempIndex = conversationMsgs.findIndex((msg) => msg.id === tempUserMessage.id);
+          if (tempIndex !== -1) conversationMsgs.splice(tempIndex, 1, data.message);
+        } else if (event === "progress") {
+          updateLoadingStatus(data.node);
+        } else if (event === "token") {
+          // 첫 토큰 도착 시 로딩 말풍선을 답변 말풍선으로 교체
+          if (!conversationMsgs.includes(streamingMessage)) {
+            removeLoadingMessage();
+            conversationMsgs.push(streamingMessage);
+          }
+          streamingMessage.content += data.text;
+          if (isCurrent) scheduleStreamRender();
+        } else if (event === "done") {
+          // 출처 재번호화가 적용된 최종 답변으로 교체
+          cancelStreamRender();
+          const streamIndex = conversationMsgs.indexOf(streamingMessage);
+          if (streamIndex !== -1) conversationMsgs.splice(streamIndex, 1);
+          conversationMsgs.push(...(data.messages || []));
+          if (isCurrent) renderMessages();
+        } else if (event === "error") {
+          // 오류 메시지 있으면 콘솔 경고
+          console.warn("LLM 오류:", data.error);
+          const streamIndex = conversationMsgs.indexOf(streamingMessage);
+          if (streamIndex !== -1) conversationMsgs.splice(streamIndex, 1);
+          if (isCurrent) renderMessages();
+        }
+        state.messagesCache[conversationId] = conversationMsgs;
+      });
 
-      // 서버에서 받은 실제 메시지 추가
-      const newMessages = data.messages || [];
-      conversationMsgs.push(...newMessages);
-      state.messagesCache[state.currentConversationId] = conversationMsgs;
-      renderMessages();
-      // 어시스턴트 메시지는 스트리밍 적용
-      newMessages.filter((msg) => msg.role === "assistant").forEach(streamAssistantMessage);
-      // 오류 메시지 있으면 콘솔 경고
-      if (data.error) {
-        console.warn("LLM 오류:", data.error);
-      }
-      // 대화 목록 새로고침
+      // 대화 목록 새로고침 (스트림 종료 후 제목 요약까지 반영)
       await refreshConversations({ preserveCurrent: true });
     } catch (err) {
       // 전송 실패 시 임시 메시지 제거 후 UI 갱신
       console.error(err);
       alert("메시지 전송에 실패했습니다.");
-      const conversationMsgs = state.messagesCache[state.currentConversationId] || [];
-      const tempIndex = conversationMsgs.findIndex((msg) => msg.id === tempUserMessage.id);
-      if (tempIndex !== -1) {
-        conversationMsgs.splice(tempIndex, 1);
-        state.messagesCache[state.currentConversationId] = conversationMsgs;
+      cancelStreamRender();
+      const conversationMsgs = state.messagesCache[conversationId] || [];
+      const leftovers = conversationMsgs.filter(
+        (msg) => msg.id === tempUserMessage.id || msg === streamingMessage
+      );
+      if (leftovers.length) {
+        state.messagesCache[conversationId] = conversationMsgs.filter((msg) => !leftovers.includes(msg));
         renderMessages();
       }
     } finally {
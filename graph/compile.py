@@ -1,29 +1,141 @@
+import inspect
+import time
+
 from langgraph.graph import StateGraph, END
 
 # 노드 함수 import
 from graph.state import SelfRAGState
-from graph.nodes.classifier import classifier
-from graph.nodes.medical_check import medical_check
-from graph.nodes.web_search import web_search
-from graph.nodes.retrieval import retrieval
-from graph.nodes.evaluate_chunk import evaluate_chunk
-from graph.nodes.rewrite_query import rewrite_query
-from graph.nodes.generate_answer import generate_answer
-from graph.nodes.memory import memory_read, memory_write
-
-def create_medical_rag_workflow():
+from graph.nodes.classifier import aclassifier, classifier
+from graph.nodes.medical_check import amedical_check, medical_check
+from graph.nodes.router import ROUTER_MODE, arouter, router
+from graph.nodes.web_search import aweb_search, web_search
+from graph.nodes.retrieval import (
+    RETRIEVAL_PREFETCH,
+    aprefetch_retrieval,
+    aretrieval,
+    prefetch_retrieval,
+    retrieval,
+)
+from graph.nodes.evaluate_chunk import aevaluate_chunk, evaluate_chunk
+from graph.nodes.rewrite_query import arewrite_query, rewrite_query
+from graph.nodes.generate_answer import agenerate_answer, generate_answer
+from graph.nodes.memory import amemory_read, amemory_write, memory_read, memory_write
+from graph.nodes.answer_cache import (
+    aanswer_cache_hit,
+    aanswer_cache_lookup,
+    aanswer_cache_store,
+    answer_cache_hit,
+    answer_cache_lookup,
+    answer_cache_route,
+    answer_cache_store,
+)
+from rag.services.answer_cache import answer_cache_enabled
+
+# 노드 이름 → (동기 함수, 비동기 함수)
+NODES = {
+    "memory_read": (memory_read, amemory_read),
+    "classifier": (classifier, aclassifier),
+    "medical_check": (medical_check, amedical_check),
+    "web_search": (web_search, aweb_search),
+    "retrieval": (retrieval, aretrieval),
+    "evaluate_chunk": (evaluate_chunk, aevaluate_chunk),
+    "rewrite_query": (rewrite_query, arewrite_query),
+    "generate_answer": (generate_answer, agenerate_answer),
+    "memory_write": (memory_write, amemory_write),
+}
+PREFETCH_NODE = (prefetch_retrieval, aprefetch_retrieval)
+# classifier + medical_check 대신 쓰는 통합 분류 노드 (structured output 1회)
+ROUTER_NODE = (router, arouter)
+ANSWER_CACHE_NODES = {
+    "answer_cache_lookup": (answer_cache_lookup, aanswer_cache_lookup),
+    "answer_cache_hit": (answer_cache_hit, aanswer_cache_hit),
+    "answer_cache_store": (answer_cache_store, aanswer_cache_store),
+}
+
+# classifier / medical_check는 같은 step에서 병렬 실행되므로 각자 담당 키만 갱신한다
+# (LangGraph는 한 step에서 같은 키를 두 노드가 갱신하면 InvalidUpdateError)
+PARALLEL_NODE_KEYS = {
+    "classifier": ("original_question", "conversation_type", "is_follow_up", "final_answer"),
+    "medical_check": ("is_terminology",),
+    "router": ("original_question", "conversation_type", "is_follow_up", "final_answer", "is_terminology"),
+}
+
+
+def _partial_update(node, keys):
+    """state 전체를 반환하는 노드를 keys만 반환하는 노드로 감싼다"""
+    if inspect.iscoroutinefunction(node):
+        async def _anode(state):
+            result = await node(dict(state))
+            return {key: result[key] for key in keys if key in result}
+        return _anode
+
+    def _node(state):
+        result = node(dict(state))
+        return {key: result[key] for key in keys if key in result}
+    return _node
+
+
+def _timed(name, node):
+    """노드 실행 시간을 node_timings[name]에 기록 (ms)"""
+    def _record(result, started):
+        elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+        print(f"• [Timing] {name} {elapsed_ms:.0f}ms")
+        result = dict(result or {})
+        result["node_timings"] = {name: elapsed_ms}
+        return result
+
+    if inspect.iscoroutinefunction(node):
+        async def _anode(state):
+            started = time.perf_counter()
+            return _record(await node(state), started)
+        return _anode
+
+    def _node(state):
+        started = time.perf_counter()
+        return _record(node(state), started)
+    return _node
+
+
+def create_medical_rag_workflow(
+    use_async: bool = False,
+    prefetch: bool | None = None,
+    answer_cache: bool | None = None,
+    merged_router: bool | None = None,
+):
     """
     의료 RAG 워크플로우 생성 (개선 버전)
     conversation_type 기반 라우팅
+
+    Args:
+        use_async: True면 비동기 노드(AsyncOpenAI, psycopg3 비동기 풀)로 구성
+                   → app.ainvoke()로 실행 (ASGI 뷰에서 요청당 스레드를 점유하지 않음)
+                   False면 기존 동기 노드 → app.invoke()
+        prefetch: True면 classifier / medical_check와 병렬로 원 질문 검색(prefetch_retrieval)을 실행하고
+                  retrieval에서 재사용 (None이면 RETRIEVAL_PREFETCH 환경변수)
+                  실행 시간은 state["node_timings"]로 확인
+        answer_cache: True면 분류와 병렬로 유사 질문 답변을 조회(answer_cache_lookup)하고,
+                      의학 질문(후속 질문 제외)이 적중하면 검색/평가/답변 생성을 건너뛴다.
+                      새 답변은 answer_cache_store에서 저장 (None이면 ANSWER_CACHE 환경변수)
+        merged_router: True면 classifier + medical_check 대신 router 노드 하나가
+                       conversation_type / is_follow_up / is_terminology를 LLM 1회(structured output)로 결정
+                       (None이면 ROUTER_MODE 환경변수, merged일 때 True)
     """
+    if prefetch is None:
+        prefetch = RETRIEVAL_PREFETCH
+    if answer_cache is None:
+        answer_cache = answer_cache_enabled()
+    if merged_router is None:
+        merged_router = ROUTER_MODE == "merged"
     workflow = StateGraph(SelfRAGState)
 
     def route_by_conversation_type(state: SelfRAGState) -> str:
         """
-        conversation_type에 따라 분기
+        conversation_type에 따라 분기 (classifier + medical_check 완료 후)
         - "user_info": generate_answer로 (원본 질문과 conversation_history 전달)
         - "non_medical": END로 (안내 메시지 출력 후 바로 종료)
-        - "medical": medical_check로 (기존 RAG 파이프라인)
+        - "medical": is_terminology에 따라 web_search / retrieval로 (기존 RAG 파이프라인)
+          (후속 질문이 아니고 answer cache가 적중했으면 answer_cache_hit으로)
+        user_info / non_medical이면 병렬로 미리 실행한 medical_check 결과는 버린다
         """
         conv_type = state.get("conversation_type", "medical")
 
@@ -31,8 +143,10 @@ def create_medical_rag_workflow():
             return "generate_answer"
         elif conv_type == "non_medical":
             return END
+        elif state.get("cached_answer") and not state.get("is_follow_up", False):
+            return "answer_cache_hit"
         else:  # medical
-            return "medical_check"
+            return "web_search" if state.get("is_terminology") else "retrieval"
 
     def evaluate_relevance(state: SelfRAGState) -> str:
         """검색된 문서의 관련성 평가 후 분기"""
@@ -45,49 +159,62 @@ def create_medical_rag_workflow():
         return "rewrite_query"
 
     # --- 노드 등록 ---
-    workflow.add_node("memory_read", memory_read)
-    workflow.add_node("classifier", classifier)
-    workflow.add_node("medical_check", medical_check)
-    workflow.add_node("web_search", web_search)
-    workflow.add_node("retrieval", retrieval)
-    workflow.add_node("evaluate_chunk", evaluate_chunk)
-    workflow.add_node("rewrite_query", rewrite_query)
-    workflow.add_node("generate_answer", generate_answer)
-    workflow.add_node("memory_write", memory_write)
+    nodes = dict(NODES)
+    if merged_router:
+        del nodes["classifier"], nodes["medical_check"]
+        nodes["router"] = ROUTER_NODE
+    if prefetch:
+        nodes["prefetch_retrieval"] = PREFETCH_NODE
+    if answer_cache:
+        nodes.update(ANSWER_CACHE_NODES)
+    for name, (sync_node, async_node) in nodes.items():
+        node = async_node if use_async else sync_node
+        if name in PARALLEL_NODE_KEYS:
+            node = _partial_update(node, PARALLEL_NODE_KEYS[name])
+        workflow.add_node(name, _timed(name, node))
+    # classifier / medical_check (또는 router) 합류 지점 (state 변경 없음, answer cache 사용 시 miss 집계)
+    workflow.add_node("route", answer_cache_route if answer_cache else (lambda state: {}))
 
     # --- 시작점 설정 ---
     workflow.set_entry_point("memory_read")
 
     # --- 엣지 정의 ---
 
-    # 0. Memory Read → Classifier (일반 엣지)
-    workflow.add_edge("memory_read", "classifier")
-
-    # 1. Classifier 다음 경로 (조건부 엣지)
+    # 0. Memory Read → Classifier / Medical Check (fan-out, 병렬 실행)
+    # - medical_check는 질문만 보면 되므로 분류 결과를 기다리지 않고 미리 실행
+    #   → 의학 질문마다 LLM 왕복 1회를 critical path에서 제거
+    # - merged_router면 router 하나가 두 판정을 LLM 1회로 수행
+    joined = ["router"] if merged_router else ["classifier", "medical_check"]
+    for name in joined:
+        workflow.add_edge("memory_read", name)
+    # - prefetch 사용 시 검색도 같은 step에서 시작 (LLM 분류보다 짧아 대기 시간 증가 없음)
+    if prefetch:
+        workflow.add_edge("memory_read", "prefetch_retrieval")
+        joined.append("prefetch_retrieval")
+    # - answer cache 사용 시 유사 질문 답변 조회도 같은 step에서 실행
+    if answer_cache:
+        workflow.add_edge("memory_read", "answer_cache_lookup")
+        joined.append("answer_cache_lookup")
+
+    # 1. Classifier + Medical Check (+ Prefetch, Answer Cache) → Route (fan-in, 모두 끝나면 진행)
+    workflow.add_edge(joined, "route")
+
+    # 2. Route 다음 경로 (조건부 엣지)
     # - conversation_type에 따라 분기
     #   - "user_info": generate_answer로 (원본 질문과 conversation_history 전달)
     #   - "non_medical": END로 (안내 메시지 출력 후 바로 종료)
-    #   - "medical": medical_check로 (기존 RAG 파이프라인)
-    workflow.add_conditional_edges(
-        "classifier",
-        route_by_conversation_type,
-        {
-            "generate_answer": "generate_answer",
-            "medical_check": "medical_check",
-            END: END
-        }
-    )
-
-    # 2. Medical Check 다음 경로 (조건부 엣지)
-    # - is_terminology가 True면 web_search로, False면 retrieval로
-    workflow.add_conditional_edges(
-        "medical_check",
-        lambda state: "terminology" if state.get("is_terminology") else "general",
-        {
-            "terminology": "web_search",
-            "general": "retrieval",
-        }
-    )
+    #   - "medical": is_terminology가 True면 web_search로, False면 retrieval로
+    #                (answer cache 적중 시 answer_cache_hit → Memory Write)
+    route_map = {
+        "generate_answer": "generate_answer",
+        "web_search": "web_search",
+        "retrieval": "retrieval",
+        END: END
+    }
+    if answer_cache:
+        route_map["answer_cache_hit"] = "answer_cache_hit"
+        workflow.add_edge("answer_cache_hit", "memory_write")
+    workflow.add_conditional_edges("route", route_by_conversation_type, route_map)
 
     # 3. Web Search → Generate Answer → END (일반 엣지)
     workflow.add_edge("web_search", "generate_answer")
@@ -112,8 +239,12 @@ def create_medical_rag_workflow():
     # 6. Rewrite Query → Retrieval (순환) (일반 엣지)
     workflow.add_edge("rewrite_query", "retrieval")
 
-    # 7. Generate Answer → Memory Write → END (일반 엣지)
-    workflow.add_edge("generate_answer", "memory_write")
+    # 7. Generate Answer (→ Answer Cache Store) → Memory Write → END (일반 엣지)
+    if answer_cache:
+        workflow.add_edge("generate_answer", "answer_cache_store")
+        workflow.add_edge("answer_cache_store", "memory_write")
+    else:
+        workflow.add_edge("generate_answer", "memory_write")
 
     # 8. Memory Write → END (일반 엣지)
     workflow.add_edge("memory_write", END)
@@ -0,0 +1,186 @@
+'''
+목적: classifier LLM(gpt-5-nano) 호출 전 로컬 1차 분류 - 명확한 입력만 결정하고 애매하면 LLM으로
+역할:
+규칙(정규식): 이름 소개/질문, 대화 내용 회상 → user_info / 인사·감사, 명백한 비의학 요청 → non_medical
+kNN: 라벨 예시(graph/data/classifier_examples.jsonl)와 질문 임베딩의 코사인 유사도 상위 k개 가중 투표
+is_follow_up: user_info / non_medical이거나 이전 대화가 없으면 False,
+              이전 대화가 있는데 지시어("그 연구", "아까")나 생략형 짧은 질문이면 LLM에 맡김
+FAST_CLASSIFIER=off | rules | knn (knn은 규칙 다음 단계, 기본 off)
+질문 임베딩은 embedding 캐시를 공유하므로 이어지는 retrieval은 같은 질문을 다시 임베딩하지 않는다.
+'''
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from rag.services.embedder import get_embeddings
+
+load_dotenv()
+
+DEFAULT_EXAMPLES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "classifier_examples.jsonl")
+CONVERSATION_TYPES = ("medical", "user_info", "non_medical")
+# 규칙은 짧은 단문에만 적용 (긴 문장은 여러 의도가 섞일 수 있음)
+RULE_MAX_CHARS = 40
+
+# 의학 단서가 있으면 non_medical 규칙을 적용하지 않음 ("날씨 때문에 관절이 아파")
+MEDICAL_HINT = re.compile(
+    r"(병|증상|치료|약|환자|질환|암|수술|진단|임상|혈압|혈당|통증|아파|아프|감염|백신|검사|의사|병원|건강|"
+    r"생존|코호트|메타분석|유전자|세포|바이러스|호르몬)"
+)
+USER_INFO_RULES = {
+    "name_ask": re.compile(r"^(내|제)\s*이름\s*(이|은|을|좀)?\s*(뭐|무엇|알려|기억|말해)"),
+    "name_intro": re.compile(r"^(내|제)\s*이름(은|이)\s*\S{1,15}?\s*(이야|야|입니다|이에요|예요|이라고|라고)"),
+    "recall": re.compile(
+        r"(방금|아까|직전에?|이전에|지금까지|앞에서).{0,10}"
+        r"(뭐라고\s*(했|말했)|뭐였|무슨\s*(얘기|이야기|대화|질문)|(말한|물어본|질문한|얘기한)\s*(거|것|게|내용)\s*(다시\s*)?(알려|말해|보여|뭐))"
+    ),
+}
+NON_MEDICAL_RULES = {
+    "greeting": re.compile(
+        r"^(안녕(하세요|하십니까)?|하이|헬로|hi|hello|반가워(요)?|반갑습니다|고마워(요)?|감사(합니다|해요)|땡큐|thanks?( you)?|ㅎㅇ)"
+        r"[\s!~.?ㅎㅋ^]*$",
+        re.I,
+    ),
+    "off_topic": re.compile(r"(날씨|뉴스|주식|코인|비트코인|로또|맛집|운세|(영화|노래|드라마|책)\s*추천)"),
+}
+# 이전 대화를 가리키는 표현 - 후속 질문 여부는 LLM이 판단
+REFERENCE_HINT = re.compile(
+    r"(^|\s)(그|이|저|해당|위|앞의?|그럼|그러면|그거|그건|그게|이거|이건|아까|방금|또|더|추가로|그래서)(\s|$|[은는이가을를의에로])"
+)
+# 이전 대화가 있을 때 이보다 짧은 질문은 생략형 후속 질문일 수 있음 ("부작용은?")
+FOLLOW_UP_MIN_CHARS = 12
+
+
+@dataclass
+class FastDecision:
+    conversation_type: str
+    is_follow_up: bool
+    source: str  # "rule:<이름>" | "knn"
+    confidence: float = 1.0
+
+
+def load_examples(path: str = DEFAULT_EXAMPLES_PATH) -> List[Tuple[str, str]]:
+    """라벨 예시 jsonl ({"text", "label"}) → [(text, label)]"""
+    examples = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if item.get("label") in CONVERSATION_TYPES and item.get("text"):
+                examples.append((item["text"].strip(), item["label"]))
+    return examples
+
+
+class FastClassifier:
+    """
+    규칙 → kNN 순서로 분류, 어느 쪽도 확신이 없으면 None (LLM classifier 사용)
+
+    - min_similarity: kNN 최근접 예시 유사도 하한
+    - min_agreement: 상위 k개 유사도 가중 투표에서 1위 라벨 비중 하한
+    임계값은 scripts/eval_fast_classifier.py로 LLM 분류와 비교해 조정
+    """
+
+    def __init__(
+        self,
+        examples: Sequence[Tuple[str, str]],
+        use_knn: bool = True,
+        k: int = 5,
+        min_similarity: float = 0.6,
+        min_agreement: float = 0.8,
+    ):
+        self.examples = list(examples)
+        self.use_knn = use_knn and bool(self.examples)
+        self.k = k
+        self.min_similarity = min_similarity
+        self.min_agreement = min_agreement
+        self._matrix: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    # --- 규칙 ---
+    def classify_rules(self, query: str, history: Sequence[Dict[str, str]]) -> Optional[FastDecision]:
+        text = query.strip()
+        if len(text) > RULE_MAX_CHARS:
+            return None
+        for name, pattern in USER_INFO_RULES.items():
+            if pattern.search(text):
+                return FastDecision("user_info", False, f"rule:{name}")
+        if not MEDICAL_HINT.search(text):
+            for name, pattern in NON_MEDICAL_RULES.items():
+                if pattern.search(text):
+                    return FastDecision("non_medical", False, f"rule:{name}")
+        return None
+
+    # --- kNN ---
+    def wants_knn(self, query: str, history: Sequence[Dict[str, str]]) -> bool:
+        """kNN 결과를 쓸 수 있는 입력인지 (후속 질문 가능성이 있으면 임베딩도 생략)"""
+        return self.use_knn and not self._maybe_follow_up(query, history)
+
+    def _example_matrix(self) -> np.ndarray:
+        if self._matrix is None:
+            with self._lock:
+                if self._matrix is None:
+                    vectors = np.asarray(get_embeddings([text for text, _ in self.examples]), dtype=np.float32)
+                    self._matrix = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        return self._matrix
+
+    def knn_vote(self, query_vector: Sequence[float]) -> Tuple[str, float, float]:
+        """(1위 라벨, 최근접 유사도, 1위 라벨 가중 비중) - 임계값 적용 전 원시값"""
+        vector = np.asarray(query_vector, dtype=np.float32)
+        similarities = self._example_matrix() @ (vector / np.linalg.norm(vector))
+        top = np.argsort(-similarities)[: self.k]
+        weights: Dict[str, float] = {}
+        for i in top:
+            label = self.examples[i][1]
+            weights[label] = weights.get(label, 0.0) + max(float(similarities[i]), 0.0)
+        label = max(weights, key=weights.get)
+        total = sum(weights.values())
+        return label, float(similarities[top[0]]), weights[label] / total if total else 0.0
+
+    def classify_knn(
+        self, query: str, history: Sequence[Dict[str, str]], query_vector: Sequence[float]
+    ) -> Optional[FastDecision]:
+        label, similarity, agreement = self.knn_vote(query_vector)
+        if similarity < self.min_similarity or agreement < self.min_agreement:
+            return None
+        return FastDecision(label, False, "knn", round(agreement, 3))
+
+    def _maybe_follow_up(self, query: str, history: Sequence[Dict[str, str]]) -> bool:
+        if not history:
+            return False
+        text = query.strip()
+        return len(text) < FOLLOW_UP_MIN_CHARS or bool(REFERENCE_HINT.search(text))
+
+
+_fast_classifier: Optional[FastClassifier] = None
+_fast_classifier_lock = threading.Lock()
+
+
+def get_fast_classifier() -> Optional[FastClassifier]:
+    """
+    환경변수 기반 프로세스 공용 1차 분류기 (FAST_CLASSIFIER=off이면 None)
+    - FAST_CLASSIFIER: off | rules | knn
+    - FAST_CLASSIFIER_EXAMPLES: 라벨 예시 jsonl 경로 (기본 graph/data/classifier_examples.jsonl)
+    - FAST_CLASSIFIER_K / _MIN_SIMILARITY / _MIN_AGREEMENT: kNN 설정 (기본 5, 0.6, 0.8)
+    """
+    global _fast_classifier
+    mode = os.getenv("FAST_CLASSIFIER", "off").lower()
+    if mode not in ("rules", "knn"):
+        return None
+    if _fast_classifier is None:
+        with _fast_classifier_lock:
+            if _fast_classifier is None:
+                examples = load_examples(os.getenv("FAST_CLASSIFIER_EXAMPLES") or DEFAULT_EXAMPLES_PATH) if mode == "knn" else []
+                _fast_classifier = FastClassifier(
+                    examples,
+                    use_knn=mode == "knn",
+                    k=int(os.getenv("FAST_CLASSIFIER_K", "5")),
+                    min_similarity=float(os.getenv("FAST_CLASSIFIER_MIN_SIMILARITY", "0.6")),
+                    min_agreement=float(os.getenv("FAST_CLASSIFIER_MIN_AGREEMENT", "0.8")),
+                )
+    return _fast_classifier
@@ -0,0 +1,79 @@
+'''
+목적: 그래프 노드가 공유하는 OpenAI 클라이언트
+역할:
+동기(OpenAI) / 비동기(AsyncOpenAI) 클라이언트를 프로세스당 1개씩 재사용 (내부 HTTP 커넥션 풀 공유)
+노드는 프롬프트 구성/결과 반영만 하고, 호출은 chat() / achat() / astream_chat()으로 한다
+'''
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Dict, Optional
+
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, OpenAI
+
+load_dotenv()
+
+_client: Optional[OpenAI] = None
+_client_lock = threading.Lock()
+# AsyncOpenAI의 httpx 커넥션은 생성된 이벤트 루프에 묶이므로 루프별로 보관
+_async_clients: Dict[asyncio.AbstractEventLoop, AsyncOpenAI] = {}
+
+
+def get_client() -> OpenAI:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenAI()
+    return _client
+
+
+def get_async_client() -> AsyncOpenAI:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        # 닫힌 루프(예: async_to_sync 요청 단위 루프)의 클라이언트 정리
+        for stale in [l for l in _async_clients if l.is_closed()]:
+            del _async_clients[stale]
+        client = _async_clients[loop] = AsyncOpenAI()
+    return client
+
+
+async def aclose_async_client() -> None:
+    """현재 루프의 AsyncOpenAI 클라이언트를 닫고 제거 (요청 단위 루프가 끝나기 전에 호출)"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+def chat(model: str, prompt: str, **kwargs: Any) -> str:
+    """단일 user 메시지로 chat completion 호출 후 본문 반환"""
+    res = get_client().chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        **kwargs,
+    )
+    return (res.choices[0].message.content or "").strip()  # 거부(refusal) 시 content=None
+
+
+async def achat(model: str, prompt: str, **kwargs: Any) -> str:
+    """chat()의 비동기 버전"""
+    res = await get_async_client().chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        **kwargs,
+    )
+    return (res.choices[0].message.content or "").strip()  # 거부(refusal) 시 content=None
+
+
+async def astream_chat(model: str, prompt: str, **kwargs: Any) -> AsyncIterator[str]:
+    """achat()의 스트리밍 버전 - 응답 토큰(delta)을 생성되는 대로 yield"""
+    stream = await get_async_client().chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        stream=True,
+        **kwargs,
+    )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
@@ -0,0 +1,612 @@
+'''
+목적: 그래프 대화 메모리(conversation_memory) 저장소
+역할:
+MemoryStore 인터페이스 - 메모리 노드(graph/nodes/memory.py)는 저장소 종류와 무관하게 읽기/쓰기
+SQLiteMemoryStore: 스레드별 커넥션 재사용, WAL + busy_timeout, 스키마는 파일당 1회만 생성
+PostgresMemoryStore: Django와 같은 Postgres DB(POSTGRES_*)를 공용 커넥션 풀(pg_pool)로 사용
+    → gunicorn 워커 여러 개가 동시에 써도 단일 파일 락으로 직렬화되지 않음
+ChatMessageHistoryStore: 별도 저장 없이 Django chat_message 테이블에서 최근 N턴을 읽음 (이중 저장 제거)
+MEMORY_BACKEND=chat_message | sqlite | postgres 로 선택 (기본 chat_message - 웹 대화를 두 번 저장하지 않음, sqlite/postgres는 그래프 단독 실행용)
+MemoryRetention: 대화창별 보관 개수는 저장 시 증분 정리, 기간(30일) 정리는 백그라운드 배치 삭제
+'''
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from rag.services.pg_pool import pg_connection
+from rag.services.tokens import count_tokens
+
+load_dotenv()
+
+# DB 파일 경로 설정 (graph/memory/memory.db)
+MEMORY_DIR = os.path.join(os.path.dirname(__file__), 'memory')
+DB_PATH = os.path.join(MEMORY_DIR, 'memory.db')
+
+# (question_summary, answer_summary, original_question, assistant_answer)
+MemoryRow = Tuple[str, str, str, str]
+
+
+class MemoryStore(ABC):
+    """
+    대화 메모리 저장소 인터페이스
+
+    - recent: 대화창(conversation_id)별 최근 대화 (None이면 전체), (conversation_id, timestamp) 인덱스로 조회
+    - add: 한 턴 저장 후 같은 대화창의 최신 keep_per_conversation개만 남김 (삭제된 행 수 반환)
+    - delete_older_than: days일 이상 지난 대화를 batch_size개씩 삭제 (MemoryRetention에서 백그라운드 실행)
+    - claim_summaries / set_summaries: 요약이 비어 있는 행 선점(claimed_at) / 요약 채우기 (MemorySummarizer에서 배치 처리)
+      선점은 원자적으로 처리되어 워커 여러 개가 같은 행을 요약하지 않고, claim_timeout초가 지난 선점은 만료된다.
+    """
+
+    keep_per_conversation = 10
+    # False면 대화를 다른 곳(Django chat_message)에서 저장하므로 memory_write가 쓰지 않음
+    stores_turns = True
+
+    @abstractmethod
+    def init_schema(self) -> None:
+        ...
+
+    @abstractmethod
+    def recent(self, conversation_id: Optional[str], limit: int) -> List[MemoryRow]:
+        ...
+
+    @abstractmethod
+    def add(
+        self,
+        conversation_id: Optional[str],
+        original_question: str,
+        assistant_answer: str,
+        question_summary: str,
+        answer_summary: str,
+        conversation_type: str,
+    ) -> int:
+        ...
+
+    @abstractmethod
+    def delete_older_than(self, days: int, batch_size: int = 1000) -> int:
+        ...
+
+    @abstractmethod
+    def claim_summaries(self, limit: int, claim_timeout: float = 300.0) -> List[Tuple[int, str, str]]:
+        """
+        (id, original_question, assistant_answer) - question_summary가 NULL이고 선점되지 않은(또는 선점이 만료된) 행을
+        오래된 순으로 최대 limit개 선점하고 반환
+        """
+        ...
+
+    @abstractmethod
+    def set_summaries(self, summaries: List[Tuple[int, str, str]]) -> None:
+        """(id, question_summary, answer_summary) 목록으로 요약 컬럼 채우기"""
+        ...
+
+    @staticmethod
+    def _conversation_filter(conversation_id: Optional[str], placeholder: str) -> str:
+        # NULL은 = 로 비교되지 않으므로 conversation_id 없는 대화는 IS NULL로 하나의 묶음 처리
+        return "conversation_id IS NULL" if conversation_id is None else f"conversation_id = {placeholder}"
+
+
+class SQLiteMemoryStore(MemoryStore):
+    """
+    SQLite 파일 저장소
+    sqlite3 커넥션은 스레드 간 공유할 수 없으므로 스레드마다 1개를 열어 재사용한다.
+    WAL 모드에서는 읽기가 쓰기를 기다리지 않고, busy_timeout 동안 쓰기 락을 재시도한다.
+    """
+
+    _initialized_paths = set()
+    _init_lock = threading.Lock()
+
+    def __init__(self, path: str = DB_PATH, busy_timeout_ms: int = 5000, keep_per_conversation: int = 10):
+        self.path = path
+        self.keep_per_conversation = keep_per_conversation
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._create_schema(conn)
+            self._local.conn = conn
+        return conn
+
+    def init_schema(self) -> None:
+        """테이블이 없으면 생성 (파일당 프로세스에서 1회)"""
+        self._conn()
+
+    # 1: timestamp를 ISO 문자열(TEXT) → unix epoch 초(REAL)로 변경, (conversation_id, timestamp) 인덱스 추가
+    # 2: 요약 대기 행 부분 인덱스 추가
+    # 3: 요약 선점 시각(claimed_at) 컬럼 추가
+    SCHEMA_VERSION = 3
+
+    def _create_schema(self, conn: sqlite3.Connection) -> None:
+        if self.path in self._initialized_paths:
+            return
+        with self._init_lock:
+            if self.path in self._initialized_paths:
+                return
+            if conn.execute("PRAGMA user_version").fetchone()[0] < self.SCHEMA_VERSION:
+                self._migrate(conn)
+            conn.commit()
+            self._initialized_paths.add(self.path)
+            print("• [Memory] Database initialized")
+
+    def _migrate(self, conn: sqlite3.Connection) -> None:
+        """
+        스키마 생성 / 이전 버전(TEXT timestamp) 변환
+        기존 memory.db의 ISO 문자열은 로컬 시각 기준으로 epoch 초로 바꿔 옮긴다.
+        """
+        columns = {row[1]: row[2] for row in conn.execute("PRAGMA table_info(conversation_memory)")}
+        legacy = columns.get("timestamp", "").upper() == "TEXT"
+        with conn:
+            if legacy:
+                conn.execute("ALTER TABLE conversation_memory RENAME TO conversation_memory_legacy")
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS conversation_memory (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    conversation_id TEXT,
+                    timestamp REAL NOT NULL,
+                    original_question TEXT NOT NULL,
+                    assistant_answer TEXT NOT NULL,
+                    question_summary TEXT,
+                    answer_summary TEXT,
+                    conversation_type TEXT NOT NULL,
+                    claimed_at REAL
+                )
+            ''')
+            if columns and not legacy and "claimed_at" not in columns:
+                conn.execute("ALTER TABLE conversation_memory ADD COLUMN claimed_at REAL")
+            if legacy:
+                conn.create_function("iso_to_epoch", 1, _iso_to_epoch)
+                conn.execute('''
+                    INSERT INTO conversation_memory
+                    (id, conversation_id, timestamp, original_question, assistant_answer, question_summary, answer_summary, conversation_type)
+                    SELECT id, conversation_id, iso_to_epoch(timestamp), original_question, assistant_answer,
+                           question_summary, answer_summary, conversation_type
+                    FROM conversation_memory_legacy
+                ''')
+                conn.execute("DROP TABLE conversation_memory_legacy")
+                print("• [Memory] Migrated ISO timestamps to epoch seconds")
+            # 대화창별 최근 N개: 인덱스 범위 스캔 + 역순 읽기 (정렬/전체 스캔 없음)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_conversation_memory_conv_ts "
+                "ON conversation_memory (conversation_id, timestamp)"
+            )
+            # conversation_id 없는 조회 / 오래된 대화 삭제
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_conversation_memory_ts ON conversation_memory (timestamp)")
+            # 요약 대기 행 (백그라운드 요약 큐)
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_conversation_memory_pending "
+                "ON conversation_memory (id) WHERE question_summary IS NULL"
+            )
+            conn.execute(f"PRAGMA user_version = {self.SCHEMA_VERSION}")
+
+    def recent(self, conversation_id: Optional[str], limit: int) -> List[MemoryRow]:
+        conn = self._conn()
+        if conversation_id:
+            return conn.execute('''
+                SELECT question_summary, answer_summary, original_question, assistant_answer
+                FROM conversation_memory
+                WHERE conversation_id = ?
+                ORDER BY timestamp DESC
+                LIMIT ?
+            ''', (conversation_id, limit)).fetchall()
+        return conn.execute('''
+            SELECT question_summary, answer_summary, original_question, assistant_answer
+            FROM conversation_memory
+            ORDER BY timestamp DESC
+            LIMIT ?
+        ''', (limit,)).fetchall()
+
+    def add(self, conversation_id, original_question, assistant_answer, question_summary, answer_summary, conversation_type) -> int:
+        conn = self._conn()
+        timestamp = time.time()
+        with conn:
+            conn.execute('''
+                INSERT INTO conversation_memory
+                (conversation_id, timestamp, original_question, assistant_answer, question_summary, answer_summary, conversation_type)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (conversation_id, timestamp, original_question, assistant_answer, question_summary, answer_summary, conversation_type))
+            # 같은 대화창에서 keep_per_conversation개 초과분만 삭제 (인덱스 범위 스캔, 보통 0~1행)
+            params = (self.keep_per_conversation,) if conversation_id is None else (conversation_id, self.keep_per_conversation)
+            deleted = conn.execute(f'''
+                DELETE FROM conversation_memory
+                WHERE id IN (
+                    SELECT id FROM conversation_memory
+                    WHERE {self._conversation_filter(conversation_id, "?")}
+                    ORDER BY timestamp DESC
+                    LIMIT -1 OFFSET ?
+                )
+            ''', params).rowcount
+        return deleted
+
+    def delete_older_than(self, days: int, batch_size: int = 1000) -> int:
+        """배치마다 커밋해 쓰기 락을 짧게 유지 (요청 경로의 쓰기가 오래 기다리지 않도록)"""
+        conn = self._conn()
+        cutoff = time.time() - days * 86400
+        total = 0
+        while True:
+            with conn:
+                deleted = conn.execute('''
+                    DELETE FROM conversation_memory
+                    WHERE id IN (
+                        SELECT id FROM conversation_memory
+                        WHERE timestamp < ?
+                        LIMIT ?
+                    )
+                ''', (cutoff, batch_size)).rowcount
+            total += deleted
+            if deleted < batch_size:
+                return total
+
+
+    def claim_summaries(self, limit: int, claim_timeout: float = 300.0) -> List[Tuple[int, str, str]]:
+        """BEGIN IMMEDIATE로 쓰기 락을 먼저 잡아 조회와 선점 사이에 다른 프로세스가 끼어들지 못하게 한다"""
+        conn = self._conn()
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute('''
+                SELECT id, original_question, assistant_answer
+                FROM conversation_memory
+                WHERE question_summary IS NULL AND (claimed_at IS NULL OR claimed_at < ?)
+                ORDER BY id
+                LIMIT ?
+            ''', (now - claim_timeout, limit)).fetchall()
+            conn.executemany(
+                "UPDATE conversation_memory SET claimed_at = ? WHERE id = ?",
+                [(now, row[0]) for row in rows],
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return rows
+
+    def set_summaries(self, summaries: List[Tuple[int, str, str]]) -> None:
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                "UPDATE conversation_memory SET question_summary = ?, answer_summary = ? WHERE id = ?",
+                [(q_summary, a_summary, row_id) for row_id, q_summary, a_summary in summaries],
+            )
+
+
+class PostgresMemoryStore(MemoryStore):
+    """
+    Postgres 저장소 (Django와 같은 DB, rag.services.pg_pool 커넥션 재사용)
+    """
+
+    _initialized = False
+    _init_lock = threading.Lock()
+
+    def __init__(self, keep_per_conversation: int = 10):
+        self.keep_per_conversation = keep_per_conversation
+
+    def init_schema(self) -> None:
+        """테이블이 없으면 생성 (프로세스당 1회)"""
+        if PostgresMemoryStore._initialized:
+            return
+        with self._init_lock:
+            if PostgresMemoryStore._initialized:
+                return
+            with pg_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute('''
+                        CREATE TABLE IF NOT EXISTS conversation_memory (
+                            id BIGSERIAL PRIMARY KEY,
+                            conversation_id TEXT,
+                            timestamp TIMESTAMPTZ NOT NULL DEFAULT now(),
+                            original_question TEXT NOT NULL,
+                            assistant_answer TEXT NOT NULL,
+                            question_summary TEXT,
+                            answer_summary TEXT,
+                            conversation_type TEXT NOT NULL,
+                            claimed_at TIMESTAMPTZ
+                        );
+                        ALTER TABLE conversation_memory ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ;
+                        CREATE INDEX IF NOT EXISTS idx_conversation_memory_conv_ts
+                            ON conversation_memory (conversation_id, timestamp);
+                        CREATE INDEX IF NOT EXISTS idx_conversation_memory_ts
+                            ON conversation_memory (timestamp);
+                        CREATE INDEX IF NOT EXISTS idx_conversation_memory_pending
+                            ON conversation_memory (id) WHERE question_summary IS NULL;
+                    ''')
+                conn.commit()
+            PostgresMemoryStore._initialized = True
+            print("• [Memory] Database initialized (postgres)")
+
+    def _execute(self, query: str, params=(), fetch: Optional[str] = None):
+        self.init_schema()
+        with pg_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+                if fetch == "one":
+                    result = cur.fetchone()
+                elif fetch == "all":
+                    result = cur.fetchall()
+                else:
+                    result = cur.rowcount
+            conn.commit()
+        return result
+
+    def recent(self, conversation_id: Optional[str], limit: int) -> List[MemoryRow]:
+        if conversation_id:
+            return self._execute('''
+                SELECT question_summary, answer_summary, original_question, assistant_answer
+                FROM conversation_memory
+                WHERE conversation_id = %s
+                ORDER BY timestamp DESC
+                LIMIT %s
+            ''', (conversation_id, limit), fetch="all")
+        return self._execute('''
+            SELECT question_summary, answer_summary, original_question, assistant_answer
+            FROM conversation_memory
+            ORDER BY timestamp DESC
+            LIMIT %s
+        ''', (limit,), fetch="all")
+
+    def add(self, conversation_id, original_question, assistant_answer, question_summary, answer_summary, conversation_type) -> int:
+        self.init_schema()
+        with pg_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute('''
+                    INSERT INTO conversation_memory
+                    (conversation_id, original_question, assistant_answer, question_summary, answer_summary, conversation_type)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                ''', (conversation_id, original_question, assistant_answer, question_summary, answer_summary, conversation_type))
+                # 같은 대화창에서 keep_per_conversation개 초과분만 삭제
+                params = (self.keep_per_conversation,) if conversation_id is None else (conversation_id, self.keep_per_conversation)
+                cur.execute(f'''
+                    DELETE FROM conversation_memory
+                    WHERE id IN (
+                        SELECT id FROM conversation_memory
+                        WHERE {self._conversation_filter(conversation_id, "%s")}
+                        ORDER BY timestamp DESC
+                        OFFSET %s
+                    )
+                ''', params)
+                deleted = cur.rowcount
+            conn.commit()
+        return deleted
+
+    def delete_older_than(self, days: int, batch_size: int = 1000) -> int:
+        total = 0
+        while True:
+            deleted = self._execute('''
+                DELETE FROM conversation_memory
+                WHERE id IN (
+                    SELECT id FROM conversation_memory
+                    WHERE timestamp < now() - make_interval(days => %s)
+                    LIMIT %s
+                )
+            ''', (int(days), batch_size))
+            total += deleted
+            if deleted < batch_size:
+                return total
+
+
+    def claim_summaries(self, limit: int, claim_timeout: float = 300.0) -> List[Tuple[int, str, str]]:
+        """FOR UPDATE SKIP LOCKED - 다른 워커가 선점 중인 행은 기다리지 않고 건너뜀"""
+        rows = self._execute('''
+            UPDATE conversation_memory
+            SET claimed_at = now()
+            WHERE id IN (
+                SELECT id FROM conversation_memory
+                WHERE question_summary IS NULL
+                  AND (claimed_at IS NULL OR claimed_at < now() - make_interval(secs => %s))
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, original_question, assistant_answer
+        ''', (float(claim_timeout), limit), fetch="all")
+        return sorted(rows)
+
+    def set_summaries(self, summaries: List[Tuple[int, str, str]]) -> None:
+        self.init_schema()
+        with pg_connection() as conn:
+            with conn.cursor() as cur:
+                cur.executemany(
+                    "UPDATE conversation_memory SET question_summary = %s, answer_summary = %s WHERE id = %s",
+                    [(q_summary, a_summary, row_id) for row_id, q_summary, a_summary in summaries],
+                )
+            conn.commit()
+
+
+class ChatMessageHistoryStore(MemoryStore):
+    """
+    Django chat.Message(chat_message 테이블)를 대화 이력으로 사용하는 읽기 전용 저장소
+    - 웹에서 이미 저장한 메시지를 (conversation_id, created_at) 인덱스로 최근 것부터 읽음
+    - user → assistant 쌍만 턴으로 사용 (현재 질문처럼 답변이 없는 user 메시지는 제외)
+    - token_budget > 0이면 최신 턴부터 예산 안에서만 포함 (가장 최근 턴은 항상 포함)
+    conversation_id는 ChatConversation.id (services.py에서 str(conversation.id)로 전달)
+    """
+
+    stores_turns = False
+
+    def __init__(self, table_name: str = "chat_message", token_budget: int = 0):
+        self.table_name = table_name
+        self.token_budget = token_budget
+
+    def init_schema(self) -> None:
+        """테이블은 Django 마이그레이션이 관리"""
+
+    def recent(self, conversation_id: Optional[str], limit: int) -> List[MemoryRow]:
+        if not conversation_id or limit <= 0:
+            return []
+        # 답변 없는 user 메시지(현재 질문, 실패한 턴) 여유분 포함
+        with pg_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(f'''
+                    SELECT role, content
+                    FROM {self.table_name}
+                    WHERE conversation_id = %s AND role IN ('user', 'assistant')
+                    ORDER BY created_at DESC
+                    LIMIT %s
+                ''', (int(conversation_id), limit * 2 + 2))
+                messages = cur.fetchall()
+            conn.commit()
+        return self._within_budget(self._pair_turns(messages, limit))
+
+    @staticmethod
+    def _pair_turns(messages, limit: int) -> List[MemoryRow]:
+        """최신 → 오래된 순 메시지에서 (user, 바로 다음 assistant) 쌍 추출"""
+        rows = []
+        answer = None
+        for role, content in messages:
+            if role == "assistant":
+                answer = content
+            elif answer is not None:
+                rows.append((None, None, content, answer))
+                answer = None
+                if len(rows) >= limit:
+                    break
+        return rows
+
+    def _within_budget(self, rows: List[MemoryRow]) -> List[MemoryRow]:
+        if not self.token_budget:
+            return rows
+        kept, used = [], 0
+        for row in rows:
+            tokens = count_tokens(row[2]) + count_tokens(row[3])
+            if kept and used + tokens > self.token_budget:
+                break
+            kept.append(row)
+            used += tokens
+        if len(kept) < len(rows):
+            print(f"• [Memory] History trimmed to {len(kept)} turns (≈{used} tokens, budget {self.token_budget})")
+        return kept
+
+    def add(self, conversation_id, original_question, assistant_answer, question_summary, answer_summary, conversation_type) -> int:
+        return 0
+
+    def delete_older_than(self, days: int, batch_size: int = 1000) -> int:
+        return 0
+
+    def claim_summaries(self, limit: int, claim_timeout: float = 300.0) -> List[Tuple[int, str, str]]:
+        return []
+
+    def set_summaries(self, summaries: List[Tuple[int, str, str]]) -> None:
+        return None
+
+
+class MemoryRetention:
+    """
+    오래된 대화 정리(age sweep)를 요청 경로 밖에서 실행
+    maybe_sweep()은 interval초마다 한 번 백그라운드 스레드를 띄우고 바로 반환한다.
+    삭제는 batch_size개씩 나눠 커밋 (대화창별 개수 제한은 저장 시 MemoryStore.add에서 처리)
+    """
+
+    def __init__(self, store: MemoryStore, max_age_days: int = 30, interval: float = 3600.0, batch_size: int = 1000):
+        self.store = store
+        self.max_age_days = max_age_days
+        self.interval = interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._running = False
+        self._swept_at: Optional[float] = None
+
+    def maybe_sweep(self) -> bool:
+        """정리 주기가 지났으면 백그라운드 정리 시작 (시작했으면 True)"""
+        if not self.interval or not self.max_age_days:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            if self._running or (self._swept_at is not None and now - self._swept_at < self.interval):
+                return False
+            self._running = True
+            self._swept_at = now
+        threading.Thread(target=self._run, name="memory-retention", daemon=True).start()
+        return True
+
+    def sweep(self) -> int:
+        """max_age_days일 이상 지난 대화 삭제 (동기 실행)"""
+        print("• [Memory Transform] Starting cleanup...")
+        deleted = self.store.delete_older_than(self.max_age_days, self.batch_size)
+        print(f"• [Memory Transform] Deleted {deleted} old conversations")
+        return deleted
+
+    def _run(self) -> None:
+        try:
+            self.sweep()
+        except Exception as e:
+            print(f"• [Memory Transform] Cleanup failed: {e}")
+        finally:
+            self._running = False
+
+
+def _iso_to_epoch(value: str) -> float:
+    """datetime.now().isoformat() 문자열(로컬 시각) → unix epoch 초"""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return 0.0
+
+
+_store: Optional[MemoryStore] = None
+_retention: Optional[MemoryRetention] = None
+_store_lock = threading.Lock()
+
+
+def get_memory_store() -> MemoryStore:
+    """
+    환경변수 기반 프로세스 공용 메모리 저장소
+    - MEMORY_BACKEND: chat_message | sqlite | postgres
+      (기본 chat_message - Django chat_message 테이블 읽기 전용, memory_write는 저장하지 않음
+       sqlite / postgres는 Django 없이 그래프만 실행할 때 사용)
+    - MEMORY_DB_PATH: SQLite 파일 경로 (기본 graph/memory/memory.db)
+    - MEMORY_BUSY_TIMEOUT_MS: SQLite 쓰기 락 대기 시간 (기본 5000)
+    - MEMORY_KEEP_PER_CONVERSATION: 대화창별 보관 턴 수 (기본 10)
+    - MEMORY_HISTORY_TOKEN_BUDGET: chat_message 이력 토큰 예산 (기본 0 = 제한 없음, 턴 수 제한만)
+    """
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = os.getenv("MEMORY_BACKEND", "chat_message").lower()
+                keep = int(os.getenv("MEMORY_KEEP_PER_CONVERSATION", "10"))
+                if backend == "chat_message":
+                    _store = ChatMessageHistoryStore(
+                        token_budget=int(os.getenv("MEMORY_HISTORY_TOKEN_BUDGET", "0")),
+                    )
+                elif backend == "postgres":
+                    _store = PostgresMemoryStore(keep_per_conversation=keep)
+                elif backend == "sqlite":
+                    _store = SQLiteMemoryStore(
+                        path=os.getenv("MEMORY_DB_PATH") or DB_PATH,
+                        busy_timeout_ms=int(os.getenv("MEMORY_BUSY_TIMEOUT_MS", "5000")),
+                        keep_per_conversation=keep,
+                    )
+                else:
+                    raise ValueError(f"지원하지 않는 MEMORY_BACKEND: {backend}")
+    return _store
+
+
+def get_memory_retention() -> MemoryRetention:
+    """
+    환경변수 기반 프로세스 공용 메모리 정리 작업
+    - MEMORY_MAX_AGE_DAYS: 보관 기간(일, 기본 30, 0이면 비활성화)
+    - MEMORY_SWEEP_INTERVAL: 정리 주기(초, 기본 3600, 0이면 비활성화)
+    - MEMORY_SWEEP_BATCH: 한 번에 삭제할 행 수 (기본 1000)
+    """
+    global _retention
+    store = get_memory_store()
+    if _retention is None:
+        with _store_lock:
+            if _retention is None:
+                _retention = MemoryRetention(
+                    store,
+                    max_age_days=int(os.getenv("MEMORY_MAX_AGE_DAYS", "30")),
+                    interval=float(os.getenv("MEMORY_SWEEP_INTERVAL", "3600")),
+                    batch_size=int(os.getenv("MEMORY_SWEEP_BATCH", "1000")),
+                )
+    return _retention
@@ -0,0 +1,181 @@
+'''
+목적: 대화 메모리 요약(question_summary / answer_summary)을 응답 경로 밖에서 배치 생성
+역할:
+memory_write는 요약 없이(NULL) 저장만 하고 submit()으로 요약을 요청
+MemorySummarizer가 요약 대기 행을 batch_size개씩 모아 gpt-4o-mini 1회 호출로 요약한 뒤 컬럼을 채움
+MEMORY_SUMMARY_MODE=thread : 프로세스 내 백그라운드 스레드에서 실행 (기본)
+MEMORY_SUMMARY_MODE=worker : 큐(요약 NULL 행)에만 쌓고 scripts/summarize_memory.py 워커가 처리
+요약할 행은 LLM 호출 전에 선점(claim_summaries)하므로 웹 프로세스 / 워커 여러 개가 동시에 돌아도 같은 행을 중복 요약하지 않음
+'''
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from graph.llm_client import chat
+from graph.memory_store import MemoryStore, get_memory_store
+
+load_dotenv()
+
+SUMMARY_MODEL = "gpt-4o-mini"
+
+
+def _summary_prompt(turns: List[Tuple[int, str, str]]) -> str:
+    """대화 여러 개를 한 번에 요약하는 프롬프트 (번호는 배치 내 순번)"""
+    blocks = "\n\n".join(
+        f"[{i}]\n질문: {question}\n\n답변: {answer}"
+        for i, (_, question, answer) in enumerate(turns, start=1)
+    )
+    return f"""다음 의학 대화 {len(turns)}개를 각각 1-2줄로 간결하게 요약하세요.
+
+{blocks}
+
+JSON 형식으로 출력:
+{{
+  "summaries": [
+    {{"index": 1, "question_summary": "질문 요약 (1-2줄)", "answer_summary": "답변 요약 (핵심만 1-2줄)"}}
+  ]
+}}
+
+중요:
+- 대화마다 하나씩, index는 위 번호 그대로
+- 핵심 정보만 포함 (병명, 증상, 치료법 등)
+- 불필요한 상세 내용 제거
+- 출처 정보 제외"""
+
+
+def _truncate(text: str) -> str:
+    return text[:100] + "..." if len(text) > 100 else text
+
+
+def _parse_summaries(raw: str, turns: List[Tuple[int, str, str]]) -> List[Tuple[int, str, str]]:
+    """LLM 응답 → (id, question_summary, answer_summary). 누락된 대화는 앞부분만 저장"""
+    by_index: Dict[int, dict] = {}
+    for item in json.loads(raw).get("summaries", []):
+        try:
+            by_index[int(item.get("index"))] = item
+        except (TypeError, ValueError):
+            continue
+
+    results = []
+    for i, (row_id, question, answer) in enumerate(turns, start=1):
+        item = by_index.get(i, {})
+        results.append((
+            row_id,
+            item.get("question_summary") or _truncate(question),
+            item.get("answer_summary") or _truncate(answer),
+        ))
+    return results
+
+
+def summarize_batch(turns: List[Tuple[int, str, str]], model: str = SUMMARY_MODEL) -> List[Tuple[int, str, str]]:
+    """
+    대화 여러 개를 LLM 1회 호출로 요약
+
+    Args:
+        turns: [(id, original_question, assistant_answer), ...]
+
+    Returns:
+        [(id, question_summary, answer_summary), ...] (실패 시 앞부분만 저장)
+    """
+    try:
+        raw = chat(model, _summary_prompt(turns), response_format={"type": "json_object"})
+        return _parse_summaries(raw, turns)
+    except Exception as e:
+        print(f"• [Memory Summary] Summarization failed: {e}")
+        return [(row_id, _truncate(question), _truncate(answer)) for row_id, question, answer in turns]
+
+
+class MemorySummarizer:
+    """
+    요약 대기 행(question_summary IS NULL)을 배치로 요약
+
+    - submit(): 백그라운드 스레드를 깨우고 바로 반환 (worker 모드에서는 아무것도 하지 않음)
+    - drain(): 대기 행이 없을 때까지 batch_size개씩 선점해 요약 (워커 스크립트 / 스레드 공용)
+    - claim_timeout: 선점 후 이 시간(초) 안에 요약이 저장되지 않으면(프로세스 종료 등) 다른 워커가 다시 선점
+    - 스레드는 깨어난 뒤 delay초 기다렸다가 처리해 그 사이 들어온 턴을 한 번의 호출로 묶는다
+    """
+
+    def __init__(
+        self,
+        store: MemoryStore,
+        batch_size: int = 8,
+        delay: float = 2.0,
+        model: str = SUMMARY_MODEL,
+        background: bool = True,
+        claim_timeout: float = 300.0,
+    ):
+        self.store = store
+        self.batch_size = batch_size
+        self.claim_timeout = claim_timeout
+        self.delay = delay
+        self.model = model
+        self.background = background
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self) -> None:
+        if not self.background:
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name="memory-summarizer", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def drain(self) -> int:
+        """요약 대기 행을 모두 처리하고 요약한 행 수 반환"""
+        total = 0
+        while True:
+            turns = self.store.claim_summaries(self.batch_size, self.claim_timeout)
+            if not turns:
+                return total
+            started = time.perf_counter()
+            self.store.set_summaries(summarize_batch(turns, self.model))
+            total += len(turns)
+            print(
+                f"• [Memory Summary] Summarized {len(turns)} turns in one call "
+                f"({(time.perf_counter() - started) * 1000:.0f}ms)"
+            )
+            if len(turns) < self.batch_size:
+                return total
+
+    def _loop(self) -> None:
+        while True:
+            self._wake.wait()
+            time.sleep(self.delay)
+            self._wake.clear()
+            try:
+                self.drain()
+            except Exception as e:
+                print(f"• [Memory Summary] Drain failed: {e}")
+
+
+_summarizer: Optional[MemorySummarizer] = None
+_summarizer_lock = threading.Lock()
+
+
+def get_memory_summarizer() -> MemorySummarizer:
+    """
+    환경변수 기반 프로세스 공용 요약기
+    - MEMORY_SUMMARY_MODE: thread | worker (기본 thread)
+    - MEMORY_SUMMARY_BATCH: LLM 1회 호출로 요약할 턴 수 (기본 8)
+    - MEMORY_SUMMARY_DELAY: 배치를 모으는 대기 시간(초, 기본 2)
+    - MEMORY_SUMMARY_CLAIM_TIMEOUT: 선점 만료 시간(초, 기본 300)
+    """
+    global _summarizer
+    if _summarizer is None:
+        with _summarizer_lock:
+            if _summarizer is None:
+                _summarizer = MemorySummarizer(
+                    get_memory_store(),
+                    batch_size=int(os.getenv("MEMORY_SUMMARY_BATCH", "8")),
+                    delay=float(os.getenv("MEMORY_SUMMARY_DELAY", "2")),
+                    claim_timeout=float(os.getenv("MEMORY_SUMMARY_CLAIM_TIMEOUT", "300")),
+                    background=os.getenv("MEMORY_SUMMARY_MODE", "thread").lower() != "worker",
+                )
+    return _summarizer
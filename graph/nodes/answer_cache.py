@@ -0,0 +1,159 @@
+# nodes/answer_cache.py
+from typing import Any, Dict, Optional
+
+from graph.state import SelfRAGState
+from rag.services.answer_cache import get_answer_cache
+from rag.services.embedder import aget_embedding, get_embedding
+from rag.services.tokens import count_tokens
+
+
+def answer_cache_lookup(state: SelfRAGState) -> Dict[str, Any]:
+    """
+    Answer Cache 조회 노드 (classifier / medical_check와 병렬 실행)
+    유사한 이전 질문의 답변을 cached_answer에 보관한다 (조회만, hit/miss 집계 없음).
+    사용 여부(medical, 후속 질문 아님)는 분류가 끝난 뒤 route에서 결정하고,
+    집계는 answer_cache_route(miss) / answer_cache_hit(hit)에서 한다.
+    병렬 노드이므로 cached_answer 키만 반환한다.
+    """
+    query = state.get("question", "").strip()
+    if not query:
+        return {}
+    try:
+        hit = get_answer_cache().lookup(get_embedding(query))
+    except Exception as e:
+        print(f"• [AnswerCache] lookup skipped: {e}")
+        return {}
+    return _lookup_result(hit)
+
+
+async def aanswer_cache_lookup(state: SelfRAGState) -> Dict[str, Any]:
+    """answer_cache_lookup의 비동기 버전"""
+    query = state.get("question", "").strip()
+    if not query:
+        return {}
+    try:
+        hit = await get_answer_cache().alookup(await aget_embedding(query))
+    except Exception as e:
+        print(f"• [AnswerCache] lookup skipped: {e}")
+        return {}
+    return _lookup_result(hit)
+
+
+def _lookup_result(hit: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if hit is None:
+        print("• [AnswerCache] miss")
+        return {}
+    print(f"• [AnswerCache] candidate (similarity={hit['similarity']}, question=\"{hit['question'][:50]}...\")")
+    return {"cached_answer": hit}
+
+
+def answer_cache_route(state: SelfRAGState) -> Dict[str, Any]:
+    """
+    분류 합류 지점(route) 노드 - answer cache 사용 시
+    캐시 대상 턴인데 사용할 답변이 없으면 miss로 집계한다 (state 변경 없음).
+    """
+    if _cache_eligible(state) and not state.get("cached_answer"):
+        get_answer_cache().record_miss()
+    return {}
+
+
+def answer_cache_hit(state: SelfRAGState) -> SelfRAGState:
+    """
+    Answer Cache 적중 노드
+    저장된 답변(structured_answer, 출처, 점수)을 state에 반영 (검색/평가/답변 생성 생략)
+    """
+    hit = state["cached_answer"]
+    try:
+        get_answer_cache().record_hit(hit)
+    except Exception as e:
+        print(f"• [AnswerCache] hit record skipped: {e}")
+    return _apply_hit(state, hit)
+
+
+async def aanswer_cache_hit(state: SelfRAGState) -> SelfRAGState:
+    """answer_cache_hit의 비동기 버전"""
+    hit = state["cached_answer"]
+    try:
+        await get_answer_cache().arecord_hit(hit)
+    except Exception as e:
+        print(f"• [AnswerCache] hit record skipped: {e}")
+    return _apply_hit(state, hit)
+
+
+def _apply_hit(state: SelfRAGState, hit: Dict[str, Any]) -> SelfRAGState:
+    answer = hit["answer"]
+    state["structured_answer"] = answer.get("structured_answer", {})
+    state["final_answer"] = answer.get("final_answer", "")
+    state["sources"] = answer.get("sources", [])
+    state["llm_score"] = answer.get("llm_score", 0.0)
+    state["relevance_score"] = answer.get("relevance_score", 0.0)
+
+    stats = get_answer_cache().snapshot()
+    print(
+        f"• [AnswerCache] hit (similarity={hit['similarity']}, saved_tokens≈{hit['tokens']}, "
+        f"hit_rate={stats['hit_rate']:.2%})"
+    )
+    return state
+
+
+def answer_cache_store(state: SelfRAGState) -> SelfRAGState:
+    """
+    Answer Cache 저장 노드 (generate_answer 다음)
+    캐시 대상 답변만 저장하고 state는 변경하지 않는다.
+    """
+    entry = _cache_entry(state)
+    if entry is None:
+        return state
+    try:
+        question, answer, tokens = entry
+        get_answer_cache().store(question, get_embedding(question), answer, tokens)
+        print(f"• [AnswerCache] stored (tokens≈{tokens})")
+    except Exception as e:
+        print(f"• [AnswerCache] store skipped: {e}")
+    return state
+
+
+async def aanswer_cache_store(state: SelfRAGState) -> SelfRAGState:
+    """answer_cache_store의 비동기 버전"""
+    entry = _cache_entry(state)
+    if entry is None:
+        return state
+    try:
+        question, answer, tokens = entry
+        await get_answer_cache().astore(question, await aget_embedding(question), answer, tokens)
+        print(f"• [AnswerCache] stored (tokens≈{tokens})")
+    except Exception as e:
+        print(f"• [AnswerCache] store skipped: {e}")
+    return state
+
+
+def _cache_eligible(state: SelfRAGState) -> bool:
+    """캐시 답변을 쓰거나 저장할 수 있는 턴인지 (user_info / 후속 질문은 대화 이력에 의존하므로 제외)"""
+    return state.get("conversation_type", "medical") == "medical" and not state.get("is_follow_up", False)
+
+
+def _cache_entry(state: SelfRAGState):
+    """
+    (질문, 저장할 답변, 추정 토큰) 반환. 캐시 대상이 아니면 None
+    - user_info / 후속 질문은 대화 이력에 의존하므로 제외
+    - 답변 실패(llm_score 0)나 캐시에서 꺼낸 답변은 제외
+    """
+    if not _cache_eligible(state):
+        return None
+    if state.get("cached_answer") or not state.get("llm_score"):
+        return None
+    structured = state.get("structured_answer") or {}
+    if not structured.get("answer"):
+        return None
+
+    question = state.get("original_question") or state.get("question", "")
+    answer = {
+        "structured_answer": structured,
+        "final_answer": state.get("final_answer", ""),
+        "sources": state.get("sources", []),
+        "llm_score": state.get("llm_score", 0.0),
+        "relevance_score": state.get("relevance_score", 0.0),
+    }
+    # 절약량 추정: 컨텍스트는 evaluate_chunk / generate_answer 프롬프트에 각각 한 번씩 들어가고, 답변은 출력 토큰
+    tokens = 2 * count_tokens(state.get("context", "")) + count_tokens(structured["answer"])
+    return question.strip(), answer, tokens
@@ -0,0 +1,84 @@
+# nodes/classification.py
+# classifier / router 노드가 함께 쓰는 분류 공통 요소 (모델, 안내 문구, 대화 이력 텍스트, 1차 분류)
+import asyncio
+from typing import Optional
+
+from graph.fast_classifier import FastDecision, get_fast_classifier
+from graph.state import SelfRAGState
+from rag.services.embedder import aget_embedding, get_embedding
+
+CLASSIFIER_MODEL = "gpt-5-nano"
+
+NON_MEDICAL_ANSWER = """죄송합니다. 저는 의학 질문에만 답할 수 있습니다.
+
+의학, 건강, 질병, 증상, 치료 등과 관련된 질문을 해주시면 도움을 드리겠습니다.
+
+예시:
+- "당뇨병이란 무엇인가요?"
+- "고혈압의 증상은 무엇인가요?"
+- "독감 예방접종은 언제 받는 것이 좋나요?"
+""".strip()
+
+
+def format_history(recent_history) -> str:
+    """conversation_history → 프롬프트용 텍스트 (사용자: ... / 어시스턴트: ...)"""
+    history_lines = []
+    for msg in recent_history:
+        role = msg.get("role", "")
+        content = msg.get("content", "")
+        if role == "user":
+            history_lines.append(f"사용자: {content}")
+        elif role == "assistant":
+            history_lines.append(f"어시스턴트: {content}")
+    return "\n".join(history_lines)
+
+
+def _fast_inputs(state: SelfRAGState):
+    """1차 분류 입력 (질문, 최근 2턴) - LLM 프롬프트와 같은 범위"""
+    return state.get("question", "").strip(), (state.get("conversation_history") or [])[:4]
+
+
+def fast_decide(state: SelfRAGState) -> Optional[FastDecision]:
+    """규칙 → kNN 1차 분류 (FAST_CLASSIFIER=off이거나 확신이 없으면 None)"""
+    fast = get_fast_classifier()
+    if fast is None:
+        return None
+    query, history = _fast_inputs(state)
+    decision = fast.classify_rules(query, history)
+    if decision is None and fast.wants_knn(query, history):
+        try:
+            decision = fast.classify_knn(query, history, get_embedding(query))
+        except Exception as e:
+            print(f"• [Classifier] fast path skipped: {e}")
+    return decision
+
+
+async def afast_decide(state: SelfRAGState) -> Optional[FastDecision]:
+    """fast_decide의 비동기 버전 (kNN 예시 임베딩 로드는 스레드에서)"""
+    fast = get_fast_classifier()
+    if fast is None:
+        return None
+    query, history = _fast_inputs(state)
+    decision = fast.classify_rules(query, history)
+    if decision is None and fast.wants_knn(query, history):
+        try:
+            vector = await aget_embedding(query)
+            decision = await asyncio.to_thread(fast.classify_knn, query, history, vector)
+        except Exception as e:
+            print(f"• [Classifier] fast path skipped: {e}")
+    return decision
+
+
+def apply_fast_decision(state: SelfRAGState, decision: FastDecision, node: str = "Classifier") -> SelfRAGState:
+    """1차 분류 결과를 state에 반영 (LLM 분류와 같은 필드, node는 로그 이름)"""
+    state["conversation_type"] = decision.conversation_type
+    state["is_follow_up"] = decision.is_follow_up
+    if decision.conversation_type == "non_medical":
+        state["final_answer"] = NON_MEDICAL_ANSWER
+
+    # 완료 로그
+    print(
+        f"• [{node}] complete (conversation_type={decision.conversation_type}, is_follow_up={decision.is_follow_up}, "
+        f"fast_path={decision.source}, confidence={decision.confidence})"
+    )
+    return state
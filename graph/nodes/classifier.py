@@ -1,9 +1,17 @@
 # nodes/classifier_i.py
-from openai import OpenAI
+from typing import Optional
+
+from graph.llm_client import achat, chat
+from graph.nodes.classification import (
+    CLASSIFIER_MODEL,
+    NON_MEDICAL_ANSWER,
+    afast_decide,
+    apply_fast_decision,
+    fast_decide,
+    format_history,
+)
 from graph.state import SelfRAGState
 
-client = OpenAI()
-
 
 def classifier(state: SelfRAGState) -> SelfRAGState:
     """
@@ -14,8 +22,34 @@ def classifier(state: SelfRAGState) -> SelfRAGState:
     - "non_medical": 의학 무관 질문
 
     conversation_history를 활용하여 대명사 참조 질문 처리
+    FAST_CLASSIFIER가 켜져 있으면 규칙/kNN 1차 분류가 확실한 경우 LLM 호출 생략
     """
+    prompt = _prepare_classifier(state)
+    if prompt is None:
+        return state
+
+    decision = fast_decide(state)
+    if decision is not None:
+        return apply_fast_decision(state, decision)
+
+    return _apply_classifier(state, chat(CLASSIFIER_MODEL, prompt))
+
+
+async def aclassifier(state: SelfRAGState) -> SelfRAGState:
+    """classifier의 비동기 버전 (AsyncOpenAI, kNN 예시 임베딩 로드는 스레드에서)"""
+    prompt = _prepare_classifier(state)
+    if prompt is None:
+        return state
+
+    decision = await afast_decide(state)
+    if decision is not None:
+        return apply_fast_decision(state, decision)
 
+    return _apply_classifier(state, await achat(CLASSIFIER_MODEL, prompt))
+
+
+def _prepare_classifier(state: SelfRAGState) -> Optional[str]:
+    """분류 프롬프트 생성. 빈 질문이면 state를 채우고 None 반환 (LLM 호출 생략)"""
     query = state.get("question", "").strip()
 
     # 원본 질문 저장 (처음 입력받은 질문)
@@ -31,30 +65,12 @@ def classifier(state: SelfRAGState) -> SelfRAGState:
 
     if not query:
         state["conversation_type"] = "non_medical"
-        state["final_answer"] = """죄송합니다. 저는 의학 질문에만 답할 수 있습니다.
-
-의학, 건강, 질병, 증상, 치료 등과 관련된 질문을 해주시면 도움을 드리겠습니다.
-
-예시:
-- "당뇨병이란 무엇인가요?"
-- "고혈압의 증상은 무엇인가요?"
-- "독감 예방접종은 언제 받는 것이 좋나요?"
-        """.strip()
+        state["final_answer"] = NON_MEDICAL_ANSWER
         print(f"• [Classifier] complete (conversation_type=non_medical)")
-        return state
+        return None
 
     # conversation_history를 텍스트로 변환
-    history_context = ""
-    if recent_history:
-        history_lines = []
-        for msg in recent_history:
-            role = msg.get("role", "")
-            content = msg.get("content", "")
-            if role == "user":
-                history_lines.append(f"사용자: {content}")
-            elif role == "assistant":
-                history_lines.append(f"어시스턴트: {content}")
-        history_context = "\n".join(history_lines)
+    history_context = format_history(recent_history)
 
     prompt = f"""
     사용자의 질문:
@@ -108,14 +124,11 @@ def classifier(state: SelfRAGState) -> SelfRAGState:
       "follow_up": true 또는 false
     }}
     """
+    return prompt
 
-    res = client.chat.completions.create(
-        model="gpt-5-nano",
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    raw_result = res.choices[0].message.content.strip()
 
+def _apply_classifier(state: SelfRAGState, raw_result: str) -> SelfRAGState:
+    """LLM 분류 결과를 state에 반영"""
     # 기본값
     conv_type = "medical"
     is_follow_up = False
@@ -134,15 +147,7 @@ def classifier(state: SelfRAGState) -> SelfRAGState:
 
     if "의학 무관" in conv_type_raw:
         conv_type = "non_medical"
-        state["final_answer"] = """죄송합니다. 저는 의학 질문에만 답할 수 있습니다.
-
-의학, 건강, 질병, 증상, 치료 등과 관련된 질문을 해주시면 도움을 드리겠습니다.
-
-예시:
-- "당뇨병이란 무엇인가요?"
-- "고혈압의 증상은 무엇인가요?"
-- "독감 예방접종은 언제 받는 것이 좋나요?"
-        """.strip()
+        state["final_answer"] = NON_MEDICAL_ANSWER
     elif "사용자 정보" in conv_type_raw:
         conv_type = "user_info"
     else:
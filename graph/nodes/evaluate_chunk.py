@@ -1,16 +1,173 @@
 # nodes/evaluate_chunk.py
-from openai import OpenAI
+import asyncio
+from typing import List, Optional
+
+from graph.llm_client import achat, chat
+from graph.nodes.generate_answer import GENERATE_MODEL
+from rag.services.context_builder import build_context, context_budget
+from rag.services.relevance import (
+    LLM_JUDGE_MODEL,
+    LLMJudgeScorer,
+    RelevanceScorer,
+    get_relevance_scorer,
+    get_similarity_gate,
+)
+
+EVALUATE_MODEL = LLM_JUDGE_MODEL
 
-client = OpenAI()
 
 def evaluate_chunk(state):
     """
     청크 조사 노드
-    검색된 문서 청크들의 관련성을 평가
+    검색된 문서 청크를 하나씩 채점해 chunk_threshold 이상인 chunk만 남기고 context / sources를 재구성
+    유사도 게이트가 켜져 있으면 검색 유사도만으로 확실한 경우(accept / reject)를 먼저 결정하고,
+    나머지는 RELEVANCE_MODE가 cross_encoder / embedding이면 로컬 점수기로 평가 (LLM 호출 없음),
+    llm이거나 로컬 평가가 실패하면 gpt-4o-mini 한 번 호출로 chunk별 평가
+    """
+    result = _evaluate_gate(state)
+    if result is not None:
+        return result
+
+    scorer = get_relevance_scorer()
+    if scorer.name != "llm":
+        result = _evaluate_local(state, scorer)
+        if result is not None:
+            return result
+
+    judge = get_relevance_scorer("llm")
+    prompt = _prepare_evaluate(state, judge)
+    if prompt is None:
+        return state
+    return _apply_evaluate(state, judge, chat(EVALUATE_MODEL, prompt, temperature=0.0))
+
+
+async def aevaluate_chunk(state):
+    """evaluate_chunk의 비동기 버전 (로컬 추론은 스레드에서, LLM 판정은 AsyncOpenAI)"""
+    result = _evaluate_gate(state)
+    if result is not None:
+        return result
+
+    scorer = get_relevance_scorer()
+    if scorer.name != "llm":
+        result = await asyncio.to_thread(_evaluate_local, state, scorer)
+        if result is not None:
+            return result
+
+    judge = get_relevance_scorer("llm")
+    prompt = _prepare_evaluate(state, judge)
+    if prompt is None:
+        return state
+    return _apply_evaluate(state, judge, await achat(EVALUATE_MODEL, prompt, temperature=0.0))
+
+
+def _evaluate_gate(state):
+    """
+    검색 유사도 게이트 - 확실히 관련 있거나(accept) 없으면(reject) 점수기 호출 없이 결정
+    게이트가 꺼져 있거나 gray zone이면 None (relevance_tier="judge")
+    """
+    state["relevance_tier"] = "judge"
+    gate = get_similarity_gate()
+    docs = state.get("retrieved_docs", [])
+    if gate is None or not docs or not state.get("question", "").strip() or not state.get("context"):
+        return None
+
+    tier = gate.decide(docs)
+    stats = gate.snapshot()
+    print(
+        f"• [EvaluateChunk] similarity gate: {tier} (top={max(doc.get('score') or 0.0 for doc in docs):.3f}, "
+        f"accept>={gate.accept_threshold}, reject<{gate.reject_threshold}, skip_rate={stats['skip_rate']:.2%})"
+    )
+    if tier == "judge":
+        return None
+    state["relevance_tier"] = tier
+    return _apply_scores(state, gate.scorer, docs, gate.scorer.score("", docs))
+
+
+def _evaluate_local(state, scorer: RelevanceScorer):
+    """
+    로컬 점수기로 chunk별 점수 계산 후 _apply_scores
+    점수 계산에 실패하면 None (LLM 판정으로 대체)
+    """
+    query = state.get("question", "").strip()
+    docs = state.get("retrieved_docs", [])
+    if not query or not docs or not state.get("context"):
+        return None  # 빈 컨텍스트 처리는 _prepare_evaluate와 동일하게
+
+    print(f"• [EvaluateChunk] start (총 {len(docs)}개 chunk, scorer={scorer.name}, query=\"{query[:50]}...\")")
+    try:
+        scores = scorer.score(query, docs)
+    except Exception as e:
+        print(f"• [EvaluateChunk] {scorer.name} scoring failed, falling back to LLM: {e}")
+        return None
+    return _apply_scores(state, scorer, docs, scores)
+
+
+def _apply_scores(state, scorer: RelevanceScorer, docs: List[dict], scores: List[float]):
     """
+    chunk 점수를 state에 반영하고 통과한 chunk로 컨텍스트 재구성
+    - chunk_threshold 미만 chunk는 retrieved_docs / context / sources에서 제외
+    - is_relevant: 통과한 chunk가 min_chunks개 이상이고 최고 점수 >= threshold (아니면 rewrite_query)
+    - chunk_scores: Message.metadata에 저장할 chunk별 점수 (검색 유사도 포함, 게이트 임계값 학습용)
+    """
+    for doc, score in zip(docs, scores):
+        doc["relevance"] = round(score, 4)
+    kept = [doc for doc, score in zip(docs, scores) if score >= scorer.chunk_threshold]
+    top = max(scores) if scores else 0.0
+    min_chunks = min(scorer.min_chunks, len(docs))
+
+    state["is_relevant"] = len(kept) >= min_chunks and top >= scorer.threshold
+    state["relevance_score"] = round(top, 2)
+    state["chunk_scores"] = [
+        {
+            "c_id": (doc.get("metadata") or {}).get("c_id", ""),
+            "score": doc["relevance"],
+            "similarity": round(float(doc.get("score") or 0.0), 4),
+            "kept": score >= scorer.chunk_threshold,
+        }
+        for doc, score in zip(docs, scores)
+    ]
+    state["evaluation_result"] = (
+        f"{scorer.name}: top={top:.3f}, kept={len(kept)}/{len(docs)}, "
+        f"threshold={scorer.threshold}, chunk_threshold={scorer.chunk_threshold}, min_chunks={min_chunks}"
+    )
+
+    if not state["is_relevant"] and state.get("rewrite_count", 0) >= 1:
+        return _not_found_after_rewrite(state, len(docs))
+
+    if state["is_relevant"] and len(kept) < len(docs):
+        built = build_context(kept, budget=state.get("max_token") or context_budget(GENERATE_MODEL))
+        state["retrieved_docs"] = kept
+        state["context"] = built.context
+        state["sources"] = built.sources
+
+    print(
+        f"• [EvaluateChunk] complete (검색된 chunk: {len(docs)}개, 의미있는 chunk: {len(kept) if state['is_relevant'] else 0}개, "
+        f"score={state['relevance_score']}, scorer={scorer.name})"
+    )
+    return state
+
+
+def _not_found_after_rewrite(state, retrieved_count: int):
+    """rewrite 후에도 관련성 있는 chunk를 찾지 못한 경우 안내 답변 설정 (END로 이동)"""
+    state["final_answer"] = "죄송합니다. 관련된 정보를 찾을 수 없어 답변을 제공할 수 없습니다."
+    state["sources"] = []  # sources도 빈 배열로 설정
+    state["structured_answer"] = {
+        "type": "internal",
+        "answer": "죄송합니다. 관련된 정보를 찾을 수 없어 답변을 제공할 수 없습니다.",
+        "references": [],  # sources → references로 변경
+        "llm_score": 0.0,
+        "relevance_score": 0.0
+    }
+    print(f"• [EvaluateChunk] complete (검색된 chunk: {retrieved_count}개, 의미있는 chunk: 0개, rewrite 후 관련성 낮음 - END로 이동)")
+    return state
+
+
+def _prepare_evaluate(state, judge: LLMJudgeScorer) -> Optional[str]:
+    """chunk별 평가 프롬프트 생성. 질문/컨텍스트가 없으면 state를 채우고 None 반환"""
     query = state.get("question", "").strip()
     context = state.get("context", "")
-    retrieved_count = len(state.get("retrieved_docs", []))
+    docs = state.get("retrieved_docs", [])
+    retrieved_count = len(docs)
 
     # 시작 로그
     context_len = len(context)
@@ -35,31 +192,22 @@ def evaluate_chunk(state):
         else:
             print(f"• [EvaluateChunk] complete (검색된 chunk: 0개, 의미있는 chunk: 0개, score=0.0)")
 
-        return state
-
-    prompt = f"""
-    질문: {query}
+        return None
 
-    검색된 컨텍스트:
-    ---
-    {context}
-    ---
+    return judge.prompt(query, docs)
 
-    위 컨텍스트가 질문에 답변하기에 충분히 관련성이 있는지 평가하세요.
 
-    다음 형식으로만 답변하세요:
-    관련성: [높음/낮음]
-    점수: [0.0-1.0 사이의 숫자]
-    이유: [간단한 설명]`
+def _apply_evaluate(state, judge: LLMJudgeScorer, result: str):
     """
-
-    res = client.chat.completions.create(
-        model="gpt-4o-mini",
-        temperature=0.0,
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    result = res.choices[0].message.content.strip()
+    평가 결과 파싱 후 state 반영
+    chunk별 점수가 모두 있으면 _apply_scores, 아니면 관련성(높음/낮음)만으로 전체 판정
+    """
+    docs = state.get("retrieved_docs", [])
+    retrieved_count = len(docs)
+    scores = judge.parse(result, retrieved_count)
+    if scores is not None:
+        return _apply_scores(state, judge, docs, scores)
+    state["chunk_scores"] = []  # 이전 루프(rewrite 전) 점수가 남지 않도록
 
     # 관련성 평가 결과 파싱
     if "높음" in result:
@@ -80,17 +228,7 @@ def evaluate_chunk(state):
 
     # rewrite 후에도 관련성 있는 chunk를 찾지 못한 경우
     if not state["is_relevant"] and state.get("rewrite_count", 0) >= 1:
-        state["final_answer"] = "죄송합니다. 관련된 정보를 찾을 수 없어 답변을 제공할 수 없습니다."
-        state["sources"] = []  # sources도 빈 배열로 설정
-        state["structured_answer"] = {
-            "type": "internal",
-            "answer": "죄송합니다. 관련된 정보를 찾을 수 없어 답변을 제공할 수 없습니다.",
-            "references": [],  # sources → references로 변경
-            "llm_score": 0.0,
-            "relevance_score": 0.0
-        }
-        print(f"• [EvaluateChunk] complete (검색된 chunk: {retrieved_count}개, 의미있는 chunk: 0개, rewrite 후 관련성 낮음 - END로 이동)")
-        return state
+        return _not_found_after_rewrite(state, retrieved_count)
 
     # 완료 로그
     meaningful_count = retrieved_count if state['is_relevant'] else 0
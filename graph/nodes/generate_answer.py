@@ -1,10 +1,15 @@
 # nodes/generate_answer_i.py
 import json
 import re
-from openai import OpenAI
+from typing import Optional, Tuple
+
+from langgraph.config import get_stream_writer
+
+from graph.llm_client import astream_chat, chat
 from graph.state import SelfRAGState
+from rag.services.tokens import count_tokens
 
-client = OpenAI()
+GENERATE_MODEL = "gpt-5-nano"
 
 
 def extract_used_citation_numbers(answer: str) -> set:
@@ -96,7 +101,62 @@ def generate_answer(state: SelfRAGState) -> SelfRAGState:
     - conversation_type: "non_medical" -> 안내 메시지
     - conversation_type: "medical" -> RAG 문서 기반 답변
     """
+    prepared = _prepare_generate(state)
+    if prepared is None:
+        return state
+    mode, prompt = prepared
+    answer = chat(GENERATE_MODEL, prompt)
+    _record_usage(state, prompt, answer)
+    return _apply_generate(state, mode, answer)
+
+
+async def agenerate_answer(state: SelfRAGState) -> SelfRAGState:
+    """
+    generate_answer의 비동기 버전 (AsyncOpenAI 스트리밍)
+    답변 토큰을 생성되는 대로 {"type": "token", "text": ...} custom 이벤트로 내보낸다
+    (app.astream(stream_mode="custom") 소비자가 없으면 무시됨).
+    출처 재번호화(filter_and_renumber_sources)는 전체 답변이 완성된 뒤 한 번 적용한다.
+    """
+    prepared = _prepare_generate(state)
+    if prepared is None:
+        return state
+    mode, prompt = prepared
+
+    write = _stream_writer()
+    parts = []
+    async for token in astream_chat(GENERATE_MODEL, prompt):
+        parts.append(token)
+        write({"type": "token", "text": token})
+    answer = "".join(parts).strip()
+    _record_usage(state, prompt, answer)
+    return _apply_generate(state, mode, answer)
 
+
+def _record_usage(state: SelfRAGState, prompt: str, answer: str) -> None:
+    """프롬프트/답변 토큰 수 기록 (Message.tokens_prompt / tokens_completion으로 저장)"""
+    state["token_usage"] = {
+        "model": GENERATE_MODEL,
+        "prompt": count_tokens(prompt),
+        "completion": count_tokens(answer),
+    }
+    print(f"• [Generate] tokens (prompt={state['token_usage']['prompt']}, completion={state['token_usage']['completion']})")
+
+
+def _stream_writer():
+    """그래프 실행 밖(노드 단독 호출)에서는 이벤트를 버리는 writer"""
+    try:
+        return get_stream_writer()
+    except RuntimeError:
+        return lambda _event: None
+
+
+def _prepare_generate(state: SelfRAGState) -> Optional[Tuple[str, str]]:
+    """
+    답변 모드와 프롬프트 결정
+    Returns:
+        ("user_info" | "terminology" | "rag", prompt)
+        컨텍스트가 없어 안내 메시지로 끝나는 경우 state를 채우고 None
+    """
     # 시작 로그
     query = state.get("question", "")
     conversation_type = state.get("conversation_type", "medical")
@@ -140,26 +200,10 @@ def generate_answer(state: SelfRAGState) -> SelfRAGState:
 
         # 디버깅: 프롬프트 출력
         print(f"• [Generate] user_info prompt (history_len={len(conversation_history)})")
-
-        res = client.chat.completions.create(
-            model="gpt-5-nano",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        answer = res.choices[0].message.content.strip()
-
-        state["final_answer"] = answer
-        state["structured_answer"] = {
-            "answer": answer,
-            "sources": [],
-            "confidence": 1.0
-        }
-        state["llm_score"] = 1.0
-        print(f"• [Generate] Answered from conversation history")
-        return state
+        return "user_info", prompt
 
     # 2. 의학 질문 처리 (medical)
     context = state.get("context", "")
-    sources = state.get("sources", [])
     conversation_history = state.get("conversation_history", [])
     is_follow_up = state.get("is_follow_up", False)
 
@@ -192,7 +236,7 @@ def generate_answer(state: SelfRAGState) -> SelfRAGState:
             "llm_score": 0.0,
             "relevance_score": 0.0
         }
-        return state
+        return None
 
     # 4. WebSearch 결과 기반 답변 (answer_websearch 로직)
     if is_terminology:
@@ -240,51 +284,16 @@ def generate_answer(state: SelfRAGState) -> SelfRAGState:
 - 긴 문서들은 간단하게 요약하여 중요 정보들만 전달해주세요
 - 핵심 단어에 ** markdown 강조 표현을 적용하세요
         """
-
-        res = client.chat.completions.create(
-            model="gpt-5-nano",
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        answer = res.choices[0].message.content.strip()
-
-        # 답변 실패 감지 (답변 못할 때는 참고문헌 제공 안함)
-        if "답변" in answer and ("제공할 수 없" in answer or "찾을 수 없" in answer):
-            state["structured_answer"] = {
-                "type": "external",
-                "answer": answer,
-                "references": [],  # 빈 배열
-                "llm_score": 0.0,
-                "relevance_score": 0.0
-            }
-            state["llm_score"] = 0.0
-            return state
-
-        # 답변 정제 및 출처 필터링
-        answer_with_citations, filtered_sources = filter_and_renumber_sources(answer, sources)
-
-        # LLM 신뢰도 점수 계산
-        llm_score = calculate_llm_score(answer_with_citations, context, state.get("relevance_score", 0.0))
-
-        # JSON 구조화된 답변 생성
-        state["structured_answer"] = {
-            "type": "external",
-            "answer": answer_with_citations,
-            "references": filtered_sources,  # 실제 사용된 출처만 포함
-            "llm_score": llm_score,
-            "relevance_score": round(state.get("relevance_score", 0.0), 2)
-        }
-        state["llm_score"] = llm_score
+        return "terminology", prompt
 
     # 5. RAG 문서 기반 답변 (answer_rag 로직)
-    else:
-        history_block = (
-            f"\n이전 대화 이력:\n{history_context}\n"
-            if history_context
-            else ""
-        )
+    history_block = (
+        f"\n이전 대화 이력:\n{history_context}\n"
+        if history_context
+        else ""
+    )
 
-        prompt = f"""
+    prompt = f"""
 사용자 질문: {query}
 
 관련 문서:
@@ -320,42 +329,55 @@ def generate_answer(state: SelfRAGState) -> SelfRAGState:
 - 추측하지 말고 문서 내용에 충실하세요
 - 핵심 단어에 ** markdown 강조 표현을 적용하세요
 - 최종 답변을 생성하지 못하는 경우, 참고문헌을 제공하지 마세요!
-        """
-
-        res = client.chat.completions.create(
-            model="gpt-5-nano",
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        answer = res.choices[0].message.content.strip()
+    """
+    return "rag", prompt
 
-        # 답변 실패 감지 (답변 못할 때는 참고문헌 제공 안함)
-        if "답변" in answer and ("제공할 수 없" in answer or "찾을 수 없" in answer):
-            state["structured_answer"] = {
-                "type": "internal",
-                "answer": answer,
-                "references": [],  # 빈 배열
-                "llm_score": 0.0,
-                "relevance_score": 0.0
-            }
-            state["llm_score"] = 0.0
-            return state
 
-        # 답변 정제 및 출처 필터링
-        answer_with_citations, filtered_sources = filter_and_renumber_sources(answer, sources)
+def _apply_generate(state: SelfRAGState, mode: str, answer: str) -> SelfRAGState:
+    """LLM 답변을 출처 재번호화/점수 계산 후 state에 반영"""
+    if mode == "user_info":
+        state["final_answer"] = answer
+        state["structured_answer"] = {
+            "answer": answer,
+            "sources": [],
+            "confidence": 1.0
+        }
+        state["llm_score"] = 1.0
+        print(f"• [Generate] Answered from conversation history")
+        return state
 
-        # LLM 신뢰도 점수 계산
-        llm_score = calculate_llm_score(answer_with_citations, context, state.get("relevance_score", 0.0))
+    context = state.get("context", "")
+    sources = state.get("sources", [])
+    # WebSearch 기반 답변은 external, RAG 문서 기반 답변은 internal
+    answer_type = "external" if mode == "terminology" else "internal"
 
-        # JSON 구조화된 답변 생성
+    # 답변 실패 감지 (답변 못할 때는 참고문헌 제공 안함)
+    if "답변" in answer and ("제공할 수 없" in answer or "찾을 수 없" in answer):
         state["structured_answer"] = {
-            "type": "internal",
-            "answer": answer_with_citations,
-            "references": filtered_sources,  # 실제 사용된 출처만 포함
-            "llm_score": llm_score,
-            "relevance_score": round(state.get("relevance_score", 0.0), 2)
+            "type": answer_type,
+            "answer": answer,
+            "references": [],  # 빈 배열
+            "llm_score": 0.0,
+            "relevance_score": 0.0
         }
-        state["llm_score"] = llm_score
+        state["llm_score"] = 0.0
+        return state
+
+    # 답변 정제 및 출처 필터링
+    answer_with_citations, filtered_sources = filter_and_renumber_sources(answer, sources)
+
+    # LLM 신뢰도 점수 계산
+    llm_score = calculate_llm_score(answer_with_citations, context, state.get("relevance_score", 0.0))
+
+    # JSON 구조화된 답변 생성
+    state["structured_answer"] = {
+        "type": answer_type,
+        "answer": answer_with_citations,
+        "references": filtered_sources,  # 실제 사용된 출처만 포함
+        "llm_score": llm_score,
+        "relevance_score": round(state.get("relevance_score", 0.0), 2)
+    }
+    state["llm_score"] = llm_score
 
     # 완료 로그
     answer_len = len(state.get("final_answer", ""))
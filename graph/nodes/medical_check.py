@@ -1,8 +1,10 @@
 # nodes/medical_check.py
-from openai import OpenAI
+from typing import Optional
+
+from graph.llm_client import achat, chat
 from graph.state import SelfRAGState
 
-client = OpenAI()
+MEDICAL_CHECK_MODEL = "gpt-5-nano"
 
 
 def medical_check(state: SelfRAGState) -> SelfRAGState:
@@ -10,12 +12,32 @@ def medical_check(state: SelfRAGState) -> SelfRAGState:
     의학 용어 질문 판단 노드
     질문이 의학 용어의 정의를 묻는지 판별
     """
+    prompt = _prepare_medical_check(state)
+    if prompt is None:
+        return state
+    return _apply_medical_check(state, chat(MEDICAL_CHECK_MODEL, prompt))
+
+
+async def amedical_check(state: SelfRAGState) -> SelfRAGState:
+    """medical_check의 비동기 버전 (AsyncOpenAI)"""
+    prompt = _prepare_medical_check(state)
+    if prompt is None:
+        return state
+    return _apply_medical_check(state, await achat(MEDICAL_CHECK_MODEL, prompt))
+
 
+def _prepare_medical_check(state: SelfRAGState) -> Optional[str]:
+    """프롬프트 생성. 빈 질문이면 LLM 호출 없이 is_terminology=False로 두고 None 반환"""
     query = state.get("question", "").strip()
 
     # 시작 로그
     print(f"• [MedicalCheck] start (question=\"{query[:50]}...\")")
 
+    if not query:
+        state["is_terminology"] = False
+        print("• [MedicalCheck] complete (is_terminology=False)")
+        return None
+
     prompt = f"""
     사용자의 질문:
     ---
@@ -31,14 +53,10 @@ def medical_check(state: SelfRAGState) -> SelfRAGState:
 
     '용어 질문' 또는 '일반 질문' 중 하나만 출력하세요.
     """
+    return prompt
 
-    res = client.chat.completions.create(
-        model="gpt-5-nano",
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    result = res.choices[0].message.content.strip()
 
+def _apply_medical_check(state: SelfRAGState, result: str) -> SelfRAGState:
     if "용어" in result:
         state["is_terminology"] = True
     else:
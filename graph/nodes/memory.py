@@ -1,128 +1,29 @@
-import sqlite3
-from datetime import datetime
+import asyncio
+from graph.memory_store import get_memory_retention, get_memory_store
+from graph.memory_summarizer import get_memory_summarizer
 from graph.state import SelfRAGState
-from openai import OpenAI
-import os
-
-client = OpenAI()
-
-# DB 파일 경로 설정 (graph/memory/memory.db)
-MEMORY_DIR = os.path.join(os.path.dirname(__file__), '..', 'memory')
-DB_PATH = os.path.join(MEMORY_DIR, 'memory.db')
-
-# memory 디렉토리가 없으면 생성
-os.makedirs(MEMORY_DIR, exist_ok=True)
 
 
 def init_memory_db():
     """
     메모리 데이터베이스 초기화
-    테이블이 없으면 생성
-    """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # conversation_memory 테이블 생성
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS conversation_memory (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            conversation_id TEXT,
-            timestamp TEXT NOT NULL,
-            original_question TEXT NOT NULL,
-            assistant_answer TEXT NOT NULL,
-            question_summary TEXT,
-            answer_summary TEXT,
-            conversation_type TEXT NOT NULL
-        )
-    ''')
-
-    # metadata 테이블 (턴 카운터 등)
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS metadata (
-            key TEXT PRIMARY KEY,
-            value TEXT
-        )
-    ''')
-
-    conn.commit()
-    conn.close()
-    print("• [Memory] Database initialized")
-
-
-def _summarize_conversation(question: str, answer: str, conversation_type: str) -> dict:
-    """
-    대화를 1-2줄로 요약
-
-    Args:
-        question: 원본 질문
-        answer: 원본 답변
-        conversation_type: 대화 유형
-
-    Returns:
-        dict: {"question_summary": "...", "answer_summary": "..."}
+    테이블이 없으면 생성 (저장소는 MEMORY_BACKEND로 선택, 프로세스당 1회만 실행)
     """
-    try:
-        # user_info 타입은 원문 그대로 (이름 등 중요 정보)
-        if conversation_type == "user_info":
-            print(f"• [Memory] user_info detected, storing original (q_len={len(question)}, a_len={len(answer)})")
-            return {
-                "question_summary": question,
-                "answer_summary": answer[:100] + "..." if len(answer) > 100 else answer
-            }
-
-        # medical 타입은 요약
-        print(f"• [Memory] medical type, generating summary via GPT-4o-mini...")
-        prompt = f"""다음 의학 대화를 각각 1-2줄로 간결하게 요약하세요.
-
-질문: {question}
-
-답변: {answer}
-
-JSON 형식으로 출력:
-{{
-  "question_summary": "질문 요약 (1-2줄)",
-  "answer_summary": "답변 요약 (핵심만 1-2줄)"
-}}
-
-중요:
-- 핵심 정보만 포함 (병명, 증상, 치료법 등)
-- 불필요한 상세 내용 제거
-- 출처 정보 제외"""
-
-        res = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"}
-        )
-
-        import json
-        result = json.loads(res.choices[0].message.content.strip())
+    get_memory_store().init_schema()
 
-        q_summary = result.get("question_summary", question[:100])
-        a_summary = result.get("answer_summary", answer[:100])
 
-        print(f"• [Memory] Summary generated (q_summary_len={len(q_summary)}, a_summary_len={len(a_summary)})")
-
-        return {
-            "question_summary": q_summary,
-            "answer_summary": a_summary
-        }
-
-    except Exception as e:
-        print(f"• [Memory] Summarization failed: {e}")
-        import traceback
-        traceback.print_exc()
-        # 실패 시 앞부분만 저장
-        return {
-            "question_summary": question[:100] + "..." if len(question) > 100 else question,
-            "answer_summary": answer[:100] + "..." if len(answer) > 100 else answer
-        }
+def _original_summary(question: str, answer: str) -> dict:
+    """user_info 타입은 원문 그대로 (이름 등 중요 정보, LLM 요약 없이 바로 저장)"""
+    return {
+        "question_summary": question,
+        "answer_summary": answer[:100] + "..." if len(answer) > 100 else answer
+    }
 
 
 def _read_memory(state: SelfRAGState, limit: int = 5) -> SelfRAGState:
     """
     내부 함수: 메모리 읽기
-    SQLite에서 최근 대화를 읽어와서 List[Dict[str,str]] 형태로 state에 저장
+    메모리 저장소에서 최근 대화를 읽어와서 List[Dict[str,str]] 형태로 state에 저장
     가장 최근 대화가 0번째 인덱스
 
     conversation_id가 있으면 해당 대화창의 이력만 조회 (중요!)
@@ -138,56 +39,17 @@ def _read_memory(state: SelfRAGState, limit: int = 5) -> SelfRAGState:
     print(f"• [Memory] Reading from DB (conv_id={conversation_id})...")
 
     try:
-        # DB 초기화 (테이블이 없으면 생성)
-        init_memory_db()
-
-        # SQLite에서 최근 N개 대화 조회
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        store = get_memory_store()
 
         # conversation_id가 있으면 해당 대화창의 이력만 조회!
+        # (conversation_id, timestamp) 인덱스로 최근 limit개만 읽음 → 별도 COUNT 불필요
+        rows = store.recent(conversation_id or None, limit)
+
         if conversation_id:
-            # 특정 대화창의 총 개수 확인
-            cursor.execute('SELECT COUNT(*) FROM conversation_memory WHERE conversation_id = ?', (conversation_id,))
-            total_count = cursor.fetchone()[0]
-
-            # 실제 불러올 개수 결정
-            actual_limit = min(limit, total_count)
-
-            if actual_limit > 0:
-                cursor.execute('''
-                    SELECT question_summary, answer_summary, original_question, assistant_answer
-                    FROM conversation_memory
-                    WHERE conversation_id = ?
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                ''', (conversation_id, actual_limit))
-                rows = cursor.fetchall()
-            else:
-                rows = []
-
-            print(f"• [Memory] Found {total_count} conversations for conv_id={conversation_id}, loading {actual_limit}")
+            print(f"• [Memory] Loaded up to {limit} conversations for conv_id={conversation_id} (found {len(rows)})")
         else:
             # conversation_id가 없으면 전체 조회 (하위 호환성)
-            cursor.execute('SELECT COUNT(*) FROM conversation_memory')
-            total_count = cursor.fetchone()[0]
-
-            actual_limit = min(limit, total_count)
-
-            if actual_limit > 0:
-                cursor.execute('''
-                    SELECT question_summary, answer_summary, original_question, assistant_answer
-                    FROM conversation_memory
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                ''', (actual_limit,))
-                rows = cursor.fetchall()
-            else:
-                rows = []
-
-            print(f"• [Memory] No conv_id specified, loading {actual_limit} from all conversations")
-
-        conn.close()
+            print(f"• [Memory] No conv_id specified, loading {len(rows)} from all conversations")
 
         if rows:
             # List[Dict[str, str]] 형태로 변환
@@ -223,7 +85,7 @@ def _read_memory(state: SelfRAGState, limit: int = 5) -> SelfRAGState:
 def _write_memory(state: SelfRAGState) -> SelfRAGState:
     """
     내부 함수: 메모리 쓰기
-    현재 대화를 SQLite에 저장
+    현재 대화를 메모리 저장소에 저장
 
     Args:
         state: 현재 상태 (질문과 답변 포함)
@@ -234,80 +96,13 @@ def _write_memory(state: SelfRAGState) -> SelfRAGState:
     print("• [Memory] Writing to DB...")
 
     try:
-        # 답변 추출
-        structured_answer = state.get("structured_answer", {})
-        if structured_answer and "answer" in structured_answer:
-            assistant_answer = structured_answer["answer"]
-        else:
-            assistant_answer = state.get("final_answer", "")
-
-        # 답변이 없으면 저장 안 함
-        if not assistant_answer:
-            print("• [Memory] Skip: no answer")
+        record = _memory_record(state)
+        if record is None:
             return state
 
-        # 에러 메시지는 저장 안 함
-        skip_phrases = [
-            "관련 정보를 찾을 수 없습니다",
-            "관련 문서를 찾을 수 없습니다",
-            "죄송합니다. 저는 의학 질문에만 답할 수 있습니다"
-        ]
-
-        if any(phrase in assistant_answer for phrase in skip_phrases):
-            print("• [Memory] Skip: error message")
-            return state
-
-        # 저장할 데이터 준비
-        original_question = state.get("original_question") or state.get("question", "")
-        conversation_type = state.get("conversation_type", "medical")
-        conversation_id = state.get("conversation_id")  # 대화 ID 추출
-
-        # 요약 생성 (토큰 절약)
-        print(f"• [Memory] Generating summary (type={conversation_type}, conv_id={conversation_id})...")
-        summaries = _summarize_conversation(original_question, assistant_answer, conversation_type)
-        question_summary = summaries["question_summary"]
-        answer_summary = summaries["answer_summary"]
-
-        print(f"• [Memory] Saving to DB:")
-        print(f"  - conversation_id: {conversation_id}")
-        print(f"  - original_question: {original_question[:50]}...")
-        print(f"  - question_summary: {question_summary[:50] if question_summary else 'NULL'}...")
-        print(f"  - answer_summary: {answer_summary[:50] if answer_summary else 'NULL'}...")
-
-        # SQLite에 저장
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        timestamp = datetime.now().isoformat()
-
-        cursor.execute('''
-            INSERT INTO conversation_memory
-            (conversation_id, timestamp, original_question, assistant_answer, question_summary, answer_summary, conversation_type)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (conversation_id, timestamp, original_question, assistant_answer, question_summary, answer_summary, conversation_type))
-
-        conn.commit()
-
-        # 10개 초과 시 오래된 데이터 정리
-        cursor.execute('SELECT COUNT(*) FROM conversation_memory')
-        count = cursor.fetchone()[0]
-
-        if count > 10:
-            cursor.execute('''
-                DELETE FROM conversation_memory
-                WHERE id NOT IN (
-                    SELECT id FROM conversation_memory
-                    ORDER BY timestamp DESC
-                    LIMIT 10
-                )
-            ''')
-            deleted_count = count - 10
-            conn.commit()
-            print(f"• [Memory] Cleaned up {deleted_count} old records (kept latest 10)")
-
-        conn.close()
-
-        print(f"• [Memory] ✅ Successfully saved conversation (type={conversation_type})")
+        # 요약은 백그라운드에서 배치로 채움 (응답 경로에서 LLM 호출 없음)
+        _save_memory(record, _record_summaries(record))
+        get_memory_summarizer().submit()
 
     except Exception as e:
         print(f"• [Memory] Write error: {e}")
@@ -316,60 +111,108 @@ def _write_memory(state: SelfRAGState) -> SelfRAGState:
     return state
 
 
-def _increment_turn_count() -> int:
-    """
-    턴 카운터 증가 및 반환
-    metadata 테이블에 저장
-
-    Returns:
-        int: 현재 턴 카운트
-    """
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
+async def _awrite_memory(state: SelfRAGState) -> SelfRAGState:
+    """_write_memory의 비동기 버전 (저장소 쓰기는 스레드에서 실행)"""
+    print("• [Memory] Writing to DB...")
 
-    # 현재 카운트 조회
-    cursor.execute('SELECT value FROM metadata WHERE key = "turn_count"')
-    row = cursor.fetchone()
-    current_count = int(row[0]) if row else 0
+    try:
+        record = _memory_record(state)
+        if record is None:
+            return state
 
-    # 카운트 증가
-    new_count = current_count + 1
-    cursor.execute('''
-        INSERT OR REPLACE INTO metadata (key, value)
-        VALUES ("turn_count", ?)
-    ''', (str(new_count),))
+        await asyncio.to_thread(_save_memory, record, _record_summaries(record))
+        get_memory_summarizer().submit()
 
-    conn.commit()
-    conn.close()
+    except Exception as e:
+        print(f"• [Memory] Write error: {e}")
 
-    return new_count
+    return state
 
 
-def _transform_memory():
+def _memory_record(state: SelfRAGState):
     """
-    주기적 메모리 정리
-    30일 이상 데이터 삭제
+    저장할 대화 추출
+    답변이 없거나 에러 메시지이면 None (저장 안 함)
+    """
+    # 답변 추출
+    structured_answer = state.get("structured_answer", {})
+    if structured_answer and "answer" in structured_answer:
+        assistant_answer = structured_answer["answer"]
+    else:
+        assistant_answer = state.get("final_answer", "")
+
+    # 답변이 없으면 저장 안 함
+    if not assistant_answer:
+        print("• [Memory] Skip: no answer")
+        return None
+
+    # 에러 메시지는 저장 안 함
+    skip_phrases = [
+        "관련 정보를 찾을 수 없습니다",
+        "관련 문서를 찾을 수 없습니다",
+        "죄송합니다. 저는 의학 질문에만 답할 수 있습니다"
+    ]
+
+    if any(phrase in assistant_answer for phrase in skip_phrases):
+        print("• [Memory] Skip: error message")
+        return None
+
+    # 저장할 데이터 준비
+    record = {
+        "original_question": state.get("original_question") or state.get("question", ""),
+        "assistant_answer": assistant_answer,
+        "conversation_type": state.get("conversation_type", "medical"),
+        "conversation_id": state.get("conversation_id"),  # 대화 ID 추출
+    }
+    return record
+
+
+def _record_summaries(record: dict):
+    """
+    저장 시점의 요약
+    user_info는 원문 그대로, medical은 None (요약 대기 → MemorySummarizer가 나중에 채움)
     """
-    print("• [Memory Transform] Starting cleanup...")
+    if record["conversation_type"] == "user_info":
+        print(f"• [Memory] user_info detected, storing original (q_len={len(record['original_question'])})")
+        return _original_summary(record["original_question"], record["assistant_answer"])
+    return None
 
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
 
-    # 30일 이상 데이터 삭제
-    cursor.execute('''
-        DELETE FROM conversation_memory
-        WHERE datetime(timestamp) < datetime('now', '-30 days')
-    ''')
+def _save_memory(record: dict, summaries: dict = None) -> None:
+    """
+    대화를 메모리 저장소에 저장하고 같은 대화창의 보관 개수 초과분 정리
+    summaries가 None이면 요약 컬럼은 NULL로 저장 (백그라운드 요약 대기)
+    """
+    conversation_id = record["conversation_id"]
+    original_question = record["original_question"]
+    assistant_answer = record["assistant_answer"]
+    conversation_type = record["conversation_type"]
+    question_summary = summaries["question_summary"] if summaries else None
+    answer_summary = summaries["answer_summary"] if summaries else None
 
-    deleted_count = cursor.rowcount
-    conn.commit()
-    conn.close()
+    print(f"• [Memory] Saving to DB:")
+    print(f"  - conversation_id: {conversation_id}")
+    print(f"  - original_question: {original_question[:50]}...")
+    print(f"  - question_summary: {question_summary[:50] if question_summary else 'NULL'}...")
+    print(f"  - answer_summary: {answer_summary[:50] if answer_summary else 'NULL'}...")
 
-    print(f"• [Memory Transform] Deleted {deleted_count} old conversations")
+    store = get_memory_store()
+    deleted_count = store.add(
+        conversation_id, original_question, assistant_answer, question_summary, answer_summary, conversation_type
+    )
+    if deleted_count > 0:
+        print(f"• [Memory] Cleaned up {deleted_count} old records (kept latest {store.keep_per_conversation} for conv_id={conversation_id})")
 
+    print(f"• [Memory] ✅ Successfully saved conversation (type={conversation_type})")
 
-# Transform 실행 간격 (턴 수)
-TRANSFORM_INTERVAL = 20
+
+def _transform_memory():
+    """
+    주기적 메모리 정리
+    30일 이상 데이터 삭제 (MEMORY_SWEEP_INTERVAL마다 백그라운드 스레드에서 배치 삭제, 응답 경로는 기다리지 않음)
+    """
+    if get_memory_retention().maybe_sweep():
+        print("• [Memory Transform] Scheduled background cleanup")
 
 
 def memory_read(state: SelfRAGState, limit: int = 5) -> SelfRAGState:
@@ -402,12 +245,40 @@ def memory_write(state: SelfRAGState) -> SelfRAGState:
         SelfRAGState: 변경되지 않은 상태 (저장만 수행)
     """
     print("• [Memory Write] start")
+    if not get_memory_store().stores_turns:
+        # chat_message 이력 사용: 대화는 Django가 이미 저장 (이중 저장 안 함)
+        print("• [Memory Write] skip (history read from chat_message)")
+        return state
     state = _write_memory(state)
 
-    # 턴 카운터 증가 및 주기적 정리
-    turn_count = _increment_turn_count()
-    if turn_count % TRANSFORM_INTERVAL == 0:
-        _transform_memory()
+    # 주기적 정리 (백그라운드)
+    _transform_memory()
+
+    print("• [Memory Write] complete")
+    return state
+
+
+async def amemory_read(state: SelfRAGState, limit: int = 5) -> SelfRAGState:
+    """
+    memory_read의 비동기 버전
+    저장소 I/O(SQLite / psycopg2)는 이벤트 루프를 막지 않도록 스레드에서 실행
+    """
+    print("• [Memory Read] start")
+    state = await asyncio.to_thread(_read_memory, state, limit)
+    print("• [Memory Read] complete")
+    return state
+
+
+async def amemory_write(state: SelfRAGState) -> SelfRAGState:
+    """memory_write의 비동기 버전"""
+    print("• [Memory Write] start")
+    if not get_memory_store().stores_turns:
+        print("• [Memory Write] skip (history read from chat_message)")
+        return state
+    state = await _awrite_memory(state)
+
+    # 주기적 정리 (백그라운드)
+    _transform_memory()
 
     print("• [Memory Write] complete")
     return state
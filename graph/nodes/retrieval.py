@@ -1,63 +1,200 @@
 # nodes/retrieval.py
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from graph.nodes.generate_answer import GENERATE_MODEL
 from graph.state import SelfRAGState
-from rag.services.retriever import get_vector_retriever
+from rag.services.context_builder import build_context, context_budget
+from rag.services.retriever import SearchFilters, get_vector_retriever
+
+# MMR(다양성) 검색 기본값 - state["diverse_context"]로 턴 단위 재정의 가능
+RETRIEVAL_USE_MMR = os.getenv("RETRIEVAL_USE_MMR", "false").lower() in ("1", "true", "yes")
+RETRIEVAL_MMR_LAMBDA = float(os.getenv("RETRIEVAL_MMR_LAMBDA", "0.5"))
+# vector: pgvector kNN만 사용 / hybrid: pg_trgm 어휘 검색 + kNN을 RRF로 통합
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "vector").lower()
+# 분류(LLM)와 겹쳐 미리 검색하는 prefetch 단계 사용 여부 / 대기 상한(초)
+# (비동기: 전체 검색을 취소, 동기: DB 쿼리에 statement_timeout으로 적용)
+RETRIEVAL_PREFETCH = os.getenv("RETRIEVAL_PREFETCH", "false").lower() in ("1", "true", "yes")
+RETRIEVAL_PREFETCH_TIMEOUT = float(os.getenv("RETRIEVAL_PREFETCH_TIMEOUT", "5"))
 
 
 def retrieval(state: SelfRAGState) -> SelfRAGState:
     """
     Retrieval 노드
     VectorRetriever를 사용하여 관련 문서 검색
+    같은 질문으로 미리 검색한 결과(prefetch_retrieval)가 있으면 그대로 사용
     """
-    query = state.get("question", "").strip()
+    if _use_prefetched(state):
+        return state
 
-    # 시작 로그
-    print(f"• [Retrieve] start (top_k=5, query=\"{query[:50]}...\")")
+    query, use_mmr, filters = _prepare_retrieval(state)
 
     try:
-        # VectorRetriever 인스턴스 가져오기
-        retriever = get_vector_retriever()
+        docs = _search(query, use_mmr, filters)
+    except Exception as e:
+        return _retrieval_failed(state, e)
 
-        # 문서 검색 (상위 5개)
-        docs = retriever.search(query, top_k=5)
+    return _apply_retrieval(state, docs)
 
-        # 문서 정보 추출
-        retrieved_docs = []
-        context_parts = []
-        sources = []
-        seen_c_ids = set()  # 중복 체크용
 
-        for i, doc in enumerate(docs, 1):
-            # similarity는 metadata에 포함되어 있음
-            similarity = doc.metadata.get("similarity", 0.0)
+async def aretrieval(state: SelfRAGState) -> SelfRAGState:
+    """retrieval의 비동기 버전 (AsyncOpenAI 임베딩 + psycopg3 비동기 풀)"""
+    if _use_prefetched(state):
+        return state
 
-            doc_info = {
-                "content": doc.page_content,
-                "metadata": doc.metadata,
-                "score": similarity  # 유사도 점수 (1에 가까울수록 유사)
-            }
-            retrieved_docs.append(doc_info)
+    query, use_mmr, filters = _prepare_retrieval(state)
 
-            # 컨텍스트 구성
-            context_parts.append(f"[문서 {i}] (유사도: {similarity:.2f})\n{doc.page_content}")
+    try:
+        docs = await _asearch(query, use_mmr, filters)
+    except Exception as e:
+        return _retrieval_failed(state, e)
+
+    return _apply_retrieval(state, docs)
 
-            # 출처 정보 - c_id 사용 (중복 제거)
-            c_id = doc.metadata.get("c_id", f"문서_{i}")
-            if c_id not in seen_c_ids:
-                sources.append(c_id)  # c_id만 저장 (번호 제거)
-                seen_c_ids.add(c_id)
 
-        state["retrieved_docs"] = retrieved_docs
-        state["context"] = "\n\n".join(context_parts)
-        state["sources"] = sources
+def prefetch_retrieval(state: SelfRAGState) -> Dict[str, Any]:
+    """
+    Prefetch 노드 (classifier / medical_check와 병렬 실행)
+    분류 결과를 기다리지 않고 원 질문으로 미리 검색해 prefetched_retrieval에 보관한다.
+    web_search / user_info / non_medical로 라우팅되면 결과는 사용되지 않는다.
+    병렬 노드이므로 prefetched_retrieval 키만 반환한다.
+    DB 검색은 RETRIEVAL_PREFETCH_TIMEOUT을 statement_timeout으로 걸어 느린 쿼리가 병렬 단계를 붙잡지 않게 한다.
+    """
+    started = time.perf_counter()
+    query, use_mmr, filters = _prepare_retrieval(state)
+    try:
+        docs = _search(query, use_mmr, filters, statement_timeout_ms=int(RETRIEVAL_PREFETCH_TIMEOUT * 1000))
+    except Exception as e:
+        print(f"• [Prefetch] skipped: {e}")
+        return {}
+    return _prefetched(query, docs, started)
 
-        # 완료 로그
-        print(f"• [Retrieve] complete (총 {len(retrieved_docs)}개 chunk 검색 완료)")
 
+async def aprefetch_retrieval(state: SelfRAGState) -> Dict[str, Any]:
+    """prefetch_retrieval의 비동기 버전 (RETRIEVAL_PREFETCH_TIMEOUT 초과 시 취소)"""
+    started = time.perf_counter()
+    query, use_mmr, filters = _prepare_retrieval(state)
+    try:
+        docs = await asyncio.wait_for(_asearch(query, use_mmr, filters), RETRIEVAL_PREFETCH_TIMEOUT)
     except Exception as e:
-        # 검색 실패 시
-        state["retrieved_docs"] = []
-        state["context"] = ""
-        state["sources"] = []
-        print(f"문서 검색 오류: {e}")
+        print(f"• [Prefetch] skipped: {e!r}")
+        return {}
+    return _prefetched(query, docs, started)
+
+
+def _search(
+    query: str, use_mmr: bool, filters: Optional[SearchFilters], statement_timeout_ms: Optional[int] = None
+):
+    # VectorRetriever 인스턴스 가져오기
+    retriever = get_vector_retriever()
+
+    # 문서 검색 (상위 5개)
+    # MMR 요청 시 다양성 우선, 아니면 설정에 따라 하이브리드(약물명/유전자 기호 정확 일치 보완)
+    if RETRIEVAL_MODE == "hybrid" and not use_mmr:
+        return retriever.search_hybrid(
+            query, top_k=5, filters=filters, statement_timeout_ms=statement_timeout_ms
+        )
+    return retriever.search(
+        query,
+        top_k=5,
+        mmr=use_mmr,
+        lambda_mult=RETRIEVAL_MMR_LAMBDA,
+        filters=filters,
+        statement_timeout_ms=statement_timeout_ms,
+    )
+
+
+async def _asearch(query: str, use_mmr: bool, filters: Optional[SearchFilters]):
+    retriever = get_vector_retriever()
+    if RETRIEVAL_MODE == "hybrid" and not use_mmr:
+        return await retriever.asearch_hybrid(query, top_k=5, filters=filters)
+    return await retriever.asearch(
+        query, top_k=5, mmr=use_mmr, lambda_mult=RETRIEVAL_MMR_LAMBDA, filters=filters
+    )
+
+
+def _prefetched(query: str, docs, started: float) -> Dict[str, Any]:
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    result = _apply_retrieval({}, docs)
+    return {
+        "prefetched_retrieval": {
+            "question": query,
+            "retrieved_docs": result["retrieved_docs"],
+            "context": result["context"],
+            "sources": result["sources"],
+            "elapsed_ms": round(elapsed_ms, 1),
+        }
+    }
+
+
+def _use_prefetched(state: SelfRAGState) -> bool:
+    """
+    prefetch 결과가 현재 질문과 같으면 state에 반영하고 True
+    (rewrite_query 이후에는 질문이 바뀌므로 다시 검색한다)
+    """
+    prefetched = state.get("prefetched_retrieval")
+    if not prefetched or prefetched.get("question") != state.get("question", "").strip():
+        return False
+
+    state["retrieved_docs"] = prefetched["retrieved_docs"]
+    state["context"] = prefetched["context"]
+    state["sources"] = prefetched["sources"]
+    print(
+        f"• [Retrieve] prefetch hit ({len(prefetched['retrieved_docs'])}개 chunk, "
+        f"saved ~{prefetched['elapsed_ms']:.0f}ms)"
+    )
+    return True
+
+
+def _prepare_retrieval(state: SelfRAGState) -> Tuple[str, bool, Optional[SearchFilters]]:
+    query = state.get("question", "").strip()
+    use_mmr = state.get("diverse_context", RETRIEVAL_USE_MMR)
+    # 출처/연도 필터 (없으면 전체 검색)
+    filters = SearchFilters(**state["search_filters"]) if state.get("search_filters") else None
+
+    # 시작 로그
+    print(f"• [Retrieve] start (top_k=5, mode={RETRIEVAL_MODE}, mmr={use_mmr}, query=\"{query[:50]}...\")")
+    return query, use_mmr, filters
+
+
+def _apply_retrieval(state: SelfRAGState, docs) -> SelfRAGState:
+    """
+    검색 결과를 retrieved_docs / context / sources로 state에 반영
+    context는 generate_answer 모델의 토큰 예산(state["max_token"]이 있으면 그 값) 안에서 조립
+    """
+    # 문서 정보 추출
+    retrieved_docs = []
+    for doc in docs:
+        # similarity는 metadata에 포함되어 있음
+        retrieved_docs.append({
+            "content": doc.page_content,
+            "metadata": doc.metadata,
+            "score": doc.metadata.get("similarity", 0.0)  # 유사도 점수 (1에 가까울수록 유사)
+        })
+
+    # 컨텍스트 구성 - 같은 c_id는 하나의 [문서 n]으로 합치고, sources는 [문서 n] 순서와 동일
+    budget = state.get("max_token") or context_budget(GENERATE_MODEL)
+    built = build_context(retrieved_docs, budget=budget)
+
+    state["retrieved_docs"] = retrieved_docs
+    state["context"] = built.context
+    state["sources"] = built.sources
+
+    # 완료 로그
+    print(
+        f"• [Retrieve] complete (총 {len(retrieved_docs)}개 chunk 검색 완료, "
+        f"context≈{built.tokens}/{budget} tokens, merged={built.merged}, dropped={built.dropped}, "
+        f"truncated={built.truncated})"
+    )
+    return state
+
 
+def _retrieval_failed(state: SelfRAGState, error: Exception) -> SelfRAGState:
+    # 검색 실패 시
+    state["retrieved_docs"] = []
+    state["context"] = ""
+    state["sources"] = []
+    print(f"문서 검색 오류: {error}")
     return state
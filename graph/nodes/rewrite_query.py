@@ -1,13 +1,32 @@
 # nodes/rewrite_query.py
-from openai import OpenAI
+from typing import Optional
+
+from graph.llm_client import achat, chat
+
+REWRITE_MODEL = "gpt-4o-mini"
 
-client = OpenAI()
 
 def rewrite_query(state):
     """
     질문 재작성 노드
     원래 질문을 더 명확하고 검색하기 쉽게 재작성
     """
+    prompt = _prepare_rewrite(state)
+    if prompt is None:
+        return state
+    return _apply_rewrite(state, chat(REWRITE_MODEL, prompt, temperature=0.1))
+
+
+async def arewrite_query(state):
+    """rewrite_query의 비동기 버전 (AsyncOpenAI)"""
+    prompt = _prepare_rewrite(state)
+    if prompt is None:
+        return state
+    return _apply_rewrite(state, await achat(REWRITE_MODEL, prompt, temperature=0.1))
+
+
+def _prepare_rewrite(state) -> Optional[str]:
+    """재작성 프롬프트 생성. 질문이 비어 있으면 None 반환"""
     original_query = state.get("question", "").strip()
     conversation_type = state.get("conversation_type", "medical")
     is_follow_up = state.get("is_follow_up", False)
@@ -19,7 +38,7 @@ def rewrite_query(state):
     if not original_query:
         state["rewritten_question"] = ""
         print(f"• [QueryRewrite] complete (rewritten=\"\")")
-        return state
+        return None
 
     # 평가 결과가 있다면 참고
     evaluation_result = state.get("evaluation_result", "")
@@ -58,15 +77,10 @@ def rewrite_query(state):
 
 재작성된 질문만 출력하세요.
     """
+    return prompt
 
-    res = client.chat.completions.create(
-        model="gpt-4o-mini",
-        temperature=0.1,
-        messages=[{"role": "user", "content": prompt}]
-    )
-
-    rewritten = res.choices[0].message.content.strip()
 
+def _apply_rewrite(state, rewritten: str):
     # 재작성된 질문을 question 필드에 업데이트
     state["rewritten_question"] = rewritten
     state["question"] = rewritten  # 다음 검색에 사용될 수 있도록
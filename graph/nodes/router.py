@@ -0,0 +1,152 @@
+# nodes/router.py
+import json
+import os
+from typing import Optional
+
+from graph.llm_client import achat, chat
+from graph.nodes.classification import (
+    CLASSIFIER_MODEL,
+    NON_MEDICAL_ANSWER,
+    afast_decide,
+    apply_fast_decision,
+    fast_decide,
+    format_history,
+)
+from graph.state import SelfRAGState
+
+ROUTER_MODEL = CLASSIFIER_MODEL
+# split: classifier + medical_check 두 노드(LLM 2회) / merged: router 한 노드(LLM 1회, structured output)
+ROUTER_MODE = os.getenv("ROUTER_MODE", "split").lower()
+
+# 분류 결과 스키마 (strict - 응답이 항상 이 형태로 생성됨)
+ROUTER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "conversation_type": {"type": "string", "enum": ["medical", "user_info", "non_medical"]},
+        "is_follow_up": {"type": "boolean"},
+        "is_terminology": {"type": "boolean"},
+    },
+    "required": ["conversation_type", "is_follow_up", "is_terminology"],
+    "additionalProperties": False,
+}
+ROUTER_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {"name": "route", "strict": True, "schema": ROUTER_SCHEMA},
+}
+
+
+def router(state: SelfRAGState) -> SelfRAGState:
+    """
+    Router 노드 (classifier + medical_check 통합)
+    conversation_type / is_follow_up / is_terminology를 structured output 한 번으로 결정
+    FAST_CLASSIFIER 1차 분류가 user_info / non_medical로 확신하면 LLM 호출 생략
+    (medical이면 is_terminology가 필요하므로 그대로 호출)
+    """
+    prompt = _prepare_router(state)
+    if prompt is None:
+        return state
+
+    decision = fast_decide(state)
+    if decision is not None and decision.conversation_type != "medical":
+        state["is_terminology"] = False
+        return apply_fast_decision(state, decision, node="Router")
+
+    return _apply_router(state, chat(ROUTER_MODEL, prompt, response_format=ROUTER_RESPONSE_FORMAT))
+
+
+async def arouter(state: SelfRAGState) -> SelfRAGState:
+    """router의 비동기 버전 (AsyncOpenAI)"""
+    prompt = _prepare_router(state)
+    if prompt is None:
+        return state
+
+    decision = await afast_decide(state)
+    if decision is not None and decision.conversation_type != "medical":
+        state["is_terminology"] = False
+        return apply_fast_decision(state, decision, node="Router")
+
+    return _apply_router(state, await achat(ROUTER_MODEL, prompt, response_format=ROUTER_RESPONSE_FORMAT))
+
+
+def _prepare_router(state: SelfRAGState) -> Optional[str]:
+    """통합 분류 프롬프트 생성. 빈 질문이면 state를 채우고 None 반환 (LLM 호출 생략)"""
+    query = state.get("question", "").strip()
+
+    # 원본 질문 저장 (처음 입력받은 질문)
+    if "original_question" not in state:
+        state["original_question"] = query
+
+    # conversation_history 가져오기 (최근 2턴 = 4개 메시지만 사용)
+    recent_history = (state.get("conversation_history") or [])[:4]
+
+    # 시작 로그
+    print(f"• [Router] start (question=\"{query[:50]}...\", history_len={len(recent_history)})")
+
+    if not query:
+        state["conversation_type"] = "non_medical"
+        state["is_follow_up"] = False
+        state["is_terminology"] = False
+        state["final_answer"] = NON_MEDICAL_ANSWER
+        print(f"• [Router] complete (conversation_type=non_medical)")
+        return None
+
+    history_context = format_history(recent_history)
+
+    prompt = f"""
+    사용자의 질문:
+    ---
+    {query}
+    ---
+
+    이전 대화 이력 (최근 2턴):
+    ---
+    {history_context if history_context else "(이전 대화 없음)"}
+    ---
+
+    위 맥락을 고려하여 세 가지를 판정하세요.
+
+    1. conversation_type
+    - "medical": 의학, 건강, 질병, 증상, 치료 등과 관련된 **새로운 정보 요청**
+      질문에 "그 모델", "그거", "그 치료법" 같은 대명사가 있고 이전 대화가 의학 관련이었다면 → medical
+      예: 이전 대화에서 "Cox 모델"을 언급했고, 현재 질문이 "그 모델에서 샘플 120명이면 적절할까?" → medical
+    - "user_info": 사용자가 이름을 알려주거나 이름을 다시 묻는 경우 ("내 이름은 홍길동이야", "내 이름이 뭐야?"),
+      또는 **직전 대화 내용 자체를 확인하는 질문** ("방금 뭐라고 했어?", "지금까지 무슨 얘기했어?")
+      이전 내용을 **바탕으로 새로운 질문**을 하는 것은 medical입니다.
+    - "non_medical": 의학과 관련 없고 사용자 정보나 대화 이력 확인도 아닌 경우
+      예: "날씨 어때?", "오늘 뉴스 알려줘", "파이썬 코드 짜줘"
+
+    2. is_follow_up
+    - true: 직전 의학 질문/답변의 내용을 이어서 묻는 경우
+      예: 직전에 EGFR 관련 연구를 이야기했고, 이번 질문이 "그 연구에서 PFS는 어땠어?"
+    - false: 이전 대화와 주제가 다르거나 독립적인 새로운 질문인 경우
+      같은 단어가 있어도 문맥이 이어지지 않으면 false (예: "배 아파" 다음의 "배고파")
+
+    3. is_terminology
+    - true: 의학 용어나 질병명의 '정의', '뜻', '의미'를 묻는 질문 ("당뇨병이 뭐야?", "고혈압의 정의는?")
+    - false: 그 외 ("당뇨병 치료 방법은?", "두통이 있을 때 어떻게 해야 해?"), medical이 아니면 항상 false
+    """
+    return prompt
+
+
+def _apply_router(state: SelfRAGState, raw_result: str) -> SelfRAGState:
+    """structured output(JSON) 결과를 state에 반영 (파싱 실패 시 classifier와 같은 기본값)"""
+    try:
+        parsed = json.loads(raw_result)
+    except Exception:
+        parsed = {}
+
+    conv_type = parsed.get("conversation_type")
+    if conv_type not in ("medical", "user_info", "non_medical"):
+        conv_type = "medical"
+    state["conversation_type"] = conv_type
+    state["is_follow_up"] = bool(parsed.get("is_follow_up", False))
+    state["is_terminology"] = conv_type == "medical" and bool(parsed.get("is_terminology", False))
+    if conv_type == "non_medical":
+        state["final_answer"] = NON_MEDICAL_ANSWER
+
+    # 완료 로그
+    print(
+        f"• [Router] complete (conversation_type={conv_type}, is_follow_up={state['is_follow_up']}, "
+        f"is_terminology={state['is_terminology']})"
+    )
+    return state
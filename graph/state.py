@@ -1,4 +1,9 @@
-from typing import List, Dict, Any, TypedDict, Tuple, Literal, NotRequired
+from typing import Annotated, List, Dict, Any, TypedDict, Tuple, Literal, NotRequired
+
+
+def merge_timings(current: Dict[str, float], update: Dict[str, float]) -> Dict[str, float]:
+    """node_timings reducer - 병렬 노드가 같은 step에 기록해도 충돌하지 않도록 병합"""
+    return {**(current or {}), **(update or {})}
 
 
 class SelfRAGState(TypedDict):
@@ -16,7 +21,9 @@ class SelfRAGState(TypedDict):
     # 검색 관련
     is_terminology: bool  # 의학 용어 질문 여부
     category: List[str]  # 세부 카테고리
-    max_token:bool
+    max_token: NotRequired[int]  # 검색 컨텍스트 토큰 예산 (없으면 CONTEXT_TOKEN_BUDGET 설정)
+    diverse_context: NotRequired[bool]  # True면 MMR로 다양성 있는 chunk 검색
+    search_filters: NotRequired[Dict[str, Any]]  # {"sources": [...], "year_from": 2015, "year_to": 2024}
 
     # 답변 생성 관련
     retrieval_question:bool
@@ -24,11 +31,19 @@ class SelfRAGState(TypedDict):
     retrieved_docs: List[Dict[str, Any]] # 검증이후 query
     context: str # LLM Templete에 들어갈 문장 구성
     sources: List[str]  # 출처 정보
+    # 분류와 병렬로 미리 검색한 결과 {"question", "retrieved_docs", "context", "sources", "elapsed_ms"}
+    prefetched_retrieval: NotRequired[Dict[str, Any]]
+    # 유사 질문 답변 캐시 조회 결과 {"question", "answer", "tokens", "similarity"}
+    cached_answer: NotRequired[Dict[str, Any]]
     #chunk_metadata: Dict[str,List[Dict[str]]]
 
     # 평가 관련
     is_relevant: bool  # 문서 관련성 평가 결과
     relevance_score: float  # 관련성 점수
+    # chunk별 관련성 점수 [{"c_id", "score", "similarity", "kept"}] (Message.metadata["chunk_scores"])
+    chunk_scores: NotRequired[List[Dict[str, Any]]]
+    # 관련성 결정 단계: accept / reject (유사도 게이트) | judge (점수기 평가)
+    relevance_tier: NotRequired[str]
     message:str
     rewrite_count: int  # 쿼리 재작성 횟수
 
@@ -36,11 +51,16 @@ class SelfRAGState(TypedDict):
     final_answer: str  # 최종 답변 (출처 포함) - 평문용
     structured_answer: Dict[str, Any]  # JSON 구조화된 답변
     llm_score: float  # LLM 자체 신뢰도 점수 (0.0-1.0)
+    # generate_answer 호출 토큰 수 (tiktoken 기준) {"model", "prompt", "completion"}
+    token_usage: NotRequired[Dict[str, Any]]
 
     # 대화 이력
     # 최신 5개 대화 유지. 형식: [{"role": "user", "content": "..."}, {"role": "assistant", "content": "..."}, ...]
     # 순서: 최신 → 오래된 (가장 최근 대화가 0번째, 가장 최근 이름 우선)
     conversation_history: List[Dict[str, str]]
+
+    # 노드별 실행 시간(ms) {"classifier": 812.3, "retrieval": 95.1, ...}
+    node_timings: Annotated[Dict[str, float], merge_timings]
     
 
 
@@ -1,14 +1,52 @@
 -- 테이블/인덱스 초기 스키마
 
 CREATE EXTENSION IF NOT EXISTS vector;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 CREATE TABLE IF NOT EXISTS medical (
     id BIGSERIAL PRIMARY KEY,
     content TEXT NOT NULL,
     embedding vector(1536),
-    metadata JSONB NOT NULL
+    metadata JSONB NOT NULL,
+    -- c_id = {source_spec}_{creation_year}_{원본 c_id} (연도 결측 시 {source_spec}_{원본 c_id})
+    -- 검색 필터용 생성 컬럼 (rag/etl/transform/cleaner.py::column_renewal 참고)
+    source_spec TEXT GENERATED ALWAYS AS (
+        substring(metadata->>'c_id' from '^(.*?)_[0-9]')
+    ) STORED,
+    creation_year INT GENERATED ALWAYS AS (
+        substring(metadata->>'c_id' from '^.*?_((?:19|20)[0-9]{2})_[0-9]')::int
+    ) STORED
 );
 
+CREATE INDEX IF NOT EXISTS medical_source_spec_idx ON medical (source_spec);
+CREATE INDEX IF NOT EXISTS medical_creation_year_idx ON medical (creation_year);
+
+-- ANN 인덱스 (코사인 거리). 파라미터 튜닝/재생성은 scripts/embed_reindex.py 사용
+CREATE INDEX IF NOT EXISTS medical_embedding_hnsw_idx
+    ON medical USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
+
+-- 하이브리드 검색용 trigram 인덱스 (content ILIKE '%EGFR%' 등 부분 일치)
+-- 3글자 미만 검색어는 trigram을 만들 수 없어 인덱스 대신 필터로 처리된다
+CREATE INDEX IF NOT EXISTS medical_content_trgm_idx
+    ON medical USING gin (content gin_trgm_ops);
+
+-- 유사 질문 답변 캐시 (rag/services/answer_cache.py)
+-- corpus_version = medical의 "max(id):count" (코퍼스가 바뀌면 이전 버전 행은 삭제됨)
+CREATE TABLE IF NOT EXISTS answer_cache (
+    id BIGSERIAL PRIMARY KEY,
+    question TEXT NOT NULL,
+    embedding vector(1536) NOT NULL,
+    answer JSONB NOT NULL,
+    corpus_version TEXT NOT NULL,
+    tokens INT NOT NULL DEFAULT 0,
+    hits INT NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_hit_at TIMESTAMPTZ
+);
+CREATE INDEX IF NOT EXISTS answer_cache_embedding_hnsw_idx
+    ON answer_cache USING hnsw (embedding vector_cosine_ops);
+
 -- (선택) 기본 계정/권한
 -- CREATE USER skn WITH PASSWORD 'sknpass';
 -- GRANT ALL PRIVILEGES ON DATABASE skn_project TO skn;
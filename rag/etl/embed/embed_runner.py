@@ -30,7 +30,7 @@ print("✅ 청킹 완료!\n")
 # 3. 임베딩 및 벡터 저장 단계
 # =========================
 from rag.etl.load.csvloader import CustomCSVLoader
-from rag.services.db_pool import DatabasePool
+from rag.services.pg_pool import get_vector_pool
 from rag.services.vectorstore_pg import CustomPGVector
 from langchain_openai import OpenAIEmbeddings
 
@@ -57,7 +57,7 @@ def main():
         print("⚠️ CSV에서 로드된 문서가 없습니다.")
         return
 
-    db = DatabasePool()
+    db = get_vector_pool()
     embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
     store = CustomPGVector(db=db, embedding_fn=embeddings, table="medical")
 
@@ -0,0 +1,42 @@
+-- medical.embedding ANN 인덱스 유지보수 (scripts/embed_reindex.py와 동일한 DDL)
+
+-- HNSW (권장: 빌드 느림/메모리 많이 사용, 검색 빠름, recall 높음)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS medical_embedding_hnsw_idx
+    ON medical USING hnsw (embedding vector_cosine_ops)
+    WITH (m = 16, ef_construction = 64);
+
+-- IVFFlat (빌드 빠름, lists ≈ rows / 1000)
+-- CREATE INDEX CONCURRENTLY IF NOT EXISTS medical_embedding_ivfflat_idx
+--     ON medical USING ivfflat (embedding vector_cosine_ops)
+--     WITH (lists = 10);
+
+-- 하이브리드 검색용 trigram 인덱스 (RETRIEVAL_MODE=hybrid)
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS medical_content_trgm_idx
+    ON medical USING gin (content gin_trgm_ops);
+
+-- 출처/연도 필터용 생성 컬럼 (기존 테이블 마이그레이션, 테이블 재작성 발생)
+ALTER TABLE medical
+    ADD COLUMN IF NOT EXISTS source_spec TEXT GENERATED ALWAYS AS (
+        substring(metadata->>'c_id' from '^(.*?)_[0-9]')
+    ) STORED,
+    ADD COLUMN IF NOT EXISTS creation_year INT GENERATED ALWAYS AS (
+        substring(metadata->>'c_id' from '^.*?_((?:19|20)[0-9]{2})_[0-9]')::int
+    ) STORED;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS medical_source_spec_idx ON medical (source_spec);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS medical_creation_year_idx ON medical (creation_year);
+
+-- 쿼리 단위 검색 파라미터 (트랜잭션 범위)
+-- SET LOCAL hnsw.ef_search = 40;
+-- SET LOCAL ivfflat.probes = 3;
+-- 필터 검색 시 (pgvector 0.8+, ivfflat은 relaxed_order만 지원)
+-- SET LOCAL hnsw.iterative_scan = relaxed_order;
+-- SET LOCAL ivfflat.iterative_scan = relaxed_order;
+
+-- 인덱스 유효성 확인 (CONCURRENTLY 빌드 실패 시 indisvalid = false)
+SELECT c.relname, am.amname, i.indisvalid, pg_size_pretty(pg_relation_size(c.oid))
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+JOIN pg_am am ON am.oid = c.relam
+WHERE i.indrelid = 'medical'::regclass
+  AND am.amname IN ('hnsw', 'ivfflat');
@@ -2,6 +2,7 @@
 
 
  CREATE EXTENSION IF NOT EXISTS vector;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
 -- test
 CREATE TABLE IF NOT EXISTS docs (
@@ -23,3 +24,7 @@ CREATE TABLE IF NOT EXISTS chunks (
 CREATE INDEX IF NOT EXISTS idx_chunks_embed
   ON chunks USING ivfflat (embedding vector_cosine_ops)
   WITH (lists = 100);
+
+-- 하이브리드(어휘 + 벡터) 검색용 trigram 인덱스
+CREATE INDEX IF NOT EXISTS idx_chunks_content_trgm
+  ON chunks USING gin (content gin_trgm_ops);
@@ -0,0 +1,330 @@
+'''
+목적: 반복되는 의학 질문의 답변 재사용 (semantic answer cache)
+역할:
+질문 임베딩 kNN으로 가장 가까운 기존 질문을 찾아 similarity가 임계값 이상이면 저장된 답변 반환
+답변(structured_answer, 출처, 점수)은 Postgres answer_cache 테이블(pgvector)에 저장해 워커 간 공유
+medical 코퍼스 버전(max(id), count)을 함께 저장하고, 버전이 바뀌면 이전 버전 답변을 삭제(무효화)
+hit/miss, 절약한 토큰(추정) 카운터 제공
+'''
+import asyncio
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Optional, Sequence
+
+import numpy as np
+from dotenv import load_dotenv
+
+try:
+    from .binary_search import get_async_binary_pool
+    from .local_index import fetch_corpus_version
+    from .pg_pool import pg_connection
+except ImportError:
+    try:
+        from rag.services.binary_search import get_async_binary_pool
+        from rag.services.local_index import fetch_corpus_version
+        from rag.services.pg_pool import pg_connection
+    except ImportError:
+        from binary_search import get_async_binary_pool
+        from local_index import fetch_corpus_version
+        from pg_pool import pg_connection
+
+load_dotenv()
+
+# infra/init.sql과 같은 스키마 (운영 DB는 init.sql로 생성, 개발 DB는 최초 사용 시 생성)
+_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id BIGSERIAL PRIMARY KEY,
+        question TEXT NOT NULL,
+        embedding vector(1536) NOT NULL,
+        answer JSONB NOT NULL,
+        corpus_version TEXT NOT NULL,
+        tokens INT NOT NULL DEFAULT 0,
+        hits INT NOT NULL DEFAULT 0,
+        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+        last_hit_at TIMESTAMPTZ
+    );
+    CREATE INDEX IF NOT EXISTS {table}_embedding_hnsw_idx
+        ON {table} USING hnsw (embedding vector_cosine_ops);
+"""
+
+
+@dataclass
+class AnswerCacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    invalidated: int = 0
+    saved_tokens: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class AnswerCache:
+    """
+    질문 임베딩 기반 답변 캐시
+
+    - lookup / alookup: 같은 코퍼스 버전에서 similarity >= threshold인 가장 가까운 답변 (조회만, 카운터 변경 없음)
+    - record_hit / arecord_hit: 조회한 답변을 실제로 사용했을 때 hit 집계 (hits, last_hit_at, 절약 토큰)
+    - record_miss: 캐시 대상 턴인데 답변을 찾지 못했을 때 miss 집계
+    - store / astore: 답변 저장 (tokens = 답변 1회 생성에 든 추정 토큰, hit 시 절약량으로 집계)
+    - 코퍼스 버전은 version_ttl초마다 다시 확인하고, 바뀌면 이전 버전 행을 삭제
+    """
+
+    def __init__(
+        self,
+        table_name: str = "answer_cache",
+        corpus_table: str = "medical",
+        threshold: float = 0.95,
+        version_ttl: float = 60.0,
+    ):
+        self.table_name = table_name
+        self.corpus_table = corpus_table
+        self.threshold = threshold
+        self.version_ttl = version_ttl
+        self.stats = AnswerCacheStats()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self._version: Optional[str] = None
+        self._version_checked_at = 0.0
+
+    # --- 코퍼스 버전 / 스키마 ---
+
+    def _version_stale(self) -> bool:
+        return self._version is None or time.monotonic() - self._version_checked_at >= self.version_ttl
+
+    def _set_version(self, version: str) -> bool:
+        """새 버전 기록. 이전 버전과 다르면 True (무효화 필요)"""
+        with self._lock:
+            changed = self._version is not None and self._version != version
+            self._version = version
+            self._version_checked_at = time.monotonic()
+        return changed
+
+    def corpus_version(self) -> str:
+        if self._version_stale():
+            max_id, count = fetch_corpus_version(self.corpus_table)
+            version = f"{max_id}:{count}"
+            self._ensure_schema()
+            if self._set_version(version):
+                self.invalidate(version)
+        return self._version
+
+    def _ensure_schema(self) -> None:
+        if self._schema_ready:
+            return
+        with pg_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(_SCHEMA_SQL.format(table=self.table_name))
+            conn.commit()
+        self._schema_ready = True
+
+    def invalidate(self, version: Optional[str] = None) -> int:
+        """현재 코퍼스 버전(version)이 아닌 답변 삭제. version이 None이면 전체 삭제"""
+        with pg_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(*self._invalidate_sql(version))
+                deleted = cur.rowcount
+            conn.commit()
+        self._record_invalidated(deleted, version)
+        return deleted
+
+    def _invalidate_sql(self, version: Optional[str]):
+        if version is None:
+            return f"DELETE FROM {self.table_name}", ()
+        return f"DELETE FROM {self.table_name} WHERE corpus_version <> %s", (version,)
+
+    def _record_invalidated(self, deleted: int, version: Optional[str]) -> None:
+        with self._lock:
+            self.stats.invalidated += max(deleted, 0)
+        print(f"• [AnswerCache] invalidated {deleted} answers (corpus_version={version})")
+
+    # --- 조회 / 저장 ---
+
+    def _lookup_sql(self) -> str:
+        # 가장 가까운 1개를 찾고 임계값 이내일 때만 반환
+        # 조회는 분류와 병렬로 실행되므로 hit 집계는 답변을 실제로 사용할 때(record_hit) 한다
+        return f"""
+            SELECT id, question, answer, tokens, 1 - distance AS similarity
+            FROM (
+                SELECT id, question, answer, tokens, embedding <=> %(q)s::vector AS distance
+                FROM {self.table_name}
+                WHERE corpus_version = %(version)s
+                ORDER BY embedding <=> %(q)s::vector
+                LIMIT 1
+            ) nearest
+            WHERE distance <= %(max_distance)s;
+        """
+
+    def _lookup_params(self, query_vector: Sequence[float], version: str, threshold: Optional[float]) -> Dict[str, Any]:
+        threshold = self.threshold if threshold is None else threshold
+        return {
+            "q": np.asarray(query_vector, dtype=np.float32),
+            "version": version,
+            "max_distance": 1.0 - threshold,
+        }
+
+    def lookup(
+        self, query_vector: Sequence[float], threshold: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Returns:
+            찾으면 {"id", "question", "answer", "tokens", "similarity"}, 아니면 None
+        """
+        version = self.corpus_version()
+        with pg_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(self._lookup_sql(), self._lookup_params(query_vector, version, threshold))
+                row = cur.fetchone()
+        return self._parse_lookup(row)
+
+    async def alookup(
+        self, query_vector: Sequence[float], threshold: Optional[float] = None
+    ) -> Optional[Dict[str, Any]]:
+        """lookup의 비동기 버전 (psycopg3 비동기 풀)"""
+        version = await self._acorpus_version()
+        pool = await get_async_binary_pool()
+        async with pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(self._lookup_sql(), self._lookup_params(query_vector, version, threshold))
+                row = await cur.fetchone()
+        return self._parse_lookup(row)
+
+    async def _acorpus_version(self) -> str:
+        if not self._version_stale():
+            return self._version
+        # 버전 확인(+무효화)은 version_ttl마다 한 번뿐이므로 동기 경로를 스레드에서 실행
+        return await asyncio.to_thread(self.corpus_version)
+
+    @staticmethod
+    def _parse_lookup(row) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        entry_id, question, answer, tokens, similarity = row
+        if isinstance(answer, str):
+            answer = json.loads(answer)
+        return {
+            "id": entry_id,
+            "question": question,
+            "answer": answer,
+            "tokens": int(tokens or 0),
+            "similarity": round(float(similarity), 4),
+        }
+
+    # --- hit / miss 집계 ---
+
+    def _hit_sql(self) -> str:
+        return f"UPDATE {self.table_name} SET hits = hits + 1, last_hit_at = now() WHERE id = %s"
+
+    def _count_hit(self, hit: Dict[str, Any]) -> None:
+        with self._lock:
+            self.stats.hits += 1
+            self.stats.saved_tokens += int(hit.get("tokens") or 0)
+
+    def record_hit(self, hit: Dict[str, Any]) -> None:
+        """lookup 결과를 답변으로 사용했을 때 호출 (프로세스 카운터 + 테이블 hits / last_hit_at)"""
+        self._count_hit(hit)
+        with pg_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(self._hit_sql(), (hit["id"],))
+            conn.commit()
+
+    async def arecord_hit(self, hit: Dict[str, Any]) -> None:
+        """record_hit의 비동기 버전"""
+        self._count_hit(hit)
+        pool = await get_async_binary_pool()
+        async with pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(self._hit_sql(), (hit["id"],))
+
+    def record_miss(self) -> None:
+        """캐시 대상 턴(medical, 후속 질문 아님)에서 사용할 답변이 없었을 때 호출"""
+        with self._lock:
+            self.stats.misses += 1
+
+    def _store_sql(self) -> str:
+        return f"""
+            INSERT INTO {self.table_name} (question, embedding, answer, corpus_version, tokens)
+            VALUES (%s, %s::vector, %s::jsonb, %s, %s)
+        """
+
+    def _store_params(self, question: str, query_vector: Sequence[float], answer: Dict[str, Any], tokens: int, version: str):
+        return (
+            question,
+            np.asarray(query_vector, dtype=np.float32),
+            json.dumps(answer, ensure_ascii=False, default=str),
+            version,
+            int(tokens),
+        )
+
+    def store(self, question: str, query_vector: Sequence[float], answer: Dict[str, Any], tokens: int = 0) -> None:
+        version = self.corpus_version()
+        with pg_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(self._store_sql(), self._store_params(question, query_vector, answer, tokens, version))
+            conn.commit()
+        with self._lock:
+            self.stats.stores += 1
+
+    async def astore(self, question: str, query_vector: Sequence[float], answer: Dict[str, Any], tokens: int = 0) -> None:
+        """store의 비동기 버전"""
+        version = await self._acorpus_version()
+        pool = await get_async_binary_pool()
+        async with pool.connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(self._store_sql(), self._store_params(question, query_vector, answer, tokens, version))
+        with self._lock:
+            self.stats.stores += 1
+
+    # --- 모니터링 ---
+
+    def snapshot(self) -> Dict[str, float]:
+        """모니터링/로그용 카운터 (프로세스 단위)"""
+        data = asdict(self.stats)
+        data["hit_rate"] = round(self.stats.hit_rate, 4)
+        data["threshold"] = self.threshold
+        data["corpus_version"] = self._version
+        return data
+
+    def table_stats(self) -> Dict[str, Any]:
+        """answer_cache 테이블 누적 통계 (전체 워커 합산): 저장 답변 수, 총 hit, 절약 토큰"""
+        self._ensure_schema()
+        with pg_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"SELECT count(*), COALESCE(sum(hits), 0), COALESCE(sum(hits::bigint * tokens), 0) "
+                    f"FROM {self.table_name}"
+                )
+                entries, hits, saved_tokens = cur.fetchone()
+        return {"entries": int(entries), "hits": int(hits), "saved_tokens": int(saved_tokens)}
+
+
+_answer_cache: Optional[AnswerCache] = None
+_answer_cache_lock = threading.Lock()
+
+
+def answer_cache_enabled() -> bool:
+    return os.getenv("ANSWER_CACHE", "false").lower() in ("1", "true", "yes")
+
+
+def get_answer_cache() -> AnswerCache:
+    """
+    환경변수 기반 프로세스 공용 답변 캐시
+    - ANSWER_CACHE: 그래프에서 사용 여부 (기본 false)
+    - ANSWER_CACHE_THRESHOLD: hit로 볼 최소 코사인 유사도 (기본 0.95)
+    - ANSWER_CACHE_VERSION_TTL: medical 코퍼스 버전 확인 주기(초, 기본 60)
+    """
+    global _answer_cache
+    if _answer_cache is None:
+        with _answer_cache_lock:
+            if _answer_cache is None:
+                _answer_cache = AnswerCache(
+                    threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")),
+                    version_ttl=float(os.getenv("ANSWER_CACHE_VERSION_TTL", "60")),
+                )
+    return _answer_cache
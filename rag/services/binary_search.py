@@ -0,0 +1,166 @@
+'''
+목적: 쿼리 벡터를 바이너리 파라미터로 한 번만 전달하는 kNN 검색 경로
+역할:
+psycopg3 + pgvector 바이너리 어댑터(numpy float32 → vector binary)로 파라미터 바인딩
+거리 값을 계산 컬럼(distance)으로 한 번만 계산하고 ORDER BY에서 재사용
+1536차원 벡터를 문자열("[0.1,0.2,...]")로 두 번 보내고 서버에서 두 번 파싱하던 비용 제거
+'''
+import asyncio
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from dotenv import load_dotenv
+from pgvector.psycopg import register_vector, register_vector_async
+from psycopg import sql
+from psycopg_pool import AsyncConnectionPool, ConnectionPool
+
+try:
+    from .index_manager import OPCLASSES, apply_search_params
+except ImportError:
+    from rag.services.index_manager import OPCLASSES, apply_search_params
+
+load_dotenv()
+
+
+def to_query_vector(vector: Sequence[float]) -> np.ndarray:
+    """pgvector 바이너리 포맷(float32)에 맞춘 numpy 배열로 변환"""
+    return np.asarray(vector, dtype=np.float32)
+
+
+def _conninfo() -> str:
+    return (
+        f"host={os.getenv('POSTGRES_HOST', 'localhost')} "
+        f"port={os.getenv('POSTGRES_PORT', '5432')} "
+        f"dbname={os.getenv('POSTGRES_DB', 'sknproject4')} "
+        f"user={os.getenv('POSTGRES_USER', 'root')} "
+        f"password={os.getenv('POSTGRES_PASSWORD', 'root1234')}"
+    )
+
+
+_binary_pool: Optional[ConnectionPool] = None
+_binary_pool_lock = threading.Lock()
+
+
+def get_binary_pool() -> ConnectionPool:
+    """
+    vector 타입(텍스트/바이너리 어댑터)이 등록된 psycopg3 커넥션 풀 (CustomVectorStore 동기 kNN)
+    접속 정보는 pg_pool과 같은 POSTGRES_*, 크기는 별도 PG_BINARY_POOL_MIN / PG_BINARY_POOL_MAX
+    (프로세스 전체 커넥션 예산은 pg_pool 모듈 docstring 참고)
+    """
+    global _binary_pool
+    if _binary_pool is None:
+        with _binary_pool_lock:
+            if _binary_pool is None:
+                _binary_pool = ConnectionPool(
+                    _conninfo(),
+                    min_size=int(os.getenv("PG_BINARY_POOL_MIN", "1")),
+                    max_size=int(os.getenv("PG_BINARY_POOL_MAX", "4")),
+                    max_lifetime=float(os.getenv("PG_POOL_MAX_LIFETIME", "1800")),
+                    configure=register_vector,
+                    check=ConnectionPool.check_connection,
+                    open=True,
+                )
+    return _binary_pool
+
+
+# AsyncConnectionPool은 생성된 이벤트 루프에서만 사용할 수 있으므로 루프별로 보관
+# (동시에 들어온 첫 요청들이 같은 풀을 기다리도록 open 작업(Task)을 저장)
+_async_pools: Dict[asyncio.AbstractEventLoop, "asyncio.Task[AsyncConnectionPool]"] = {}
+
+
+async def _open_async_pool() -> AsyncConnectionPool:
+    async def _configure(conn):
+        await register_vector_async(conn)
+
+    pool = AsyncConnectionPool(
+        _conninfo(),
+        min_size=int(os.getenv("PG_ASYNC_POOL_MIN", "1")),
+        max_size=int(os.getenv("PG_ASYNC_POOL_MAX", "10")),
+        max_lifetime=float(os.getenv("PG_POOL_MAX_LIFETIME", "1800")),
+        configure=_configure,
+        check=AsyncConnectionPool.check_connection,
+        open=False,
+    )
+    await pool.open()
+    return pool
+
+
+async def get_async_binary_pool() -> AsyncConnectionPool:
+    """
+    get_binary_pool의 비동기 버전 (ASGI / graph.ainvoke 경로)
+    uvicorn 등 장수명 루프에서는 워커당 1개를 재사용한다. async_to_sync(WSGI)처럼 요청마다 새 루프가
+    생기면 루프별로 풀을 만들며, 요청 끝에서 aclose_async_binary_pool로 닫는다 (chat.services).
+    """
+    loop = asyncio.get_running_loop()
+    task = _async_pools.get(loop)
+    if task is None or (task.done() and task.exception() is not None):
+        for stale in [l for l in _async_pools if l.is_closed()]:
+            del _async_pools[stale]
+        task = _async_pools[loop] = loop.create_task(_open_async_pool())
+    return await task
+
+
+async def aclose_async_binary_pool() -> None:
+    """
+    현재 루프의 비동기 풀을 닫고 제거 (요청마다 새 루프에서 실행되는 경우 요청 끝에서 호출)
+    닫힌 루프에서는 풀을 닫을 수 없으므로 루프가 끝나기 전에 호출해야 커넥션이 남지 않는다.
+    """
+    task = _async_pools.pop(asyncio.get_running_loop(), None)
+    if task is None:
+        return
+    try:
+        pool = await task
+    except Exception:
+        return
+    await pool.close()
+
+
+@dataclass(slots=True)
+class BinaryVectorSearch:
+    table_name: str = "medical"
+    distance: str = "cosine"
+
+    def _knn_sql(self, with_embedding: bool) -> sql.Composed:
+        operator = OPCLASSES[self.distance][1]
+        # %(q)b: 바이너리 포맷 강제, 쿼리 안에서 한 번만 바인딩
+        # ORDER BY distance는 select-list 표현식을 그대로 참조하므로 ANN 인덱스 사용 가능
+        return sql.SQL("""
+            SELECT
+                id,
+                metadata->>'c_id' AS c_id,
+                content,
+                metadata,
+                embedding {op} %(q)b AS distance
+                {embedding_col}
+            FROM {table}
+            WHERE embedding IS NOT NULL
+            ORDER BY distance
+            LIMIT %(k)s
+        """).format(
+            op=sql.SQL(operator),
+            embedding_col=sql.SQL(", embedding") if with_embedding else sql.SQL(""),
+            table=sql.Identifier(self.table_name),
+        )
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        k: int = 5,
+        with_embedding: bool = False,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns:
+            [{"id", "c_id", "content", "metadata", "distance"(, "embedding": np.ndarray)}]
+        """
+        params = {"q": to_query_vector(query_vector), "k": k}
+        with get_binary_pool().connection() as conn:
+            with conn.cursor(binary=True) as cur:
+                apply_search_params(cur, ef_search=ef_search, probes=probes)
+                cur.execute(self._knn_sql(with_embedding), params, prepare=True)
+                columns = [desc.name for desc in cur.description]
+                return [dict(zip(columns, row)) for row in cur.fetchall()]
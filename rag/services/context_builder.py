@@ -0,0 +1,120 @@
+'''
+목적: 검색 chunk → LLM 프롬프트용 컨텍스트 조립 (토큰 예산)
+역할:
+같은 c_id의 chunk는 하나의 [문서 n]으로 합치고, 다른 chunk에 포함되는 중복 chunk는 제거
+유사도 순으로 토큰 예산(tiktoken) 안에 담고, 남은 예산이 min_chunk_tokens 이상이면 다음 문서를 잘라서 포함
+[문서 n] 번호와 sources 순서를 일치시켜 답변의 인용 번호([n])가 올바른 출처를 가리키도록 함
+모델별 예산: CONTEXT_TOKEN_BUDGET_<MODEL> > CONTEXT_TOKEN_BUDGET > DEFAULT_CONTEXT_BUDGET (0이면 제한 없음)
+'''
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+try:
+    from .tokens import count_tokens, truncate_tokens
+except ImportError:
+    try:
+        from rag.services.tokens import count_tokens, truncate_tokens
+    except ImportError:
+        from tokens import count_tokens, truncate_tokens
+
+load_dotenv()
+
+DEFAULT_CONTEXT_BUDGET = 3000
+
+
+def context_budget(model: str) -> int:
+    """
+    모델별 컨텍스트 토큰 예산
+    예) CONTEXT_TOKEN_BUDGET_GPT_5_NANO=4000, CONTEXT_TOKEN_BUDGET=3000
+    """
+    key = "CONTEXT_TOKEN_BUDGET_" + re.sub(r"[^0-9A-Za-z]+", "_", model).upper()
+    value = os.getenv(key) or os.getenv("CONTEXT_TOKEN_BUDGET")
+    return int(value) if value else DEFAULT_CONTEXT_BUDGET
+
+
+@dataclass
+class BuiltContext:
+    context: str
+    sources: List[str]
+    tokens: int = 0
+    # 합치거나(같은 c_id) 중복으로 제거된 chunk 수 / 예산 초과로 빠진 문서 수
+    merged: int = 0
+    dropped: int = 0
+    truncated: bool = False
+    documents: List[Dict[str, Any]] = field(default_factory=list)
+
+
+def _group_by_c_id(docs: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    retrieved_docs({"content", "metadata", "score"}) → (문서 단위 그룹, 합쳐진 chunk 수)
+    그룹은 첫 등장 순서(= 유사도 순), 같은 c_id의 chunk는 이어 붙이되 이미 담긴 내용에 포함되는 chunk는 버림
+    """
+    groups: Dict[str, Dict[str, Any]] = {}
+    merged = 0
+    for i, doc in enumerate(docs, 1):
+        c_id = (doc.get("metadata") or {}).get("c_id") or f"문서_{i}"
+        content = (doc.get("content") or "").strip()
+        group = groups.get(c_id)
+        if group is None:
+            groups[c_id] = {"c_id": c_id, "score": doc.get("score", 0.0), "parts": [content]}
+            continue
+        merged += 1
+        if any(content in part for part in group["parts"]):
+            continue
+        # 새 chunk가 기존 chunk를 포함하면 교체
+        group["parts"] = [part for part in group["parts"] if part not in content] + [content]
+    result = list(groups.values())
+    for group in result:
+        group["content"] = "\n".join(group["parts"])
+    return result, merged
+
+
+def build_context(docs: List[Dict[str, Any]], budget: Optional[int] = DEFAULT_CONTEXT_BUDGET, min_chunk_tokens: int = 64) -> BuiltContext:
+    """
+    Args:
+        docs: retrieved_docs (유사도 내림차순)
+        budget: 컨텍스트 토큰 예산 (None/0이면 제한 없음)
+        min_chunk_tokens: 예산이 이만큼 남아 있을 때만 넘치는 문서를 잘라서 포함
+
+    Returns:
+        BuiltContext (context 문자열, [문서 n] 순서와 같은 sources)
+    """
+    groups, merged = _group_by_c_id(docs)
+    parts: List[str] = []
+    sources: List[str] = []
+    documents: List[Dict[str, Any]] = []
+    used = 0
+    truncated = False
+
+    for group in groups:
+        n = len(parts) + 1
+        header = f"[문서 {n}] (유사도: {group['score']:.2f})\n"
+        block = header + group["content"]
+        tokens = count_tokens(block)
+        if budget and used + tokens > budget:
+            remaining = budget - used - count_tokens(header)
+            if remaining < min_chunk_tokens:
+                break
+            block = header + truncate_tokens(group["content"], remaining)
+            tokens = count_tokens(block)
+            truncated = True
+        parts.append(block)
+        sources.append(group["c_id"])
+        documents.append({"c_id": group["c_id"], "score": group["score"], "tokens": tokens})
+        used += tokens
+        if truncated:
+            break
+
+    return BuiltContext(
+        context="\n\n".join(parts),
+        sources=sources,
+        tokens=used,
+        merged=merged,
+        dropped=len(groups) - len(parts),
+        truncated=truncated,
+        documents=documents,
+    )
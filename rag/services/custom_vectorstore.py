@@ -3,13 +3,20 @@
 sknproject4 데이터베이스의 medical 테이블을 사용하는 커스텀 vectorstore
 """
 import os
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from dotenv import load_dotenv
-import psycopg2
 from langchain_core.documents import Document
-from langchain_openai import OpenAIEmbeddings
 import numpy as np
 
+try:
+    from .binary_search import BinaryVectorSearch
+    from .embedder import get_embedding
+    from .mmr import maximal_marginal_relevance
+except ImportError:
+    from rag.services.binary_search import BinaryVectorSearch
+    from rag.services.embedder import get_embedding
+    from rag.services.mmr import maximal_marginal_relevance
+
 load_dotenv()
 
 
@@ -25,43 +32,37 @@ class CustomVectorStore:
     """
 
     def __init__(self):
-        # 데이터베이스 연결 정보
-        self.db_user = os.getenv("POSTGRES_USER", "root")
-        self.db_password = os.getenv("POSTGRES_PASSWORD", "root1234")
-        self.db_host = os.getenv("POSTGRES_HOST", "localhost")
-        self.db_port = os.getenv("POSTGRES_PORT", "5432")
-        self.db_name = os.getenv("POSTGRES_DB", "sknproject4")
-
-        # 연결 문자열
-        self.connection_string = f"postgresql://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
-
-        # OpenAI 임베딩 모델
-        self.embeddings = OpenAIEmbeddings(
-            model="text-embedding-3-small",
-            openai_api_key=os.getenv("OPENAI_API_KEY")
-        )
+        # OpenAI 임베딩 모델 (쿼리 임베딩은 embedder 캐시 경유, DB 연결은 binary_search 풀 사용)
+        self.embedding_model = "text-embedding-3-small"
 
         # 거리 메트릭 (cosine distance)
         self.distance_metric = os.getenv("PGVECTOR_DISTANCE", "cosine")
 
-    def _get_connection(self):
-        """데이터베이스 연결 생성"""
-        return psycopg2.connect(self.connection_string)
-
-    def _cosine_distance_sql(self) -> str:
-        """코사인 거리 계산 SQL"""
-        return "1 - (embedding <=> %s::vector)"
+        # 바이너리 파라미터 바인딩 kNN 검색 (psycopg3 + pgvector binary adapter)
+        self.binary_search = BinaryVectorSearch(
+            table_name="medical",
+            distance="cosine" if self.distance_metric == "cosine" else "l2",
+        )
 
-    def _euclidean_distance_sql(self) -> str:
-        """유클리드 거리 계산 SQL"""
-        return "embedding <-> %s::vector"
+    def _embed_query(self, query: str) -> List[float]:
+        """쿼리 임베딩 (embedding cache 경유, 같은 쿼리는 한 번만 API 호출)"""
+        return get_embedding(query, model=self.embedding_model)
 
-    def _get_distance_sql(self) -> str:
-        """설정된 거리 메트릭에 따른 SQL 반환"""
+    def _similarity(self, distance) -> Optional[float]:
+        """거리 → 유사도 (cosine: 1 - distance, 그 외: 거리 값 그대로)"""
+        if distance is None:
+            return None
         if self.distance_metric == "cosine":
-            return self._cosine_distance_sql()
-        else:
-            return self._euclidean_distance_sql()
+            return 1.0 - float(distance)
+        return float(distance)
+
+    def _search_rows(self, query: str, k: int, with_embedding: bool = False) -> List[dict]:
+        """
+        쿼리 벡터를 바이너리로 한 번만 바인딩해 kNN 검색
+        (문자열 직렬화 + SELECT/ORDER BY 이중 파싱 제거)
+        """
+        query_embedding = self._embed_query(query)
+        return self.binary_search.search(query_embedding, k=k, with_embedding=with_embedding)
 
     def similarity_search(self, query: str, k: int = 5) -> List[Document]:
         """
@@ -74,42 +75,18 @@ class CustomVectorStore:
         Returns:
             Document 리스트
         """
-        # 쿼리 임베딩 생성
-        query_embedding = self.embeddings.embed_query(query)
-
-        # 벡터를 PostgreSQL 포맷으로 변환
-        embedding_str = "[" + ",".join(map(str, query_embedding)) + "]"
-
-        # 유사도 검색 SQL
-        distance_sql = self._get_distance_sql()
-        sql = f"""
-            SELECT
-                id,
-                metadata->>'c_id' as c_id,
-                content,
-                {distance_sql} as similarity
-            FROM medical
-            ORDER BY embedding <=> %s::vector
-            LIMIT %s
-        """
-
-        with self._get_connection() as conn:
-            with conn.cursor() as cur:
-                # distance_sql에 1개, ORDER BY에 1개, LIMIT에 1개 = 총 3개 파라미터
-                cur.execute(sql, (embedding_str, embedding_str, k))
-                results = cur.fetchall()
+        rows = self._search_rows(query, k)
 
         # Document 객체로 변환
         documents = []
-        for row in results:
-            doc_id, c_id, content, similarity = row
+        for row in rows:
             documents.append(
                 Document(
-                    page_content=content,
+                    page_content=row["content"],
                     metadata={
-                        "id": doc_id,
-                        "c_id": c_id,
-                        "similarity": float(similarity) if similarity else None
+                        "id": row["id"],
+                        "c_id": row["c_id"],
+                        "similarity": self._similarity(row["distance"]),
                     }
                 )
             )
@@ -127,43 +104,19 @@ class CustomVectorStore:
         Returns:
             (Document, score) 튜플 리스트
         """
-        # 쿼리 임베딩 생성
-        query_embedding = self.embeddings.embed_query(query)
-
-        # 벡터를 PostgreSQL 포맷으로 변환
-        embedding_str = "[" + ",".join(map(str, query_embedding)) + "]"
-
-        # 유사도 검색 SQL
-        distance_sql = self._get_distance_sql()
-        sql = f"""
-            SELECT
-                id,
-                metadata->>'c_id' as c_id,
-                content,
-                {distance_sql} as similarity
-            FROM medical
-            ORDER BY embedding <=> %s::vector
-            LIMIT %s
-        """
-
-        with self._get_connection() as conn:
-            with conn.cursor() as cur:
-                # distance_sql에 1개, ORDER BY에 1개, LIMIT에 1개 = 총 3개 파라미터
-                cur.execute(sql, (embedding_str, embedding_str, k))
-                results = cur.fetchall()
+        rows = self._search_rows(query, k)
 
         # Document 객체와 점수로 변환
         documents_with_scores = []
-        for row in results:
-            doc_id, c_id, content, similarity = row
+        for row in rows:
             doc = Document(
-                page_content=content,
+                page_content=row["content"],
                 metadata={
-                    "id": doc_id,
-                    "c_id": c_id
+                    "id": row["id"],
+                    "c_id": row["c_id"]
                 }
             )
-            score = float(similarity) if similarity else 0.0
+            score = self._similarity(row["distance"]) or 0.0
             documents_with_scores.append((doc, score))
 
         return documents_with_scores
@@ -188,57 +141,36 @@ class CustomVectorStore:
         Returns:
             Document 리스트
         """
-        # 초기 후보 문서 가져오기
-        candidates = self.similarity_search_with_score(query, k=fetch_k)
+        # 초기 후보 문서 + DB에 저장된 임베딩을 한 번에 조회 (후보 재임베딩 없음)
+        rows = self._search_rows(query, fetch_k, with_embedding=True)
 
-        if not candidates:
+        if not rows:
             return []
 
-        # 쿼리 임베딩
-        query_embedding = np.array(self.embeddings.embed_query(query))
+        # 쿼리 임베딩 (embedding cache 적중)
+        query_embedding = self._embed_query(query)
 
-        # 선택된 문서와 임베딩
-        selected_docs = []
-        selected_embeddings = []
-
-        # 후보 문서와 임베딩
-        candidate_docs = [doc for doc, _ in candidates]
-        candidate_texts = [doc.page_content for doc in candidate_docs]
-        candidate_embeddings = self.embeddings.embed_documents(candidate_texts)
-
-        while len(selected_docs) < k and candidate_docs:
-            best_score = -float('inf')
-            best_idx = 0
+        # 정규화된 후보 행렬 기반 벡터화 MMR
+        selected = maximal_marginal_relevance(
+            query_embedding,
+            np.stack([row["embedding"] for row in rows]),
+            k=k,
+            lambda_mult=lambda_mult,
+        )
 
-            for i, (doc, emb) in enumerate(zip(candidate_docs, candidate_embeddings)):
-                # 쿼리와의 유사도
-                query_sim = np.dot(query_embedding, emb) / (
-                    np.linalg.norm(query_embedding) * np.linalg.norm(emb)
+        selected_docs = []
+        for idx in selected:
+            row = rows[idx]
+            selected_docs.append(
+                Document(
+                    page_content=row["content"],
+                    metadata={
+                        "id": row["id"],
+                        "c_id": row["c_id"],
+                        "similarity": self._similarity(row["distance"]),
+                    }
                 )
-
-                # 이미 선택된 문서들과의 최대 유사도
-                if selected_embeddings:
-                    max_sim = max(
-                        np.dot(emb, sel_emb) / (np.linalg.norm(emb) * np.linalg.norm(sel_emb))
-                        for sel_emb in selected_embeddings
-                    )
-                else:
-                    max_sim = 0
-
-                # MMR 점수 계산
-                mmr_score = lambda_mult * query_sim - (1 - lambda_mult) * max_sim
-
-                if mmr_score > best_score:
-                    best_score = mmr_score
-                    best_idx = i
-
-            # 최고 점수 문서 선택
-            selected_docs.append(candidate_docs[best_idx])
-            selected_embeddings.append(candidate_embeddings[best_idx])
-
-            # 후보에서 제거
-            candidate_docs.pop(best_idx)
-            candidate_embeddings.pop(best_idx)
+            )
 
         return selected_docs
 
@@ -5,14 +5,33 @@
 텍스트를 벡터로 변환하는 기능 제공
 다른 코드에서 임베딩 모델을 쉽게 호출할 수 있게 해주는 "도구"
 '''
+import asyncio
 import os
+import threading
+from typing import Dict, List, Optional, Sequence
 from dotenv import load_dotenv
 from langchain_openai import OpenAIEmbeddings
-from openai import OpenAI
-import psycopg2
-from pgvector.psycopg2 import register_vector
+from openai import AsyncOpenAI, OpenAI
+
+try:
+    from .embedding_cache import cache_key, get_embedding_cache
+    from .pg_pool import pg_connection
+except ImportError:
+    try:
+        from rag.services.embedding_cache import cache_key, get_embedding_cache
+        from rag.services.pg_pool import pg_connection
+    except ImportError:
+        from embedding_cache import cache_key, get_embedding_cache
+        from pg_pool import pg_connection
+
 load_dotenv()
 
+# OpenAI 클라이언트는 내부 HTTP 커넥션 풀을 가지므로 프로세스당 1개만 생성해 재사용
+_client: Optional[OpenAI] = None
+_client_lock = threading.Lock()
+# AsyncOpenAI는 생성된 이벤트 루프에 묶이므로 루프별로 1개씩 보관
+_async_clients: Dict[asyncio.AbstractEventLoop, AsyncOpenAI] = {}
+
 
 
 def get_embedding_model_openai(
@@ -29,34 +48,126 @@ def get_embedding_model_openai(
 
 # pgvector 연동
 def get_pg_conn():
-    conn = psycopg2.connect(
-        host=os.getenv("POSTGRES_HOST"),
-        port=os.getenv("POSTGRES_PORT"),
-        dbname=os.getenv("POSTGRES_DB"),
-        user=os.getenv("POSTGRES_USER"),
-        password=os.getenv("POSTGRES_PASSWORD"),
-    )
-    # 연결된 커넥션에 vector 타입 등록
-    register_vector(conn)
-    return conn
+    """
+    공용 풀(pg_pool)에서 vector 타입이 등록된 커넥션 대여
+    with get_pg_conn() as conn: 형태로 사용 (정상 종료 시 commit 후 반납, 요청마다 새로 연결하지 않음)
+    """
+    return pg_connection()
+
+
+def _get_openai_client() -> OpenAI:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
 
+def _get_async_openai_client() -> AsyncOpenAI:
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        for stale in [l for l in _async_clients if l.is_closed()]:
+            del _async_clients[stale]
+        client = _async_clients[loop] = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return client
 
-def get_embedding(text: str):
+
+async def aclose_async_openai_client() -> None:
+    """현재 루프의 AsyncOpenAI 클라이언트(httpx 커넥션)를 닫고 제거"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+def _default_model() -> str:
+    # 환경변수에서 임베딩 모델명을 가져오고, 없으면 기본값("text-embedding-3-small")을 사용합니다.
+    return os.getenv("EMBED_MODEL", "text-embedding-3-small")
+
+
+def get_embedding(text: str, model: Optional[str] = None):
     """
     입력된 텍스트를 벡터로 변환하여 반환합니다.
     OpenAI 임베딩 모델과 .env 설정을 활용합니다.
+    (model, 정규화된 텍스트) 기준으로 캐시되어 같은 질문은 한 번만 임베딩합니다.
     """
-    # 환경변수에서 키와 모델 이름을 불러옴 (기본값 지정)
-    openai_api_key = os.getenv("OPENAI_API_KEY")
-    # 환경변수에서 임베딩 모델명을 가져오고, 없으면 기본값("text-embedding-3-small")을 사용합니다.
-    embed_model = os.getenv("EMBED_MODEL", "text-embedding-3-small")
+    embed_model = model or _default_model()
+    cache = get_embedding_cache()
+
+    cached = cache.get(embed_model, text)
+    if cached is not None:
+        return cached
 
-    # OpenAI 클라이언트 생성
-    client = OpenAI(api_key=openai_api_key)
     # 임베딩 생성
-    response = client.embeddings.create(
+    response = _get_openai_client().embeddings.create(
+        model=embed_model,
+        input=text,
+    )
+    vector = response.data[0].embedding
+    cache.set(embed_model, text, vector)
+    return vector
+
+
+async def aget_embedding(text: str, model: Optional[str] = None):
+    """get_embedding의 비동기 버전 (AsyncOpenAI, 같은 캐시 사용)"""
+    embed_model = model or _default_model()
+    cache = get_embedding_cache()
+
+    cached = cache.get(embed_model, text)
+    if cached is not None:
+        return cached
+
+    response = await _get_async_openai_client().embeddings.create(
         model=embed_model,
         input=text,
     )
     vector = response.data[0].embedding
+    cache.set(embed_model, text, vector)
     return vector
+
+
+def get_embeddings(texts: Sequence[str], model: Optional[str] = None) -> List[List[float]]:
+    """
+    여러 텍스트를 한 번의 임베딩 API 호출로 변환합니다. (입력 순서 유지)
+    캐시에 있는 텍스트는 제외하고, 캐시 키(정규화된 텍스트)가 같은 텍스트는 한 번만 요청합니다.
+    """
+    embed_model = model or _default_model()
+    cache = get_embedding_cache()
+
+    vectors = cache.get_many(embed_model, texts)
+    # 캐시 키 → 대표 원문 (공백/유니코드 정규화만 다른 입력은 같은 벡터를 공유)
+    missing: Dict[str, str] = {}
+    for text in texts:
+        if text not in vectors:
+            missing.setdefault(cache_key(embed_model, text), text)
+    if missing:
+        response = _get_openai_client().embeddings.create(
+            model=embed_model,
+            input=list(missing.values()),
+        )
+        fetched: Dict[str, List[float]] = {}
+        for (key, text), item in zip(missing.items(), sorted(response.data, key=lambda d: d.index)):
+            fetched[key] = item.embedding
+            cache.set(embed_model, text, item.embedding)
+        for text in texts:
+            if text not in vectors:
+                vectors[text] = fetched[cache_key(embed_model, text)]
+    return [vectors[text] for text in texts]
+
+
+def warm_embedding_cache(texts: Sequence[str], model: Optional[str] = None) -> int:
+    """
+    자주 쓰이는 질문(빠른 질문 템플릿 등)을 미리 임베딩해 캐시에 적재합니다.
+    영구 캐시가 켜져 있으면 재시작 후에도 다시 비용을 내지 않습니다.
+
+    Returns:
+        새로 임베딩한 텍스트 수
+    """
+    texts = list(dict.fromkeys(text for text in texts if text and text.strip()))
+    if not texts:
+        return 0
+    stats = get_embedding_cache().stats
+    misses_before = stats.misses
+    get_embeddings(texts, model=model)
+    return stats.misses - misses_before
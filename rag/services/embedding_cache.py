@@ -0,0 +1,249 @@
+'''
+목적: 쿼리 임베딩 캐시 (같은 질문을 다시 임베딩하지 않도록)
+역할:
+(model, 정규화된 텍스트) 키로 벡터 저장
+1단계: 프로세스 내 LRU (OrderedDict)
+2단계: 선택적 SQLite 파일 캐시 (재시작/다중 워커 간 공유)
+TTL, 크기 기반 eviction, hit/miss 카운터 제공
+'''
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+def normalize_text(text: str) -> str:
+    """
+    캐시 키용 텍스트 정규화
+    - 유니코드 NFC 정규화 (한글 자모 분리 입력 통일)
+    - 연속 공백 축소, 앞뒤 공백 제거
+    대소문자는 임베딩 결과에 영향을 주므로(EGFR vs egfr) 유지한다.
+    """
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def cache_key(model: str, text: str) -> str:
+    return hashlib.sha1(f"{model}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    memory_hits: int = 0
+    disk_hits: int = 0
+    evictions: int = 0
+    expired: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class _SQLiteTier:
+    """SQLite 기반 영구 캐시 (float32 BLOB 저장)"""
+
+    def __init__(self, path: str, max_rows: int):
+        self.path = path
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._writes = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_embedding_cache_accessed ON embedding_cache (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, ttl: Optional[float]) -> Tuple[Optional[List[float]], float, bool]:
+        """(vector, created_at, expired) 반환"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT vector, created_at FROM embedding_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None, 0.0, False
+            blob, created_at = row
+            now = time.time()
+            if ttl and now - created_at > ttl:
+                self._conn.execute("DELETE FROM embedding_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None, created_at, True
+            self._conn.execute("UPDATE embedding_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector.tolist(), created_at, False
+
+    def set(self, key: str, model: str, vector: Sequence[float]) -> int:
+        """저장 후 eviction된 행 수 반환"""
+        now = time.time()
+        blob = array("f", vector).tobytes()
+        evicted = 0
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO embedding_cache (key, model, vector, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, blob, now, now),
+            )
+            self._writes += 1
+            # 매 쓰기마다 COUNT(*)를 하지 않도록 일정 간격으로만 크기 점검
+            if self.max_rows and self._writes % 100 == 0:
+                count = self._conn.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+                if count > self.max_rows:
+                    cur = self._conn.execute(
+                        "DELETE FROM embedding_cache WHERE key IN ("
+                        "SELECT key FROM embedding_cache ORDER BY accessed_at LIMIT ?)",
+                        (count - self.max_rows,),
+                    )
+                    evicted = cur.rowcount
+            self._conn.commit()
+        return evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embedding_cache")
+            self._conn.commit()
+
+
+class EmbeddingCache:
+    """
+    2단계(LRU + SQLite) 임베딩 캐시
+
+    Args:
+        max_size: 메모리 LRU 최대 항목 수
+        ttl: 항목 유효 시간(초). None/0이면 만료 없음
+        persistent_path: SQLite 파일 경로. None이면 메모리만 사용
+        persistent_max_rows: SQLite 최대 행 수 (초과 시 오래 안 쓰인 순으로 삭제)
+    """
+
+    def __init__(
+        self,
+        max_size: int = 2048,
+        ttl: Optional[float] = None,
+        persistent_path: Optional[str] = None,
+        persistent_max_rows: int = 100_000,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl or None
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self._disk = _SQLiteTier(persistent_path, persistent_max_rows) if persistent_path else None
+        self.stats = CacheStats()
+
+    # ------------------------------------------------------------------ 내부
+    def _remember(self, key: str, vector: List[float], created_at: float) -> None:
+        with self._lock:
+            self._memory[key] = (created_at, vector)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_size:
+                self._memory.popitem(last=False)
+                self.stats.evictions += 1
+
+    # ------------------------------------------------------------------ 공개 API
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        key = cache_key(model, text)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created_at, vector = entry
+                if self.ttl and now - created_at > self.ttl:
+                    del self._memory[key]
+                    self.stats.expired += 1
+                else:
+                    self._memory.move_to_end(key)
+                    self.stats.hits += 1
+                    self.stats.memory_hits += 1
+                    return vector
+
+        if self._disk is not None:
+            vector, created_at, expired = self._disk.get(key, self.ttl)
+            if expired:
+                self.stats.expired += 1
+            if vector is not None:
+                # 디스크에 저장된 생성 시각을 그대로 유지 (승격할 때마다 TTL이 연장되지 않도록)
+                self._remember(key, vector, created_at)
+                self.stats.hits += 1
+                self.stats.disk_hits += 1
+                return vector
+
+        self.stats.misses += 1
+        return None
+
+    def set(self, model: str, text: str, vector: Sequence[float]) -> None:
+        key = cache_key(model, text)
+        vector = list(vector)
+        self._remember(key, vector, time.time())
+        if self._disk is not None:
+            self.stats.evictions += self._disk.set(key, model, vector)
+
+    def get_many(self, model: str, texts: Iterable[str]) -> Dict[str, List[float]]:
+        """캐시에 있는 항목만 {원문: 벡터}로 반환 (정규화 후 같은 키는 한 번만 조회)"""
+        looked_up: Dict[str, Optional[List[float]]] = {}
+        found: Dict[str, List[float]] = {}
+        for text in texts:
+            key = cache_key(model, text)
+            if key not in looked_up:
+                looked_up[key] = self.get(model, text)
+            if looked_up[key] is not None:
+                found[text] = looked_up[key]
+        return found
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self._disk is not None:
+            self._disk.clear()
+
+    def snapshot(self) -> Dict[str, float]:
+        """모니터링/로그용 카운터"""
+        data = asdict(self.stats)
+        data["hit_rate"] = round(self.stats.hit_rate, 4)
+        data["memory_size"] = len(self._memory)
+        return data
+
+
+_DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "embedding_cache.sqlite3")
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    환경변수 기반 프로세스 공용 캐시
+    - EMBED_CACHE_SIZE: LRU 크기 (기본 2048)
+    - EMBED_CACHE_TTL: 만료 시간(초, 기본 7일, 0이면 무제한)
+    - EMBED_CACHE_PATH: SQLite 경로 (빈 값이면 영구 캐시 비활성화)
+    - EMBED_CACHE_MAX_ROWS: SQLite 최대 행 수 (기본 100000)
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache(
+                    max_size=int(os.getenv("EMBED_CACHE_SIZE", "2048")),
+                    ttl=float(os.getenv("EMBED_CACHE_TTL", str(7 * 24 * 3600))),
+                    persistent_path=os.getenv("EMBED_CACHE_PATH", _DEFAULT_CACHE_PATH) or None,
+                    persistent_max_rows=int(os.getenv("EMBED_CACHE_MAX_ROWS", "100000")),
+                )
+    return _cache
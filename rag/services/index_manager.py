@@ -0,0 +1,399 @@
+'''
+목적: medical.embedding 컬럼의 ANN(HNSW / IVFFlat) 인덱스 관리
+역할:
+인덱스 생성/재생성/삭제/검증
+쿼리 단위 검색 파라미터(hnsw.ef_search, ivfflat.probes) 설정
+정확 검색(exact) 대비 recall / latency 리포트 생성
+'''
+import math
+import statistics
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Literal, Optional, Sequence
+
+from psycopg2 import sql
+
+try:
+    from .pg_pool import pg_connection
+except ImportError:
+    from rag.services.pg_pool import pg_connection
+
+
+IndexMethod = Literal["hnsw", "ivfflat"]
+
+# PGVECTOR_DISTANCE 값 → pgvector operator class / 거리 연산자
+OPCLASSES = {
+    "cosine": ("vector_cosine_ops", "<=>"),
+    "l2": ("vector_l2_ops", "<->"),
+    "ip": ("vector_ip_ops", "<#>"),
+}
+
+
+@dataclass(slots=True)
+class IndexConfig:
+    """
+    ANN 인덱스 빌드 파라미터
+
+    - hnsw: m(그래프 연결 수), ef_construction(빌드 시 후보 수)
+    - ivfflat: lists(클러스터 수). None이면 행 수 기반으로 자동 결정
+    """
+    method: IndexMethod = "hnsw"
+    distance: str = "cosine"
+    m: int = 16
+    ef_construction: int = 64
+    lists: Optional[int] = None
+    maintenance_work_mem: Optional[str] = None  # 예: "1GB" (빌드 속도 향상)
+
+    @property
+    def opclass(self) -> str:
+        return OPCLASSES[self.distance][0]
+
+    @property
+    def operator(self) -> str:
+        return OPCLASSES[self.distance][1]
+
+
+def recommend_lists(row_count: int) -> int:
+    """pgvector 권장값: 1M행 이하는 rows/1000, 그 이상은 sqrt(rows)"""
+    if row_count <= 1_000_000:
+        return max(1, row_count // 1000)
+    return max(1, int(math.sqrt(row_count)))
+
+
+def recommend_probes(lists: int) -> int:
+    """pgvector 권장 시작값: sqrt(lists)"""
+    return max(1, int(math.sqrt(lists)))
+
+
+IterativeScan = Literal["off", "relaxed_order", "strict_order"]
+
+
+def apply_search_params(
+    cur,
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    iterative_scan: Optional[IterativeScan] = None,
+    statement_timeout_ms: Optional[int] = None,
+) -> None:
+    """
+    현재 트랜잭션에만 적용되는 ANN 검색 파라미터 설정 (SET LOCAL과 동일)
+    커넥션을 재사용해도 다른 쿼리에 값이 새어나가지 않는다.
+
+    iterative_scan (pgvector 0.8+): WHERE 필터로 후보가 걸러져 LIMIT보다 적게 남으면
+    인덱스를 이어서 탐색한다. IVFFlat은 strict_order를 지원하지 않아 relaxed_order로 설정한다.
+    relaxed_order는 결과 순서가 약간 어긋날 수 있으므로 바깥 쿼리에서 다시 정렬해야 한다.
+
+    statement_timeout_ms: 검색 쿼리 상한(ms). 초과하면 서버가 쿼리를 취소한다 (QueryCanceled)
+    """
+    for statement, params in search_param_statements(ef_search, probes, iterative_scan, statement_timeout_ms):
+        cur.execute(statement, params)
+
+
+def search_param_statements(
+    ef_search: Optional[int] = None,
+    probes: Optional[int] = None,
+    iterative_scan: Optional[IterativeScan] = None,
+    statement_timeout_ms: Optional[int] = None,
+) -> List[tuple]:
+    """apply_search_params가 실행할 (SQL, params) 목록 - 비동기 커서에서도 같은 설정을 쓰기 위함"""
+    statements = []
+    if ef_search is not None:
+        statements.append(("SELECT set_config('hnsw.ef_search', %s, true)", (str(int(ef_search)),)))
+    if probes is not None:
+        statements.append(("SELECT set_config('ivfflat.probes', %s, true)", (str(int(probes)),)))
+    if iterative_scan is not None:
+        statements.append((
+            "SELECT set_config('hnsw.iterative_scan', %s, true), set_config('ivfflat.iterative_scan', %s, true)",
+            (iterative_scan, "relaxed_order" if iterative_scan == "strict_order" else iterative_scan),
+        ))
+    if statement_timeout_ms is not None:
+        statements.append(("SELECT set_config('statement_timeout', %s, true)", (str(int(statement_timeout_ms)),)))
+    return statements
+
+
+@dataclass(slots=True)
+class VectorIndexManager:
+    table_name: str = "medical"
+    column: str = "embedding"
+
+    def index_name(self, method: IndexMethod) -> str:
+        return f"{self.table_name}_{self.column}_{method}_idx"
+
+    # ------------------------------------------------------------------ 조회
+    def row_count(self) -> int:
+        with pg_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    sql.SQL("SELECT count(*) FROM {} WHERE {} IS NOT NULL").format(
+                        sql.Identifier(self.table_name), sql.Identifier(self.column)
+                    )
+                )
+                return cur.fetchone()[0]
+
+    def list_indexes(self) -> List[Dict[str, Any]]:
+        """테이블에 걸린 벡터 인덱스 목록 (유효성/크기 포함)"""
+        query = """
+            SELECT
+                c.relname AS name,
+                am.amname AS method,
+                i.indisvalid AS is_valid,
+                i.indisready AS is_ready,
+                pg_size_pretty(pg_relation_size(c.oid)) AS size,
+                pg_get_indexdef(c.oid) AS definition
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            JOIN pg_am am ON am.oid = c.relam
+            WHERE i.indrelid = %s::regclass
+              AND am.amname IN ('hnsw', 'ivfflat')
+            ORDER BY c.relname;
+        """
+        with pg_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, (self.table_name,))
+                columns = [desc[0] for desc in cur.description]
+                return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+    # ------------------------------------------------------------------ 빌드
+    def _create_sql(self, config: IndexConfig, name: str, concurrently: bool) -> sql.Composed:
+        if config.method == "hnsw":
+            options = sql.SQL("m = {}, ef_construction = {}").format(
+                sql.Literal(int(config.m)), sql.Literal(int(config.ef_construction))
+            )
+        else:
+            lists = config.lists or recommend_lists(self.row_count())
+            options = sql.SQL("lists = {}").format(sql.Literal(int(lists)))
+
+        return sql.SQL(
+            "CREATE INDEX {concurrently} IF NOT EXISTS {name} ON {table} "
+            "USING {method} ({column} {opclass}) WITH ({options})"
+        ).format(
+            concurrently=sql.SQL("CONCURRENTLY" if concurrently else ""),
+            name=sql.Identifier(name),
+            table=sql.Identifier(self.table_name),
+            method=sql.SQL(config.method),
+            column=sql.Identifier(self.column),
+            opclass=sql.SQL(config.opclass),
+            options=options,
+        )
+
+    def _execute_autocommit(self, statements: Sequence[Any]) -> None:
+        """CREATE INDEX CONCURRENTLY는 트랜잭션 밖에서 실행해야 하므로 autocommit 사용"""
+        with pg_connection() as conn:
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cur:
+                    for statement in statements:
+                        cur.execute(statement)
+            finally:
+                # 공용 풀 커넥션이므로 세션 설정(SET maintenance_work_mem, autocommit)을 되돌린 뒤 반납
+                if not conn.closed:
+                    with conn.cursor() as cur:
+                        cur.execute("RESET ALL")
+                    conn.autocommit = False
+
+    def build(self, config: IndexConfig, concurrently: bool = True) -> str:
+        """
+        인덱스 생성 (이미 같은 이름이 있으면 건너뜀)
+
+        Returns:
+            생성된 인덱스 이름
+        """
+        name = self.index_name(config.method)
+        statements: List[Any] = []
+        if config.maintenance_work_mem:
+            statements.append(
+                sql.SQL("SET maintenance_work_mem = {}").format(sql.Literal(config.maintenance_work_mem))
+            )
+        statements.append(self._create_sql(config, name, concurrently))
+
+        started = time.perf_counter()
+        print(f"• [Index] build start ({name}, method={config.method})")
+        self._execute_autocommit(statements)
+        print(f"• [Index] build complete ({name}, {time.perf_counter() - started:.1f}s)")
+        return name
+
+    def rebuild(self, config: IndexConfig) -> str:
+        """
+        파라미터를 바꿔 인덱스 재생성 (무중단)
+        새 인덱스를 임시 이름으로 CONCURRENTLY 생성한 뒤 기존 인덱스와 교체한다.
+        """
+        name = self.index_name(config.method)
+        tmp_name = f"{name}_new"
+        statements: List[Any] = [sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {}").format(sql.Identifier(tmp_name))]
+        if config.maintenance_work_mem:
+            statements.append(
+                sql.SQL("SET maintenance_work_mem = {}").format(sql.Literal(config.maintenance_work_mem))
+            )
+        statements.extend([
+            self._create_sql(config, tmp_name, concurrently=True),
+            sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {}").format(sql.Identifier(name)),
+            sql.SQL("ALTER INDEX {} RENAME TO {}").format(sql.Identifier(tmp_name), sql.Identifier(name)),
+        ])
+
+        started = time.perf_counter()
+        print(f"• [Index] rebuild start ({name}, method={config.method})")
+        self._execute_autocommit(statements)
+        print(f"• [Index] rebuild complete ({name}, {time.perf_counter() - started:.1f}s)")
+        return name
+
+    def drop(self, method: IndexMethod) -> None:
+        name = self.index_name(method)
+        self._execute_autocommit([
+            sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {}").format(sql.Identifier(name))
+        ])
+        print(f"• [Index] dropped ({name})")
+
+    # ------------------------------------------------------------------ 검증
+    def verify(self, method: IndexMethod, distance: str = "cosine") -> Dict[str, Any]:
+        """
+        인덱스가 유효(indisvalid)하고 실제 kNN 쿼리 플랜에서 사용되는지 확인
+        CONCURRENTLY 빌드가 중간에 실패하면 INVALID 인덱스가 남으므로 재빌드가 필요하다.
+        """
+        name = self.index_name(method)
+        info = next((idx for idx in self.list_indexes() if idx["name"] == name), None)
+        result: Dict[str, Any] = {"name": name, "exists": info is not None, "is_valid": False, "used_by_planner": False}
+        if info is None:
+            return result
+        result.update(is_valid=info["is_valid"], size=info["size"], definition=info["definition"])
+
+        operator = OPCLASSES[distance][1]
+        with pg_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    sql.SQL("SELECT {col} FROM {table} WHERE {col} IS NOT NULL LIMIT 1").format(
+                        col=sql.Identifier(self.column), table=sql.Identifier(self.table_name)
+                    )
+                )
+                row = cur.fetchone()
+                if row is None:
+                    return result
+                cur.execute(
+                    sql.SQL("EXPLAIN SELECT id FROM {table} ORDER BY {col} {op} %s LIMIT 5").format(
+                        table=sql.Identifier(self.table_name),
+                        col=sql.Identifier(self.column),
+                        op=sql.SQL(operator),
+                    ),
+                    (row[0],),
+                )
+                plan = "\n".join(line[0] for line in cur.fetchall())
+
+        result["used_by_planner"] = name in plan
+        result["plan"] = plan
+        return result
+
+    # ------------------------------------------------------------------ 리포트
+    def _sample_queries(self, cur, sample_size: int) -> List[tuple]:
+        """쿼리로 사용할 (id, 임베딩)을 테이블에서 무작위 샘플링 (임베딩 API 호출 없음)"""
+        cur.execute(
+            sql.SQL("SELECT id, {col} FROM {table} WHERE {col} IS NOT NULL ORDER BY random() LIMIT %s").format(
+                col=sql.Identifier(self.column), table=sql.Identifier(self.table_name)
+            ),
+            (sample_size,),
+        )
+        return [(row[0], row[1]) for row in cur.fetchall()]
+
+    def _knn_ids(self, cur, vec, k: int, operator: str, exclude_id: Any = None) -> tuple[List[int], float]:
+        """
+        top-k id와 지연시간(ms) 반환
+        exclude_id: 쿼리 벡터의 원본 행 id. 거리 0인 자기 자신이 recall을 부풀리지 않도록
+        k+1개를 가져와 제외한다 (WHERE 조건을 붙이면 ANN 실행 계획이 달라지므로 사용하지 않음)
+        """
+        limit = k + 1 if exclude_id is not None else k
+        started = time.perf_counter()
+        cur.execute(
+            sql.SQL("SELECT id FROM {table} WHERE {col} IS NOT NULL ORDER BY {col} {op} %s LIMIT %s").format(
+                table=sql.Identifier(self.table_name),
+                col=sql.Identifier(self.column),
+                op=sql.SQL(operator),
+            ),
+            (vec, limit),
+        )
+        ids = [row[0] for row in cur.fetchall()]
+        elapsed = (time.perf_counter() - started) * 1000
+        if exclude_id is not None:
+            ids = [doc_id for doc_id in ids if doc_id != exclude_id]
+        return ids[:k], elapsed
+
+    def recall_report(
+        self,
+        method: IndexMethod,
+        values: Sequence[int],
+        k: int = 5,
+        sample_size: int = 50,
+        distance: str = "cosine",
+    ) -> List[Dict[str, Any]]:
+        """
+        exact 검색 대비 ANN 검색의 recall@k / latency 측정
+
+        Args:
+            method: 측정할 인덱스 종류 (hnsw → ef_search, ivfflat → probes 값을 바꿔가며 측정)
+            values: ef_search 또는 probes 후보 값 목록
+            k: top-k
+            sample_size: 쿼리 샘플 수 (코퍼스에서 뽑은 벡터이므로 자기 자신은 양쪽 결과에서 제외)
+
+        Returns:
+            설정값별 {"setting", "value", "recall", "mean_ms", "p95_ms"} 리스트.
+            첫 행은 exact 검색 기준값.
+        """
+        operator = OPCLASSES[distance][1]
+        param_name = "ef_search" if method == "hnsw" else "probes"
+        report: List[Dict[str, Any]] = []
+
+        with pg_connection() as conn:
+            with conn.cursor() as cur:
+                queries = self._sample_queries(cur, sample_size)
+                conn.commit()
+                if not queries:
+                    return report
+
+                # 1) exact 검색: 인덱스 스캔을 끄고 순차 스캔으로 정답 집합 생성
+                ground_truth: List[set] = []
+                exact_latencies: List[float] = []
+                for qid, vec in queries:
+                    cur.execute("SET LOCAL enable_indexscan = off")
+                    cur.execute("SET LOCAL enable_bitmapscan = off")
+                    ids, elapsed = self._knn_ids(cur, vec, k, operator, exclude_id=qid)
+                    conn.commit()
+                    ground_truth.append(set(ids))
+                    exact_latencies.append(elapsed)
+                report.append(_report_row("exact", None, 1.0, exact_latencies))
+
+                # 2) ANN 검색: 파라미터 값별 recall/latency
+                for value in values:
+                    recalls: List[float] = []
+                    latencies: List[float] = []
+                    for (qid, vec), truth in zip(queries, ground_truth):
+                        if method == "hnsw":
+                            apply_search_params(cur, ef_search=value)
+                        else:
+                            apply_search_params(cur, probes=value)
+                        ids, elapsed = self._knn_ids(cur, vec, k, operator, exclude_id=qid)
+                        conn.commit()
+                        recalls.append(len(truth & set(ids)) / len(truth) if truth else 1.0)
+                        latencies.append(elapsed)
+                    report.append(_report_row(param_name, value, statistics.mean(recalls), latencies))
+
+        return report
+
+
+def _report_row(setting: str, value: Optional[int], recall: float, latencies: List[float]) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return {
+        "setting": setting,
+        "value": value,
+        "recall": round(recall, 4),
+        "mean_ms": round(statistics.mean(latencies), 2),
+        "p95_ms": round(p95, 2),
+    }
+
+
+def format_report(report: List[Dict[str, Any]]) -> str:
+    """recall_report 결과를 터미널 출력용 표로 변환"""
+    lines = [f"{'setting':<10} {'value':>6} {'recall':>8} {'mean_ms':>9} {'p95_ms':>9}"]
+    for row in report:
+        value = "-" if row["value"] is None else str(row["value"])
+        lines.append(
+            f"{row['setting']:<10} {value:>6} {row['recall']:>8.4f} {row['mean_ms']:>9.2f} {row['p95_ms']:>9.2f}"
+        )
+    return "\n".join(lines)
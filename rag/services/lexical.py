@@ -0,0 +1,108 @@
+'''
+목적: 하이브리드 검색용 어휘(lexical) 검색어 추출
+역할:
+질문에서 정확히 일치해야 하는 용어(약물명, 유전자 기호, 약어 등)와 한국어 핵심어 추출
+조사/의문형 어미 제거 후 pg_trgm 인덱스를 타는 ILIKE 패턴으로 변환
+(pg_trgm은 3글자 미만 패턴에서 trigram을 뽑지 못하므로 짧은 용어는 후보 조건이 아닌 점수에만 사용)
+(임베딩 검색이 놓치는 EGFR, MMP-9, TIMP-2 같은 표기를 보완)
+'''
+import re
+import unicodedata
+from typing import List
+
+# 영문/숫자 토큰: EGFR, MMP-9, TIMP-2, T790M, HER2/neu, 5-FU, sm1 ...
+_LATIN_TOKEN = re.compile(r"[A-Za-z0-9][A-Za-z0-9\-+/.]*[A-Za-z0-9+]|[A-Za-z]{2,}")
+_HANGUL_TOKEN = re.compile(r"[가-힣]+")
+
+# 긴 조사/어미부터 제거해야 "에서는" → "에서" → "에"처럼 잘못 잘리지 않는다
+_KOREAN_SUFFIXES = sorted(
+    [
+        "이었나요", "였나요", "인가요", "인지요", "했나요", "하나요", "있나요", "없나요", "되나요",
+        "입니까", "습니까", "합니까", "해줘요", "해주세요", "알려줘", "해줘",
+        "에서는", "에서도", "으로는", "으로도", "에게서", "까지는", "부터는",
+        "에서", "으로", "에게", "까지", "부터", "처럼", "보다", "이나", "이랑", "하고",
+        "과의", "와의", "에의", "들의", "들은", "들이", "들을",
+        "은", "는", "이", "가", "을", "를", "의", "에", "와", "과", "도", "로", "만", "나",
+    ],
+    key=len,
+    reverse=True,
+)
+
+# 질문 형식어/일반어: 거의 모든 문서에 등장하거나 의미가 없어 랭킹을 흐린다
+_STOPWORDS = {
+    # 한국어
+    "무엇", "무슨", "어떤", "어떻게", "어디", "언제", "얼마", "얼마나", "정도", "관련", "관계",
+    "대한", "대해", "대해서", "위한", "통한", "있는", "없는", "되는", "하는", "같은", "경우",
+    "설명", "요약", "정리", "비교", "알려", "알려줘", "주세요", "해주세요", "가능", "방법",
+    "연구", "결과", "논문", "환자", "무엇인가요", "뭐야", "뭔가요",
+    # 영문
+    "the", "and", "for", "with", "from", "what", "how", "are", "was", "were", "this", "that",
+    "vs", "or", "of", "in", "on", "to", "is", "an", "by",
+}
+
+# 서술/의문형 어미로 끝나는 토큰(있나요, 되나요, 할까 ...)은 검색어가 아니다
+# 조사를 떼기 전 원래 토큰에만 적용 ("필요는" → "필요", "중요성이" → "중요성"은 명사로 유지)
+_PREDICATE_ENDINGS = ("나요", "가요", "세요", "에요", "예요", "어요", "아요", "해요", "죠", "까", "니다")
+
+MAX_TERMS = 8
+# pg_trgm GIN 인덱스가 후보를 좁힐 수 있는 최소 길이 ('%당뇨%'는 trigram이 없어 전체 스캔)
+MIN_INDEX_CHARS = 3
+
+
+def _strip_suffix(word: str) -> str:
+    for suffix in _KOREAN_SUFFIXES:
+        # 어간이 최소 2글자는 남아야 조사로 본다 ("나이" → "나" 방지)
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            return word[: -len(suffix)]
+    return word
+
+
+def extract_lexical_terms(query: str, max_terms: int = MAX_TERMS) -> List[str]:
+    """
+    질문에서 어휘 검색어 추출 (등장 순서 유지, 중복 제거)
+
+    - 영문/숫자 토큰: 원문 그대로 (대소문자 구분 없이 ILIKE로 검색)
+      숫자만으로 된 토큰(연도, 개수 등)은 제외
+    - 한글 토큰: 조사/의문형 어미를 제거한 2글자 이상 어간 (서술/의문형으로 끝나는 토큰은 제외)
+    - 영문 토큰을 한글 토큰보다 앞에 둔다 (정확 일치가 중요한 용어 우선)
+    """
+    text = unicodedata.normalize("NFC", query or "")
+
+    latin: List[str] = []
+    for token in _LATIN_TOKEN.findall(text):
+        token = token.strip(".-/")
+        if len(token) < 2 or token.isdigit() or token.lower() in _STOPWORDS:
+            continue
+        latin.append(token)
+
+    hangul: List[str] = []
+    for token in _HANGUL_TOKEN.findall(text):
+        if token.endswith(_PREDICATE_ENDINGS):
+            continue
+        stem = _strip_suffix(token)
+        if len(stem) < 2 or stem in _STOPWORDS:
+            continue
+        hangul.append(stem)
+
+    terms: List[str] = []
+    seen = set()
+    for term in latin + hangul:
+        key = term.lower()
+        if key not in seen:
+            seen.add(key)
+            terms.append(term)
+    return terms[:max_terms]
+
+
+def index_terms(terms: List[str]) -> List[str]:
+    """trigram 인덱스 조건(ILIKE ANY)에 쓸 수 있는 용어 (MIN_INDEX_CHARS 이상)"""
+    return [term for term in terms if len(term) >= MIN_INDEX_CHARS]
+
+
+def to_like_patterns(terms: List[str]) -> List[str]:
+    """ILIKE ANY(...)에 넣을 '%term%' 패턴 (LIKE 메타문자 이스케이프)"""
+    patterns = []
+    for term in terms:
+        escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        patterns.append(f"%{escaped}%")
+    return patterns
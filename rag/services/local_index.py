@@ -0,0 +1,424 @@
+'''
+목적: medical 테이블 임베딩을 로컬 파일로 내보내 프로세스 안에서 정확(exact) 검색
+역할:
+(id, c_id, content, embedding)을 정규화된 float32/float16 .npy + 본문 바이너리로 export
+np.load(mmap_mode="r")로 열어 gunicorn 워커들이 OS 페이지 캐시를 공유 (워커별 복사본 없음)
+top-k = 행렬-벡터 곱(BLAS) 1회 + argpartition (네트워크 왕복 없음, recall 100%)
+medical.id 최댓값(+행 수)을 버전 키로 사용하는 갱신 프로토콜
+    - export는 새 버전 디렉토리에 쓴 뒤 CURRENT 포인터 파일을 원자적으로 교체
+    - 워커는 CURRENT가 바뀌면 새 버전을 다시 mmap (기존 mmap은 파일 삭제 후에도 유효)
+'''
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # Windows 개발 환경: 파일 락 없이 동작 (동시 export는 운영 서버에서만 발생)
+    fcntl = None
+
+try:
+    from .pg_pool import pg_connection
+except ImportError:
+    try:
+        from rag.services.pg_pool import pg_connection
+    except ImportError:
+        from pg_pool import pg_connection
+
+load_dotenv()
+
+DEFAULT_INDEX_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "local_index")
+
+# infra/init.sql의 source_spec / creation_year 생성 컬럼과 같은 규칙
+_SOURCE_RE = re.compile(r"^(.*?)_[0-9]")
+_YEAR_RE = re.compile(r"^.*?_((?:19|20)[0-9]{2})_[0-9]")
+
+# float16 행렬은 블록 단위로 float32 변환 후 곱한다 (전체 행렬 복사 방지)
+_BLOCK_ROWS = 8192
+_KEEP_VERSIONS = 2
+
+
+def _version_name(max_id: int, count: int) -> str:
+    return f"v{max_id:012d}_{count}"
+
+
+def _read_current(index_dir: str) -> Optional[str]:
+    try:
+        with open(os.path.join(index_dir, "CURRENT"), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _write_current(index_dir: str, version: str) -> None:
+    tmp_path = os.path.join(index_dir, f".CURRENT.{os.getpid()}")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(index_dir, "CURRENT"))
+
+
+def fetch_corpus_version(table_name: str = "medical") -> Tuple[int, int]:
+    """(max(id), count(*)) - export 버전 키"""
+    with pg_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT COALESCE(max(id), 0), count(*) FROM {table_name} WHERE embedding IS NOT NULL")
+            max_id, count = cur.fetchone()
+    return int(max_id), int(count)
+
+
+def export_local_index(
+    index_dir: str = DEFAULT_INDEX_DIR,
+    dtype: str = "float32",
+    table_name: str = "medical",
+    force: bool = False,
+    batch_size: int = 2000,
+) -> Dict[str, Any]:
+    """
+    medical 테이블을 index_dir 아래 새 버전으로 export 하고 CURRENT를 교체
+
+    같은 (max_id, count) 버전이 이미 있으면 force=False일 때 건너뛴다.
+    여러 프로세스가 동시에 호출해도 파일 락으로 한 번만 export 된다.
+
+    Returns:
+        manifest dict (skipped=True면 기존 버전 그대로)
+    """
+    if dtype not in ("float32", "float16"):
+        raise ValueError(f"지원하지 않는 dtype: {dtype}")
+    os.makedirs(index_dir, exist_ok=True)
+
+    with open(os.path.join(index_dir, ".lock"), "w") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            return _export_locked(index_dir, dtype, table_name, force, batch_size)
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _export_locked(index_dir: str, dtype: str, table_name: str, force: bool, batch_size: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    tmp_dir = os.path.join(index_dir, f".tmp-{os.getpid()}-{int(time.time())}")
+
+    with pg_connection() as conn:
+        with conn.cursor() as cur:
+            # 버전 조회와 본문 스캔이 같은 스냅샷을 보도록 REPEATABLE READ
+            cur.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+            cur.execute(f"SELECT COALESCE(max(id), 0), count(*) FROM {table_name} WHERE embedding IS NOT NULL")
+            max_id, count = (int(v) for v in cur.fetchone())
+
+        version = _version_name(max_id, count)
+        if not force and _read_current(index_dir) == version:
+            manifest = _read_manifest(os.path.join(index_dir, version))
+            if manifest is not None:
+                return {**manifest, "skipped": True}
+
+        os.makedirs(tmp_dir)
+        embeddings = None
+        ids = np.zeros(count, dtype=np.int64)
+        years = np.zeros(count, dtype=np.int16)  # 0 = 연도 없음
+        source_codes = np.zeros(count, dtype=np.int32)
+        sources: Dict[str, int] = {}
+        c_ids: List[Optional[str]] = []
+        offsets = np.zeros(count + 1, dtype=np.int64)
+
+        # 서버 사이드 커서로 batch_size씩 스트리밍 (전체 결과를 메모리에 올리지 않음)
+        with conn.cursor(name="local_index_export") as cur, open(os.path.join(tmp_dir, "content.bin"), "wb") as content_file:
+            cur.itersize = batch_size
+            cur.execute(
+                f"SELECT id, metadata->>'c_id', content, embedding FROM {table_name} "
+                f"WHERE embedding IS NOT NULL AND id <= %s ORDER BY id",
+                (max_id,),
+            )
+            row_idx = 0
+            for doc_id, c_id, content, embedding in cur:
+                if row_idx >= count:
+                    break
+                vec = np.asarray(embedding, dtype=np.float32)
+                if embeddings is None:
+                    embeddings = np.lib.format.open_memmap(
+                        os.path.join(tmp_dir, "embeddings.npy"), mode="w+", dtype=dtype, shape=(count, vec.shape[0])
+                    )
+                norm = np.linalg.norm(vec)
+                embeddings[row_idx] = vec / norm if norm > 0 else vec
+
+                ids[row_idx] = doc_id
+                c_ids.append(c_id)
+                source_match = _SOURCE_RE.match(c_id or "")
+                if source_match:
+                    source_codes[row_idx] = sources.setdefault(source_match.group(1), len(sources) + 1)
+                year_match = _YEAR_RE.match(c_id or "")
+                if year_match:
+                    years[row_idx] = int(year_match.group(1))
+
+                encoded = (content or "").encode("utf-8")
+                content_file.write(encoded)
+                offsets[row_idx + 1] = offsets[row_idx] + len(encoded)
+                row_idx += 1
+
+    if embeddings is None:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise RuntimeError(f"{table_name}에 임베딩된 행이 없습니다")
+    embeddings.flush()
+    del embeddings
+
+    np.save(os.path.join(tmp_dir, "ids.npy"), ids[:row_idx])
+    np.save(os.path.join(tmp_dir, "years.npy"), years[:row_idx])
+    np.save(os.path.join(tmp_dir, "source_codes.npy"), source_codes[:row_idx])
+    np.save(os.path.join(tmp_dir, "content_offsets.npy"), offsets[: row_idx + 1])
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"c_ids": c_ids, "sources": sources}, f, ensure_ascii=False)
+
+    manifest = {
+        "version": version,
+        "max_id": max_id,
+        "count": row_idx,
+        "dtype": dtype,
+        "table": table_name,
+        "created_at": time.time(),
+        "export_seconds": round(time.perf_counter() - started, 2),
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+    version_dir = os.path.join(index_dir, version)
+    if os.path.exists(version_dir):
+        shutil.rmtree(version_dir)
+    os.rename(tmp_dir, version_dir)
+    _write_current(index_dir, version)
+    _prune_versions(index_dir, keep=version)
+    return {**manifest, "skipped": False}
+
+
+def _read_manifest(version_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(version_dir, "manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def _prune_versions(index_dir: str, keep: str) -> None:
+    """최근 버전 _KEEP_VERSIONS개만 유지 (이미 mmap한 워커는 삭제 후에도 계속 읽을 수 있음)"""
+    versions = sorted(name for name in os.listdir(index_dir) if name.startswith("v") and name != keep)
+    for name in versions[: max(0, len(versions) - (_KEEP_VERSIONS - 1))]:
+        shutil.rmtree(os.path.join(index_dir, name), ignore_errors=True)
+
+
+@dataclass
+class _LoadedVersion:
+    version: str
+    embeddings: np.ndarray  # (n, d) mmap, 행 단위 L2 정규화
+    ids: np.ndarray
+    years: np.ndarray
+    source_codes: np.ndarray
+    content: np.ndarray  # uint8 mmap
+    offsets: np.ndarray
+    c_ids: List[Optional[str]]
+    sources: Dict[str, int]
+
+    @classmethod
+    def open(cls, version_dir: str, version: str) -> "_LoadedVersion":
+        with open(os.path.join(version_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        content_path = os.path.join(version_dir, "content.bin")
+        content = (
+            np.memmap(content_path, dtype=np.uint8, mode="r")
+            if os.path.getsize(content_path) > 0
+            else np.zeros(0, dtype=np.uint8)
+        )
+        return cls(
+            version=version,
+            embeddings=np.load(os.path.join(version_dir, "embeddings.npy"), mmap_mode="r"),
+            ids=np.load(os.path.join(version_dir, "ids.npy"), mmap_mode="r"),
+            years=np.load(os.path.join(version_dir, "years.npy"), mmap_mode="r"),
+            source_codes=np.load(os.path.join(version_dir, "source_codes.npy"), mmap_mode="r"),
+            content=content,
+            offsets=np.load(os.path.join(version_dir, "content_offsets.npy"), mmap_mode="r"),
+            c_ids=meta["c_ids"],
+            sources=meta["sources"],
+        )
+
+    def content_at(self, idx: int) -> str:
+        return bytes(self.content[self.offsets[idx] : self.offsets[idx + 1]]).decode("utf-8")
+
+
+@dataclass
+class LocalVectorIndex:
+    """
+    mmap된 임베딩 행렬 위의 정확(brute-force) 코사인 검색
+
+    Args:
+        index_dir: export 디렉토리 (CURRENT, v{max_id}_{count}/...)
+        check_interval: CURRENT 파일 변경 확인 주기(초)
+        refresh_interval: DB max(id)와 비교해 stale 여부를 확인하는 주기(초, 0이면 확인 안 함)
+        auto_export: 백그라운드 스레드에서 stale 여부를 확인하고 export 실행 (파일 락으로 한 워커만 수행)
+    """
+    index_dir: str = DEFAULT_INDEX_DIR
+    check_interval: float = 5.0
+    refresh_interval: float = 300.0
+    auto_export: bool = True
+    dtype: str = "float32"
+    _loaded: Optional[_LoadedVersion] = field(default=None, init=False, repr=False)
+    _checked_at: float = field(default=0.0, init=False, repr=False)
+    _refreshed_at: float = field(default=0.0, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _exporting: bool = field(default=False, init=False, repr=False)
+
+    # ------------------------------------------------------------------ 버전 관리
+    @property
+    def version(self) -> Optional[str]:
+        return self._loaded.version if self._loaded else None
+
+    def _maybe_reload(self) -> _LoadedVersion:
+        now = time.monotonic()
+        if self._loaded is not None and now - self._checked_at < self.check_interval:
+            return self._loaded
+        with self._lock:
+            self._checked_at = now
+            current = _read_current(self.index_dir)
+            if current is None:
+                if self._loaded is None:
+                    raise FileNotFoundError(
+                        f"로컬 인덱스가 없습니다: {self.index_dir} (scripts/export_local_index.py 실행 필요)"
+                    )
+            elif self._loaded is None or self._loaded.version != current:
+                self._loaded = _LoadedVersion.open(os.path.join(self.index_dir, current), current)
+                print(f"• [LocalIndex] loaded {current} ({self._loaded.embeddings.shape[0]} rows)")
+        self._maybe_refresh(now)
+        return self._loaded
+
+    def _maybe_refresh(self, now: float) -> None:
+        """
+        refresh_interval마다 백그라운드 스레드에서 DB의 (max(id), count)를 확인하고,
+        로드된 버전과 다르면 같은 스레드에서 export (검색 요청 경로에서는 DB 조회 없음)
+        """
+        if not self.refresh_interval or not self.auto_export or now - self._refreshed_at < self.refresh_interval:
+            return
+        with self._lock:
+            if self._exporting or now - self._refreshed_at < self.refresh_interval:
+                return
+            self._refreshed_at = now
+            self._exporting = True
+        threading.Thread(target=self._refresh, name="local-index-refresh", daemon=True).start()
+
+    def _refresh(self) -> None:
+        try:
+            try:
+                latest = _version_name(*fetch_corpus_version())
+            except Exception as e:
+                print(f"• [LocalIndex] version check failed: {e}")
+                return
+            if latest == self.version:
+                return
+            try:
+                export_local_index(self.index_dir, dtype=self.dtype)
+            except Exception as e:
+                print(f"• [LocalIndex] export failed: {e}")
+        finally:
+            self._exporting = False
+
+    # ------------------------------------------------------------------ 검색
+    def _scores(self, loaded: _LoadedVersion, query: np.ndarray) -> np.ndarray:
+        matrix = loaded.embeddings
+        if matrix.dtype == np.float32:
+            return matrix @ query
+        scores = np.empty(matrix.shape[0], dtype=np.float32)
+        for start in range(0, matrix.shape[0], _BLOCK_ROWS):
+            block = np.asarray(matrix[start : start + _BLOCK_ROWS], dtype=np.float32)
+            scores[start : start + block.shape[0]] = block @ query
+        return scores
+
+    def _filter_mask(self, loaded: _LoadedVersion, filters) -> Optional[np.ndarray]:
+        """SearchFilters(sources, year_from, year_to)와 같은 의미의 마스크"""
+        if filters is None or filters.is_empty():
+            return None
+        mask = np.ones(loaded.ids.shape[0], dtype=bool)
+        if filters.sources:
+            codes = [loaded.sources[s] for s in filters.sources if s in loaded.sources]
+            mask &= np.isin(loaded.source_codes, codes)
+        if filters.year_from is not None:
+            mask &= loaded.years >= int(filters.year_from)
+        if filters.year_to is not None:
+            mask &= (loaded.years > 0) & (loaded.years <= int(filters.year_to))
+        return mask
+
+    def search(
+        self,
+        query_vector: Sequence[float],
+        k: int = 5,
+        filters=None,
+        with_embedding: bool = False,
+    ) -> List[tuple]:
+        """
+        Returns:
+            pgvector 경로와 같은 행 형태
+            [(id, content, {"c_id": ...}, distance(, embedding))] - distance = 1 - cosine
+        """
+        loaded = self._maybe_reload()
+        query = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm > 0:
+            query = query / norm
+
+        scores = self._scores(loaded, query)
+        mask = self._filter_mask(loaded, filters)
+        if mask is not None:
+            scores = np.where(mask, scores, -np.inf)
+            k = min(k, int(mask.sum()))
+        k = min(k, scores.shape[0])
+        if k <= 0:
+            return []
+
+        # 전체 정렬 대신 argpartition으로 상위 k개만 고른 뒤 k개만 정렬
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+
+        rows = []
+        for idx in top:
+            idx = int(idx)
+            row = (
+                int(loaded.ids[idx]),
+                loaded.content_at(idx),
+                {"c_id": loaded.c_ids[idx]},
+                float(1.0 - scores[idx]),
+            )
+            if with_embedding:
+                row += (np.asarray(loaded.embeddings[idx], dtype=np.float32),)
+            rows.append(row)
+        return rows
+
+
+_local_index: Optional[LocalVectorIndex] = None
+_local_index_lock = threading.Lock()
+
+
+def get_local_index() -> LocalVectorIndex:
+    """
+    환경변수 기반 프로세스 공용 로컬 인덱스
+    - LOCAL_INDEX_DIR: export 디렉토리 (기본 rag/data/local_index)
+    - LOCAL_INDEX_DTYPE: float32 | float16 (auto export 시 사용)
+    - LOCAL_INDEX_REFRESH_INTERVAL: DB 버전 확인 주기(초, 기본 300, 0이면 비활성화)
+    - LOCAL_INDEX_AUTO_EXPORT: stale 시 자동 export 여부 (기본 true)
+    """
+    global _local_index
+    if _local_index is None:
+        with _local_index_lock:
+            if _local_index is None:
+                _local_index = LocalVectorIndex(
+                    index_dir=os.getenv("LOCAL_INDEX_DIR", DEFAULT_INDEX_DIR),
+                    dtype=os.getenv("LOCAL_INDEX_DTYPE", "float32"),
+                    refresh_interval=float(os.getenv("LOCAL_INDEX_REFRESH_INTERVAL", "300")),
+                    auto_export=os.getenv("LOCAL_INDEX_AUTO_EXPORT", "true").lower() in ("1", "true", "yes"),
+                )
+    return _local_index
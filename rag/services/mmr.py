@@ -0,0 +1,69 @@
+'''
+목적: MMR(Maximal Marginal Relevance) 재랭킹
+역할:
+DB에 저장된 후보 임베딩 행렬로 관련성과 다양성을 함께 고려해 문서 선택
+후보 행렬을 한 번만 정규화하고, 선택 단계마다 행렬-벡터 곱 1회로 최대 유사도 갱신
+(후보 재임베딩 / 파이썬 이중 루프 / 반복 norm 계산 없음)
+'''
+from typing import List, Sequence
+
+import numpy as np
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def maximal_marginal_relevance(
+    query_embedding: Sequence[float],
+    candidate_embeddings: Sequence[Sequence[float]],
+    k: int = 5,
+    lambda_mult: float = 0.5,
+) -> List[int]:
+    """
+    MMR로 선택된 후보 인덱스를 선택 순서대로 반환
+
+    score(i) = λ · sim(q, d_i) − (1 − λ) · max_{j∈selected} sim(d_i, d_j)
+
+    Args:
+        query_embedding: 쿼리 벡터 (d,)
+        candidate_embeddings: 후보 벡터 (n, d)
+        k: 선택할 문서 수
+        lambda_mult: 1에 가까울수록 관련성, 0에 가까울수록 다양성 중시
+
+    Returns:
+        candidate_embeddings 기준 인덱스 리스트 (길이 ≤ k)
+    """
+    candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+    if candidates.ndim != 2 or candidates.shape[0] == 0 or k <= 0:
+        return []
+
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query_norm = np.linalg.norm(query)
+    if query_norm > 0:
+        query = query / query_norm
+
+    matrix = _normalize_rows(candidates)
+    query_sim = matrix @ query  # (n,)
+
+    n = matrix.shape[0]
+    k = min(k, n)
+    max_sim_to_selected = np.full(n, -np.inf, dtype=np.float32)
+    selected_mask = np.zeros(n, dtype=bool)
+
+    # 첫 문서는 쿼리와 가장 유사한 후보
+    selected = [int(np.argmax(query_sim))]
+    selected_mask[selected[0]] = True
+
+    while len(selected) < k:
+        # 직전에 선택된 문서와의 유사도만 계산해 누적 최대값 갱신 (O(n·d))
+        max_sim_to_selected = np.maximum(max_sim_to_selected, matrix @ matrix[selected[-1]])
+        scores = lambda_mult * query_sim - (1.0 - lambda_mult) * max_sim_to_selected
+        scores[selected_mask] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        selected_mask[best] = True
+
+    return selected
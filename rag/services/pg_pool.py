@@ -0,0 +1,204 @@
+'''
+목적: pgvector 검색/적재에서 공유하는 스레드 안전 커넥션 풀
+역할:
+vector 타입이 미리 등록된(register_vector) 커넥션을 재사용
+대여 시 헬스 체크, 최대 수명(max lifetime) 초과 커넥션 재생성
+gunicorn fork 이후 자식 프로세스에서 풀을 새로 생성
+
+프로세스당 Postgres 커넥션 예산 (풀마다 크기 환경변수가 따로 있음)
+    PG_POOL_MAX          psycopg2 공용 풀 (이 모듈) - 동기 검색/저장, 메모리, 스크립트, 인덱스 관리
+    PG_BINARY_POOL_MAX   psycopg3 동기 풀 (binary_search.get_binary_pool) - CustomVectorStore 바이너리 kNN
+    PG_ASYNC_POOL_MAX    psycopg3 비동기 풀 (binary_search.get_async_binary_pool) - graph.ainvoke 경로
+                         이벤트 루프마다 1개: ASGI 워커는 1개, WSGI는 처리 중인 요청마다 1개(요청 끝에서 닫힘)
+    ASGI 기준 워커당 최대 PG_POOL_MAX + PG_BINARY_POOL_MAX + PG_ASYNC_POOL_MAX
+    → 워커 수를 곱한 값(+ Django 커넥션)이 Postgres max_connections 안에 들어와야 한다
+'''
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import psycopg2
+from dotenv import load_dotenv
+from pgvector.psycopg2 import register_vector
+from psycopg2 import pool
+
+load_dotenv()
+
+
+class _VectorThreadedPool(pool.ThreadedConnectionPool):
+    """커넥션 생성 시 vector 타입을 등록하고 생성 시각을 기록하는 ThreadedConnectionPool"""
+
+    def __init__(self, *args, **kwargs):
+        self.created_at: Dict[int, float] = {}
+        self.checked_at: Dict[int, float] = {}
+        super().__init__(*args, **kwargs)
+
+    def _connect(self, key=None):
+        conn = super()._connect(key)
+        register_vector(conn)
+        # register_vector가 연 트랜잭션을 정리해 IDLE 상태로 풀에 넣는다
+        conn.commit()
+        now = time.monotonic()
+        self.created_at[id(conn)] = now
+        self.checked_at[id(conn)] = now
+        return conn
+
+    def forget(self, conn) -> None:
+        self.created_at.pop(id(conn), None)
+        self.checked_at.pop(id(conn), None)
+
+
+class VectorConnectionPool:
+    """
+    pgvector 전용 커넥션 풀
+
+    - ThreadedConnectionPool 기반 (SimpleConnectionPool과 달리 스레드 안전)
+    - 풀이 가득 차면 PoolError 대신 timeout까지 대기
+    - 대여 시점에 닫힌 커넥션/수명 초과 커넥션은 폐기 후 재생성
+    - health_check_interval 이상 놀던 커넥션은 SELECT 1로 확인
+
+    get_connection / put_connection 인터페이스로 CustomPGVector 등에 그대로 주입할 수 있다.
+    """
+
+    def __init__(
+        self,
+        minconn: int = 1,
+        maxconn: int = 10,
+        max_lifetime: float = 1800.0,
+        health_check_interval: float = 30.0,
+        acquire_timeout: float = 10.0,
+        **conn_kwargs,
+    ):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self.conn_kwargs = conn_kwargs
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._pool: Optional[_VectorThreadedPool] = None
+        self._pid: Optional[int] = None
+
+    # ------------------------------------------------------------------ 내부
+    def _get_pool(self) -> _VectorThreadedPool:
+        pid = os.getpid()
+        if self._pool is None or self._pid != pid:
+            with self._lock:
+                if self._pool is None or self._pid != pid:
+                    # fork된 자식 프로세스는 부모의 소켓을 공유하면 안 되므로 새 풀 생성
+                    self._pool = _VectorThreadedPool(self.minconn, self.maxconn, **self.conn_kwargs)
+                    self._pid = pid
+                    self._slots = threading.BoundedSemaphore(self.maxconn)
+        return self._pool
+
+    def _is_healthy(self, pg_pool: _VectorThreadedPool, conn) -> bool:
+        if conn.closed:
+            return False
+        now = time.monotonic()
+        created = pg_pool.created_at.get(id(conn), now)
+        if self.max_lifetime and now - created > self.max_lifetime:
+            return False
+        if now - pg_pool.checked_at.get(id(conn), now) >= self.health_check_interval:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT 1")
+                conn.rollback()
+            except psycopg2.Error:
+                return False
+            pg_pool.checked_at[id(conn)] = now
+        return True
+
+    # ------------------------------------------------------------------ 공개 API
+    def get_connection(self):
+        # fork 감지/풀 재생성을 먼저 해야 자식 프로세스의 세마포어로 대기한다
+        pg_pool = self._get_pool()
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise pool.PoolError(f"커넥션 풀 대기 시간 초과 ({self.acquire_timeout}s, maxconn={self.maxconn})")
+        try:
+            conn = pg_pool.getconn()
+            # 유휴 커넥션이 여러 개 끊겨 있을 수 있으므로 건강한 커넥션이 나올 때까지 교체
+            for _ in range(self.maxconn):
+                if self._is_healthy(pg_pool, conn):
+                    break
+                pg_pool.forget(conn)
+                pg_pool.putconn(conn, close=True)
+                conn = pg_pool.getconn()
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def put_connection(self, conn, close: bool = False) -> None:
+        pg_pool = self._pool
+        try:
+            if pg_pool is None or self._pid != os.getpid():
+                conn.close()
+                return
+            if close or conn.closed:
+                pg_pool.forget(conn)
+            pg_pool.putconn(conn, close=close)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator["psycopg2.extensions.connection"]:
+        """
+        with pool.connection() as conn: 형태로 사용
+        정상 종료 시 commit, 예외 시 rollback 후 풀에 반납
+        """
+        conn = self.get_connection()
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except psycopg2.OperationalError:
+            broken = True
+            raise
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self.put_connection(conn, close=broken)
+
+    def close_all(self) -> None:
+        with self._lock:
+            if self._pool is not None and self._pid == os.getpid():
+                self._pool.closeall()
+            self._pool = None
+
+
+_vector_pool: Optional[VectorConnectionPool] = None
+_vector_pool_lock = threading.Lock()
+
+
+def get_vector_pool() -> VectorConnectionPool:
+    """
+    POSTGRES_* 환경변수(Django 설정과 동일)를 사용하는 프로세스 공용 풀
+    """
+    global _vector_pool
+    if _vector_pool is None:
+        with _vector_pool_lock:
+            if _vector_pool is None:
+                _vector_pool = VectorConnectionPool(
+                    minconn=int(os.getenv("PG_POOL_MIN", "1")),
+                    maxconn=int(os.getenv("PG_POOL_MAX", "10")),
+                    max_lifetime=float(os.getenv("PG_POOL_MAX_LIFETIME", "1800")),
+                    health_check_interval=float(os.getenv("PG_POOL_HEALTH_CHECK_INTERVAL", "30")),
+                    host=os.getenv("POSTGRES_HOST", "localhost"),
+                    port=os.getenv("POSTGRES_PORT", "5432"),
+                    dbname=os.getenv("POSTGRES_DB", "sknproject4"),
+                    user=os.getenv("POSTGRES_USER", "root"),
+                    password=os.getenv("POSTGRES_PASSWORD", "root1234"),
+                )
+    return _vector_pool
+
+
+@contextmanager
+def pg_connection() -> Iterator["psycopg2.extensions.connection"]:
+    """공용 풀에서 vector 타입이 등록된 커넥션을 빌려 쓰는 단축 함수"""
+    with get_vector_pool().connection() as conn:
+        yield conn
@@ -0,0 +1,361 @@
+'''
+목적: 검색 chunk 관련성 점수 (evaluate_chunk)
+역할:
+RelevanceScorer: (질문, retrieved_docs) → chunk별 0~1 점수
+CrossEncoderScorer: sentence-transformers CrossEncoder를 CPU에서 배치 추론, Platt scaling(a, b)으로 보정한 확률
+EmbeddingScorer: pgvector가 검색 시 계산한 질문-chunk 코사인 유사도 재사용 (모델 로드/추론 없음)
+LLMJudgeScorer: gpt-4o-mini 한 번 호출로 chunk별 점수 (graph 노드는 prompt / parse로 sync/async 직접 호출)
+SimilarityGate: 검색 유사도만으로 확실한 경우를 먼저 결정 (accept / reject), 애매한 경우만 점수기(judge) 호출
+RELEVANCE_MODE=cross_encoder | embedding | llm
+'''
+import math
+import os
+import re
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from dotenv import load_dotenv
+
+try:
+    from .tokens import truncate_tokens
+except ImportError:
+    try:
+        from rag.services.tokens import truncate_tokens
+    except ImportError:
+        from tokens import truncate_tokens
+
+load_dotenv()
+
+# 한국어 포함 다국어 MS MARCO 재순위 모델 (118M, CPU 추론 가능)
+DEFAULT_CROSS_ENCODER = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+RELEVANCE_MODES = ("cross_encoder", "embedding", "llm")
+# 모드별 기본 임계값 (is_relevant: 최고 점수 기준 / chunk 유지: chunk 점수 기준)
+DEFAULT_THRESHOLDS = {"cross_encoder": 0.5, "embedding": 0.45, "llm": 0.5}
+# LLM 판정 모델 / 프롬프트에 넣을 chunk별 최대 토큰 수
+LLM_JUDGE_MODEL = "gpt-4o-mini"
+LLM_JUDGE_CHUNK_TOKENS = 600
+
+
+class RelevanceScorer(ABC):
+    """
+    chunk별 관련성 점수기 인터페이스
+
+    - score(query, docs): docs(retrieved_docs)와 같은 순서의 0~1 점수
+    - threshold: 최고 점수가 이 값 이상이면 is_relevant
+    - chunk_threshold: 이 값 미만 chunk는 컨텍스트에서 제외
+    - min_chunks: 통과한 chunk가 이보다 적으면 is_relevant=False (rewrite_query)
+    - warm_up(): 모델 로드 (프로세스 시작 시 백그라운드 호출)
+    """
+
+    name = "base"
+
+    def __init__(self, threshold: float, chunk_threshold: Optional[float] = None, min_chunks: int = 1):
+        self.threshold = threshold
+        self.chunk_threshold = threshold if chunk_threshold is None else chunk_threshold
+        self.min_chunks = max(min_chunks, 1)
+
+    @abstractmethod
+    def score(self, query: str, docs: Sequence[Dict[str, Any]]) -> List[float]:
+        ...
+
+    def warm_up(self) -> None:
+        return None
+
+
+class EmbeddingScorer(RelevanceScorer):
+    """검색 단계의 코사인 유사도(metadata similarity → doc["score"])를 그대로 사용"""
+
+    name = "embedding"
+
+    def score(self, query: str, docs: Sequence[Dict[str, Any]]) -> List[float]:
+        return [float(doc.get("score") or 0.0) for doc in docs]
+
+
+class CrossEncoderScorer(RelevanceScorer):
+    """
+    (질문, chunk) 쌍을 CrossEncoder로 배치 채점
+    모델 출력(0~1)을 logit으로 되돌린 뒤 sigmoid(a * logit + b)로 보정 (a=1, b=0이면 그대로)
+    """
+
+    name = "cross_encoder"
+
+    def __init__(
+        self,
+        threshold: float,
+        chunk_threshold: Optional[float] = None,
+        min_chunks: int = 1,
+        model_name: str = DEFAULT_CROSS_ENCODER,
+        batch_size: int = 16,
+        max_length: int = 512,
+        calibration_a: float = 1.0,
+        calibration_b: float = 0.0,
+    ):
+        super().__init__(threshold, chunk_threshold, min_chunks)
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.calibration_a = calibration_a
+        self.calibration_b = calibration_b
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    try:
+                        from sentence_transformers import CrossEncoder
+                    except ImportError as exc:
+                        raise RuntimeError(
+                            "RELEVANCE_MODE=cross_encoder에는 sentence-transformers가 필요합니다."
+                        ) from exc
+                    self._model = CrossEncoder(self.model_name, max_length=self.max_length, device="cpu")
+                    print(f"• [Relevance] loaded {self.model_name}")
+        return self._model
+
+    def warm_up(self) -> None:
+        # 첫 추론 시 발생하는 지연(토크나이저/그래프 초기화)까지 미리 소모
+        self._load().predict([("warm up", "warm up")], batch_size=1, show_progress_bar=False)
+
+    def _calibrate(self, prob: float) -> float:
+        prob = min(max(prob, 1e-6), 1 - 1e-6)
+        logit = math.log(prob / (1 - prob))
+        return 1.0 / (1.0 + math.exp(-(self.calibration_a * logit + self.calibration_b)))
+
+    def score(self, query: str, docs: Sequence[Dict[str, Any]]) -> List[float]:
+        if not docs:
+            return []
+        pairs = [(query, doc.get("content") or "") for doc in docs]
+        raw = self._load().predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+        return [self._calibrate(float(value)) for value in raw]
+
+
+class LLMJudgeScorer(RelevanceScorer):
+    """
+    gpt-4o-mini chunk별 판정
+    evaluate_chunk 노드는 prompt() / parse()로 sync/async 호출을 직접 수행하고,
+    score()는 스크립트 등 노드 밖에서 쓰는 동기 경로
+    """
+
+    name = "llm"
+
+    def __init__(
+        self,
+        threshold: float,
+        chunk_threshold: Optional[float] = None,
+        min_chunks: int = 1,
+        model: str = LLM_JUDGE_MODEL,
+    ):
+        super().__init__(threshold, chunk_threshold, min_chunks)
+        self.model = model
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from openai import OpenAI
+
+                    self._client = OpenAI()
+        return self._client
+
+    def score(self, query: str, docs: Sequence[Dict[str, Any]]) -> List[float]:
+        if not docs:
+            return []
+        res = self._load().chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": self.prompt(query, docs)}],
+            temperature=0.0,
+        )
+        scores = self.parse(res.choices[0].message.content or "", len(docs))
+        if scores is None:
+            raise ValueError("LLM 판정 응답에서 chunk별 점수를 찾지 못했습니다.")
+        return scores
+
+    def prompt(self, query: str, docs: Sequence[Dict[str, Any]]) -> str:
+        chunks = "\n\n".join(
+            f"[chunk {i}]\n{truncate_tokens((doc.get('content') or '').strip(), LLM_JUDGE_CHUNK_TOKENS)}"
+            for i, doc in enumerate(docs, 1)
+        )
+        lines = "\n    ".join(f"{i}: [chunk {i} 점수]" for i in range(1, len(docs) + 1))
+        return f"""
+    질문: {query}
+
+    검색된 chunk:
+    ---
+    {chunks}
+    ---
+
+    각 chunk가 질문에 답변하는 데 관련이 있는지 0.0-1.0 점수로 평가하세요.
+
+    다음 형식으로만 답변하세요:
+    관련성: [높음/낮음]
+    {lines}
+    """
+
+    def parse(self, result: str, count: int) -> Optional[List[float]]:
+        """응답에서 chunk별 점수 추출 (일부라도 빠지면 None)"""
+        scores: Dict[int, float] = {}
+        for match in re.finditer(r"^\s*\[?(?:chunk\s*)?(\d+)\]?\s*[:：]\s*([01](?:\.\d+)?)", result, re.M):
+            index = int(match.group(1))
+            if 1 <= index <= count:
+                scores[index] = min(float(match.group(2)), 1.0)
+        if len(scores) != count:
+            return None
+        return [scores[i] for i in range(1, count + 1)]
+
+
+@dataclass
+class GateStats:
+    accepted: int = 0
+    rejected: int = 0
+    judged: int = 0
+
+    @property
+    def skip_rate(self) -> float:
+        """점수기(LLM) 호출 없이 결정된 비율"""
+        total = self.accepted + self.rejected + self.judged
+        return (self.accepted + self.rejected) / total if total else 0.0
+
+
+class SimilarityGate:
+    """
+    검색 코사인 유사도(doc["score"]) 기반 3단계 결정
+    - accept: 최고 유사도 >= accept_threshold 이고 reject_threshold 이상 chunk가 min_chunks개 이상
+    - reject: 최고 유사도 < reject_threshold (바로 rewrite_query)
+    - judge: 그 사이(gray zone)만 RELEVANCE_MODE 점수기로 평가
+    accept / reject에서는 reject_threshold를 chunk 기준으로 하는 EmbeddingScorer로 chunk를 정리한다.
+    임계값은 scripts/learn_relevance_gate.py로 피드백/판정 로그에서 학습
+    """
+
+    def __init__(self, accept_threshold: float, reject_threshold: float, min_chunks: int = 1):
+        self.accept_threshold = accept_threshold
+        self.reject_threshold = min(reject_threshold, accept_threshold)
+        self.scorer = EmbeddingScorer(self.reject_threshold, min_chunks=min_chunks)
+        self.scorer.name = "similarity_gate"
+        self.stats = GateStats()
+        self._lock = threading.Lock()
+
+    def decide(self, docs: Sequence[Dict[str, Any]]) -> str:
+        scores = self.scorer.score("", docs)
+        top = max(scores) if scores else 0.0
+        passing = sum(1 for score in scores if score >= self.reject_threshold)
+        if top < self.reject_threshold:
+            tier = "reject"
+        elif top >= self.accept_threshold and passing >= min(self.scorer.min_chunks, len(scores)):
+            tier = "accept"
+        else:
+            tier = "judge"
+        with self._lock:
+            if tier == "accept":
+                self.stats.accepted += 1
+            elif tier == "reject":
+                self.stats.rejected += 1
+            else:
+                self.stats.judged += 1
+        return tier
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            data = asdict(self.stats)
+            data["skip_rate"] = round(self.stats.skip_rate, 4)
+        data["accept_threshold"] = self.accept_threshold
+        data["reject_threshold"] = self.reject_threshold
+        return data
+
+
+def relevance_mode() -> str:
+    mode = os.getenv("RELEVANCE_MODE", "llm").lower()
+    return mode if mode in RELEVANCE_MODES else "llm"
+
+
+def _thresholds(mode: str) -> Tuple[float, Optional[float]]:
+    # RELEVANCE_THRESHOLD는 설정된 모드의 점수 척도 기준이므로, 대체 판정기(llm)에는 기본값 사용
+    if mode != relevance_mode():
+        return DEFAULT_THRESHOLDS[mode], None
+    threshold = float(os.getenv("RELEVANCE_THRESHOLD") or DEFAULT_THRESHOLDS[mode])
+    chunk_threshold = os.getenv("RELEVANCE_CHUNK_THRESHOLD")
+    return threshold, float(chunk_threshold) if chunk_threshold else None
+
+
+_scorers: Dict[str, RelevanceScorer] = {}
+_scorer_lock = threading.Lock()
+
+
+def get_relevance_scorer(mode: Optional[str] = None) -> RelevanceScorer:
+    """
+    환경변수 기반 프로세스 공용 관련성 점수기 (mode 생략 시 RELEVANCE_MODE)
+    - RELEVANCE_MODE: cross_encoder | embedding | llm (기본 llm)
+    - RELEVANCE_THRESHOLD: is_relevant 기준 최고 점수 (cross_encoder 0.5, embedding 0.45, llm 0.5)
+    - RELEVANCE_CHUNK_THRESHOLD: chunk 유지 기준 점수 (기본 RELEVANCE_THRESHOLD)
+    - RELEVANCE_MIN_CHUNKS: 유지된 chunk가 이보다 적으면 rewrite_query (기본 1)
+    - RELEVANCE_MODEL / RELEVANCE_BATCH_SIZE: CrossEncoder 모델 / 배치 크기 (기본 16)
+    - RELEVANCE_CALIBRATION_A / _B: Platt scaling 계수 (기본 1, 0)
+    """
+    mode = mode or relevance_mode()
+    scorer = _scorers.get(mode)
+    if scorer is None:
+        with _scorer_lock:
+            scorer = _scorers.get(mode)
+            if scorer is None:
+                threshold, chunk_threshold = _thresholds(mode)
+                min_chunks = int(os.getenv("RELEVANCE_MIN_CHUNKS", "1"))
+                if mode == "embedding":
+                    scorer = EmbeddingScorer(threshold, chunk_threshold, min_chunks)
+                elif mode == "cross_encoder":
+                    scorer = CrossEncoderScorer(
+                        threshold,
+                        chunk_threshold,
+                        min_chunks,
+                        model_name=os.getenv("RELEVANCE_MODEL", DEFAULT_CROSS_ENCODER),
+                        batch_size=int(os.getenv("RELEVANCE_BATCH_SIZE", "16")),
+                        calibration_a=float(os.getenv("RELEVANCE_CALIBRATION_A", "1.0")),
+                        calibration_b=float(os.getenv("RELEVANCE_CALIBRATION_B", "0.0")),
+                    )
+                else:
+                    scorer = LLMJudgeScorer(threshold, chunk_threshold, min_chunks)
+                _scorers[mode] = scorer
+    return scorer
+
+
+_gate: Optional[SimilarityGate] = None
+_gate_lock = threading.Lock()
+
+
+def get_similarity_gate() -> Optional[SimilarityGate]:
+    """
+    검색 유사도 게이트 (RELEVANCE_GATE_ACCEPT / RELEVANCE_GATE_REJECT가 모두 설정된 경우만)
+    RELEVANCE_MODE=embedding이면 점수기 자체가 유사도이므로 사용하지 않음
+    """
+    global _gate
+    accept = os.getenv("RELEVANCE_GATE_ACCEPT")
+    reject = os.getenv("RELEVANCE_GATE_REJECT")
+    if not accept or not reject or relevance_mode() == "embedding":
+        return None
+    if _gate is None:
+        with _gate_lock:
+            if _gate is None:
+                _gate = SimilarityGate(
+                    float(accept),
+                    float(reject),
+                    min_chunks=int(os.getenv("RELEVANCE_MIN_CHUNKS", "1")),
+                )
+    return _gate
+
+
+def warm_relevance_scorer() -> None:
+    """프로세스 시작 시 관련성 모델을 백그라운드에서 로드 (llm / embedding 모드는 할 일 없음)"""
+    scorer = get_relevance_scorer()
+    if scorer.name != "cross_encoder":
+        return
+
+    def _warm():
+        try:
+            scorer.warm_up()
+        except Exception as exc:
+            print(f"• [Relevance] warm-up failed: {exc}")
+
+    threading.Thread(target=_warm, name="relevance-warmup", daemon=True).start()
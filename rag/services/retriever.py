@@ -1,21 +1,74 @@
 
 
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import asyncio
 import json
+import os
+import re
 
+import numpy as np
 from langchain_core.documents import Document
 
 # 상대 import와 절대 import를 모두 지원 (Jupyter 노트북에서도 동작하도록)
 try:
-    from .embedder import get_embedding, get_pg_conn
+    from .embedder import aget_embedding, get_embedding, get_embeddings
+    from .pg_pool import pg_connection
+    from .index_manager import apply_search_params, search_param_statements
+    from .binary_search import get_async_binary_pool
+    from .mmr import maximal_marginal_relevance
+    from .lexical import extract_lexical_terms, index_terms, to_like_patterns
+    from .local_index import get_local_index
 except ImportError:
     # 상대 import가 실패하면 절대 import 시도 (패키지 외부에서 실행될 때)
     try:
-        from rag.services.embedder import get_embedding, get_pg_conn
+        from rag.services.embedder import aget_embedding, get_embedding, get_embeddings
+        from rag.services.pg_pool import pg_connection
+        from rag.services.index_manager import apply_search_params, search_param_statements
+        from rag.services.binary_search import get_async_binary_pool
+        from rag.services.mmr import maximal_marginal_relevance
+        from rag.services.lexical import extract_lexical_terms, index_terms, to_like_patterns
+        from rag.services.local_index import get_local_index
     except ImportError:
         # 같은 디렉토리에서 직접 실행될 때 (Jupyter 노트북 등)
-        from embedder import get_embedding, get_pg_conn
+        from embedder import aget_embedding, get_embedding, get_embeddings
+        from pg_pool import pg_connection
+        from index_manager import apply_search_params, search_param_statements
+        from binary_search import get_async_binary_pool
+        from mmr import maximal_marginal_relevance
+        from lexical import extract_lexical_terms, index_terms, to_like_patterns
+        from local_index import get_local_index
+
+
+@dataclass(slots=True)
+class SearchFilters:
+    """
+    c_id에서 파생된 생성 컬럼(source_spec, creation_year) 기반 검색 필터
+
+    - sources: source_spec 목록 (예: ["guide_kr"])
+    - year_from / year_to: 발행 연도 범위 (양 끝 포함). 지정하면 연도가 없는 문서는 제외
+    """
+    sources: Sequence[str] = ()
+    year_from: Optional[int] = None
+    year_to: Optional[int] = None
+
+    def is_empty(self) -> bool:
+        return not self.sources and self.year_from is None and self.year_to is None
+
+    def to_sql(self) -> Tuple[str, Dict[str, Any]]:
+        """(" AND ..." 조건절, 이름 기반 파라미터) 반환 - 인덱스가 걸린 생성 컬럼만 사용"""
+        clauses: List[str] = []
+        params: Dict[str, Any] = {}
+        if self.sources:
+            clauses.append("source_spec = ANY(%(f_sources)s)")
+            params["f_sources"] = list(self.sources)
+        if self.year_from is not None:
+            clauses.append("creation_year >= %(f_year_from)s")
+            params["f_year_from"] = int(self.year_from)
+        if self.year_to is not None:
+            clauses.append("creation_year <= %(f_year_to)s")
+            params["f_year_to"] = int(self.year_to)
+        return "".join(f" AND {clause}" for clause in clauses), params
 
 
 @dataclass(slots=True)
@@ -23,80 +76,579 @@ class VectorRetriever:
     table_name: str = "medical"
     default_k: int = 5
     min_similarity: Optional[float] = None
+    # ANN 인덱스 검색 파라미터 (None이면 서버 기본값 사용)
+    # hnsw.ef_search: 클수록 recall↑ latency↑ (기본 40, top_k 이상이어야 함)
+    # ivfflat.probes: 클수록 recall↑ latency↑ (기본 1)
+    ef_search: Optional[int] = None
+    probes: Optional[int] = None
+    # pgvector: Postgres ANN 검색 / local: mmap된 임베딩 행렬 정확 검색 (search()/search_many()에 적용)
+    backend: str = "pgvector"
 
     def search(
         self,
         query: str,
         top_k: Optional[int] = None,
         min_similarity: Optional[float] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        mmr: bool = False,
+        fetch_k: Optional[int] = None,
+        lambda_mult: float = 0.5,
+        filters: Optional[SearchFilters] = None,
+        statement_timeout_ms: Optional[int] = None,
     ) -> List[Document]:
+        """
+        쿼리와 유사한 문서 검색
+
+        Args:
+            mmr: True면 fetch_k개 후보를 가져와 MMR로 다양성 있는 top_k 선택
+                 (DB에 저장된 임베딩 사용, 후보 재임베딩 없음)
+            fetch_k: MMR 후보 수 (기본 max(20, top_k * 4), 지정값은 top_k 이상으로 보정)
+            lambda_mult: MMR 관련성/다양성 균형 (1 → 관련성, 0 → 다양성)
+            filters: 출처(source_spec)/연도 필터. ANN 쿼리 안에서 적용하며
+                     iterative index scan으로 필터 후에도 k개를 채운다
+
+            statement_timeout_ms: DB 검색 쿼리 상한(ms, 트랜잭션 한정). 초과 시 QueryCanceled 예외
+        """
         k = top_k or self.default_k
         threshold = (
             min_similarity if min_similarity is not None else self.min_similarity
         )
+        ef_search = ef_search if ef_search is not None else self.ef_search
+        probes = probes if probes is not None else self.probes
 
         query_vec = get_embedding(query)
-        sql = f"""
-            SELECT
-                content,
-                metadata,
-                embedding <=> %s::vector AS distance
-            FROM {self.table_name}
-            WHERE embedding IS NOT NULL
-            ORDER BY embedding <=> %s::vector
-            LIMIT %s;
+        limit = _mmr_fetch_limit(k, fetch_k) if mmr else k
+
+        rows = self._local_rows(query_vec, limit, filters, mmr) if self.backend == "local" else None
+        if rows is None:
+            rows = self._pgvector_rows(query_vec, limit, filters, mmr, ef_search, probes, statement_timeout_ms)
+        return self._search_documents(query_vec, rows, k, threshold, mmr, lambda_mult)
+
+    async def asearch(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        min_similarity: Optional[float] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        mmr: bool = False,
+        fetch_k: Optional[int] = None,
+        lambda_mult: float = 0.5,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[Document]:
         """
+        search의 비동기 버전 (graph.ainvoke / ASGI 경로)
+        AsyncOpenAI로 임베딩하고 psycopg3 AsyncConnectionPool로 조회한다.
+        로컬 인덱스 검색은 CPU 연산이므로 스레드에서 실행한다.
+        """
+        k = top_k or self.default_k
+        threshold = (
+            min_similarity if min_similarity is not None else self.min_similarity
+        )
+        ef_search = ef_search if ef_search is not None else self.ef_search
+        probes = probes if probes is not None else self.probes
+
+        query_vec = await aget_embedding(query)
+        limit = _mmr_fetch_limit(k, fetch_k) if mmr else k
 
-        conn = get_pg_conn()
+        rows = None
+        if self.backend == "local":
+            rows = await asyncio.to_thread(self._local_rows, query_vec, limit, filters, mmr)
+        if rows is None:
+            sql, params, iterative_scan = self._knn_query(query_vec, limit, filters, mmr)
+            rows = await _afetchall(
+                sql, params, ef_search=ef_search, probes=probes, iterative_scan=iterative_scan
+            )
+        return self._search_documents(query_vec, rows, k, threshold, mmr, lambda_mult)
+
+    def _search_documents(
+        self, query_vec, rows, k: int, threshold: Optional[float], mmr: bool, lambda_mult: float
+    ) -> List[Document]:
+        if mmr:
+            return self._select_mmr(query_vec, rows, k, threshold, lambda_mult)
+
+        docs: List[Document] = []
+        for doc_id, content, metadata, distance in rows:
+            doc = _to_document(doc_id, content, metadata, distance, threshold)
+            if doc is not None:
+                docs.append(doc)
+        return docs
+
+    def _local_rows(self, query_vec, limit: int, filters: Optional[SearchFilters], mmr: bool) -> Optional[list]:
+        """로컬 인덱스 검색. 인덱스가 없거나 열 수 없으면 None (pgvector로 대체)"""
         try:
+            return get_local_index().search(query_vec, k=limit, filters=filters, with_embedding=mmr)
+        except Exception as e:
+            print(f"• [Retrieve] local index unavailable, fallback to pgvector: {e}")
+            return None
+
+    def _pgvector_rows(
+        self,
+        query_vec,
+        limit: int,
+        filters: Optional[SearchFilters],
+        mmr: bool,
+        ef_search: Optional[int],
+        probes: Optional[int],
+        statement_timeout_ms: Optional[int] = None,
+    ) -> list:
+        sql, params, iterative_scan = self._knn_query(query_vec, limit, filters, mmr)
+
+        # 공용 커넥션 풀 사용 (vector 타입 사전 등록, 매 쿼리 connect/close 비용 제거)
+        with pg_connection() as conn:
             with conn.cursor() as cur:
-                cur.execute(sql, (query_vec, query_vec, k))
+                # 쿼리 단위로 ANN 파라미터 설정 (트랜잭션 종료 시 자동 해제)
+                apply_search_params(
+                    cur,
+                    ef_search=ef_search,
+                    probes=probes,
+                    iterative_scan=iterative_scan,
+                    statement_timeout_ms=statement_timeout_ms,
+                )
+                cur.execute(sql, params)
+                return cur.fetchall()
+
+    def _knn_query(
+        self, query_vec, limit: int, filters: Optional[SearchFilters], mmr: bool
+    ) -> Tuple[str, Dict[str, Any], Optional[str]]:
+        """kNN 검색 SQL, 파라미터, iterative_scan 설정 (동기/비동기 경로 공용)"""
+        filter_sql, params = _filter_sql(filters)
+        params.update({"q": query_vec, "limit": limit})
+        embedding_col = ", embedding" if mmr else ""
+        # 필터 검색 시 relaxed_order iterative scan은 순서가 약간 어긋날 수 있으므로
+        # MATERIALIZED CTE로 kNN 결과를 고정한 뒤 바깥에서 거리순으로 다시 정렬한다
+        sql = f"""
+            WITH knn AS MATERIALIZED (
+                SELECT
+                    id,
+                    content,
+                    metadata,
+                    embedding <=> %(q)s::vector AS distance
+                    {embedding_col}
+                FROM {self.table_name}
+                WHERE embedding IS NOT NULL{filter_sql}
+                ORDER BY embedding <=> %(q)s::vector
+                LIMIT %(limit)s
+            )
+            SELECT id, content, metadata, distance{embedding_col}
+            FROM knn
+            ORDER BY distance;
+        """
+        return sql, params, "relaxed_order" if filter_sql else None
+
+    def _select_mmr(self, query_vec, rows, k: int, threshold: Optional[float], lambda_mult: float) -> List[Document]:
+        """임계값을 통과한 후보 중 MMR로 k개 선택 (선택 순서 유지)"""
+        candidates = []
+        for doc_id, content, metadata, distance, embedding in rows:
+            doc = _to_document(doc_id, content, metadata, distance, threshold)
+            if doc is not None:
+                candidates.append((doc, embedding))
+        if not candidates:
+            return []
+
+        selected = maximal_marginal_relevance(
+            query_vec,
+            np.stack([np.asarray(embedding, dtype=np.float32) for _, embedding in candidates]),
+            k=k,
+            lambda_mult=lambda_mult,
+        )
+        return [candidates[idx][0] for idx in selected]
+
+    def search_hybrid(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        min_similarity: Optional[float] = None,
+        candidate_k: int = 30,
+        rrf_k: int = 60,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        filters: Optional[SearchFilters] = None,
+        statement_timeout_ms: Optional[int] = None,
+    ) -> List[Document]:
+        """
+        어휘(pg_trgm ILIKE) + 벡터(kNN) 하이브리드 검색
+
+        - 벡터 후보: 코사인 거리 상위 candidate_k개
+        - 어휘 후보: 질문의 핵심어(약물명/유전자 기호/약어/한국어 어간)를 포함한 청크를
+                     일치 가중치 합(영문 용어 2점, 한글 1점) 순으로 candidate_k개
+                     후보 조건(trigram 인덱스)은 3글자 이상 용어로만 걸고, 짧은 용어("당뇨")는 점수에만 반영
+        - 두 랭킹을 SQL 안에서 RRF로 통합 (DB 왕복 1회)
+
+        인덱스를 탈 수 있는 어휘 검색어가 없으면 어휘 후보 없이 벡터 검색과 같은 결과를 반환한다.
+        filters는 두 후보 목록 모두에 적용한다 (search와 동일). statement_timeout_ms도 search와 동일.
+        metadata에 rrf_score, vector_rank, lexical_rank(해당 목록에 없으면 None) 추가
+        """
+        k = top_k or self.default_k
+        threshold = (
+            min_similarity if min_similarity is not None else self.min_similarity
+        )
+        ef_search = ef_search if ef_search is not None else self.ef_search
+        probes = probes if probes is not None else self.probes
+        candidate_k = max(candidate_k, k)
+
+        query_vec = np.asarray(get_embedding(query), dtype=np.float32)
+        sql, params, iterative_scan = self._hybrid_query(query, query_vec, k, candidate_k, rrf_k, filters)
+
+        with pg_connection() as conn:
+            with conn.cursor() as cur:
+                apply_search_params(
+                    cur,
+                    ef_search=ef_search,
+                    probes=probes,
+                    iterative_scan=iterative_scan,
+                    statement_timeout_ms=statement_timeout_ms,
+                )
+                cur.execute(sql, params)
                 rows = cur.fetchall()
-        finally:
-            conn.close()
+        return _hybrid_documents(rows, threshold)
 
-        docs: List[Document] = []
-        for content, metadata, distance in rows:
-            # 코사인 거리(distance)를 유사도(similarity)로 변환
-            # distance: 0에 가까울수록 유사, 1에 가까울수록 비유사
-            # similarity: 1에 가까울수록 유사, 0에 가까울수록 비유사 (사용자가 보기에 더 직관적)
-            similarity = 1.0 - float(distance) if distance is not None else None
-            
-            # 최소 유사도 임계값 필터링
-            if threshold is not None and similarity is not None and similarity < threshold:
-                continue
-
-            # metadata가 JSONB이므로 dict로 파싱하여 c_id 추출
-            c_id = None
-            if metadata and isinstance(metadata, dict):
-                c_id = metadata.get("c_id")
-            elif metadata and isinstance(metadata, str):
-                # 문자열인 경우 JSON 파싱 시도
-                try:
-                    metadata_dict = json.loads(metadata)
-                    c_id = metadata_dict.get("c_id") if isinstance(metadata_dict, dict) else None
-                except (json.JSONDecodeError, TypeError):
-                    pass
-
-            # 사용자와 LLM에게 전달할 Document 생성
-            # 유사도 정보를 포함하여 더 직관적인 정보 제공
-            docs.append(
-                Document(
-                    page_content=content,
-                    metadata={
-                        "c_id": c_id,
-                        "similarity": similarity,  # 거리 대신 유사도로 전달
-                    },
+    async def asearch_hybrid(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        min_similarity: Optional[float] = None,
+        candidate_k: int = 30,
+        rrf_k: int = 60,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        filters: Optional[SearchFilters] = None,
+    ) -> List[Document]:
+        """search_hybrid의 비동기 버전"""
+        k = top_k or self.default_k
+        threshold = (
+            min_similarity if min_similarity is not None else self.min_similarity
+        )
+        ef_search = ef_search if ef_search is not None else self.ef_search
+        probes = probes if probes is not None else self.probes
+        candidate_k = max(candidate_k, k)
+
+        query_vec = np.asarray(await aget_embedding(query), dtype=np.float32)
+        sql, params, iterative_scan = self._hybrid_query(query, query_vec, k, candidate_k, rrf_k, filters)
+        rows = await _afetchall(
+            sql, params, ef_search=ef_search, probes=probes, iterative_scan=iterative_scan
+        )
+        return _hybrid_documents(rows, threshold)
+
+    def _hybrid_query(
+        self,
+        query: str,
+        query_vec: np.ndarray,
+        k: int,
+        candidate_k: int,
+        rrf_k: int,
+        filters: Optional[SearchFilters],
+    ) -> Tuple[str, Dict[str, Any], Optional[str]]:
+        """하이브리드(RRF) 검색 SQL, 파라미터, iterative_scan 설정 (동기/비동기 경로 공용)"""
+        terms = extract_lexical_terms(query)
+        index_patterns = to_like_patterns(index_terms(terms))
+        filter_sql, params = _filter_sql(filters)
+        params.update({
+            "q": query_vec,
+            "patterns": to_like_patterns(terms),
+            "index_patterns": index_patterns,
+            # 영문/숫자 용어(EGFR, MMP-9 ...)는 정확 일치 신호가 강하므로 가중치 2
+            "weights": [2.0 if re.search(r"[A-Za-z0-9]", term) else 1.0 for term in terms],
+            "candidate_k": candidate_k,
+            "rrf_k": rrf_k,
+            "k": k,
+        })
+        if index_patterns:
+            lex_sql = f"""
+                SELECT id, row_number() OVER (ORDER BY lex_score DESC, id) AS rnk
+                FROM (
+                    SELECT
+                        m.id,
+                        (
+                            SELECT sum(p.w)
+                            FROM unnest(%(patterns)s::text[], %(weights)s::float8[]) AS p(pat, w)
+                            WHERE m.content ILIKE p.pat
+                        ) AS lex_score
+                    FROM {self.table_name} m
+                    WHERE m.content ILIKE ANY(%(index_patterns)s::text[]){filter_sql}
+                    ORDER BY lex_score DESC, m.id
+                    LIMIT %(candidate_k)s
+                ) l
+            """
+        else:
+            # 짧은 용어만 있으면 인덱스로 후보를 좁힐 수 없어 전체 스캔이 되므로 어휘 후보를 생략
+            lex_sql = "SELECT NULL::bigint AS id, NULL::bigint AS rnk WHERE false"
+        sql = f"""
+            WITH vec AS (
+                SELECT id, row_number() OVER (ORDER BY distance) AS rnk
+                FROM (
+                    SELECT id, embedding <=> %(q)s::vector AS distance
+                    FROM {self.table_name}
+                    WHERE embedding IS NOT NULL{filter_sql}
+                    ORDER BY embedding <=> %(q)s::vector
+                    LIMIT %(candidate_k)s
+                ) v
+            ),
+            lex AS ({lex_sql}),
+            fused AS (
+                SELECT
+                    COALESCE(vec.id, lex.id) AS id,
+                    COALESCE(1.0 / (%(rrf_k)s + vec.rnk), 0)
+                        + COALESCE(1.0 / (%(rrf_k)s + lex.rnk), 0) AS rrf_score,
+                    vec.rnk AS vector_rank,
+                    lex.rnk AS lexical_rank
+                FROM vec
+                FULL OUTER JOIN lex ON lex.id = vec.id
+                ORDER BY rrf_score DESC
+                LIMIT %(k)s
+            )
+            SELECT
+                m.id,
+                m.content,
+                m.metadata,
+                m.embedding <=> %(q)s::vector AS distance,
+                f.rrf_score,
+                f.vector_rank,
+                f.lexical_rank
+            FROM fused f
+            JOIN {self.table_name} m ON m.id = f.id
+            ORDER BY f.rrf_score DESC;
+        """
+        return sql, params, "relaxed_order" if filter_sql else None
+
+    def search_many(
+        self,
+        queries: Sequence[str],
+        top_k: Optional[int] = None,
+        min_similarity: Optional[float] = None,
+        fused_k: Optional[int] = None,
+        rrf_k: int = 60,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        filters: Optional[SearchFilters] = None,
+    ) -> "MultiQueryResult":
+        """
+        여러 쿼리(원 질문 + 재작성/후속 질문 등)를 한 번에 검색
+
+        - 임베딩: 모든 쿼리를 한 번의 임베딩 API 호출로 변환 (캐시 적중분 제외)
+        - 검색: backend="local"이면 로컬 인덱스, 아니면 unnest(vector[]) + LATERAL kNN으로 DB 왕복 1회
+        - 결과: 쿼리별 결과 + Reciprocal Rank Fusion(RRF) 통합 랭킹
+
+        Args:
+            queries: 검색 쿼리 목록 (빈 문자열/중복은 제외)
+            top_k: 쿼리별 반환 문서 수
+            min_similarity: 최소 유사도
+            fused_k: 통합 랭킹 문서 수 (기본 top_k)
+            rrf_k: RRF 상수 (score = Σ 1 / (rrf_k + rank))
+            filters: search()와 같은 출처/연도 필터 (필터 시 iterative index scan 사용)
+        """
+        k = top_k or self.default_k
+        threshold = (
+            min_similarity if min_similarity is not None else self.min_similarity
+        )
+        ef_search = ef_search if ef_search is not None else self.ef_search
+        probes = probes if probes is not None else self.probes
+        unique_queries = list(dict.fromkeys(q.strip() for q in queries if q and q.strip()))
+        if not unique_queries:
+            return MultiQueryResult(queries=[], per_query=[], fused=[])
+
+        vectors = [np.asarray(vec, dtype=np.float32) for vec in get_embeddings(unique_queries)]
+
+        rows_per_query: Optional[List[list]] = None
+        if self.backend == "local":
+            rows_per_query = []
+            for vec in vectors:
+                rows = self._local_rows(vec, k, filters, False)
+                if rows is None:
+                    rows_per_query = None
+                    break
+                rows_per_query.append(rows)
+        if rows_per_query is None:
+            rows_per_query = self._pgvector_many_rows(vectors, k, filters, ef_search, probes)
+
+        per_query: List[List[Document]] = []
+        for rows in rows_per_query:
+            per_query.append(self._search_documents(None, rows, k, threshold, False, 0.0))
+
+        return MultiQueryResult(
+            queries=unique_queries,
+            per_query=per_query,
+            fused=reciprocal_rank_fusion(per_query, limit=fused_k or k, rrf_k=rrf_k),
+        )
+
+    def _pgvector_many_rows(
+        self,
+        vectors: List[Any],
+        limit: int,
+        filters: Optional[SearchFilters],
+        ef_search: Optional[int],
+        probes: Optional[int],
+    ) -> List[list]:
+        """쿼리 벡터 여러 개를 LATERAL kNN 한 번으로 검색 → 쿼리별 (id, content, metadata, distance) 행"""
+        filter_sql, params = _filter_sql(filters)
+        params.update({"qs": vectors, "limit": limit})
+        sql = f"""
+            SELECT q.ord, hit.id, hit.content, hit.metadata, hit.distance
+            FROM unnest(%(qs)s::vector[]) WITH ORDINALITY AS q(vec, ord)
+            CROSS JOIN LATERAL (
+                SELECT id, content, metadata, embedding <=> q.vec AS distance
+                FROM {self.table_name}
+                WHERE embedding IS NOT NULL{filter_sql}
+                ORDER BY embedding <=> q.vec
+                LIMIT %(limit)s
+            ) AS hit
+            ORDER BY q.ord, hit.distance;
+        """
+
+        with pg_connection() as conn:
+            with conn.cursor() as cur:
+                apply_search_params(
+                    cur,
+                    ef_search=ef_search,
+                    probes=probes,
+                    iterative_scan="relaxed_order" if filter_sql else None,
                 )
+                cur.execute(sql, params)
+                rows = cur.fetchall()
+
+        rows_per_query: List[list] = [[] for _ in vectors]
+        for ord_, doc_id, content, metadata, distance in rows:
+            rows_per_query[ord_ - 1].append((doc_id, content, metadata, distance))
+        return rows_per_query
+
+
+@dataclass(slots=True)
+class MultiQueryResult:
+    queries: List[str]
+    per_query: List[List[Document]]  # queries와 같은 순서
+    fused: List[Document]  # RRF 통합 랭킹
+
+
+def _mmr_fetch_limit(k: int, fetch_k: Optional[int]) -> int:
+    """MMR 후보 수: 지정한 fetch_k를 그대로 쓰되 k보다 작으면 k (미지정이면 max(20, k * 4))"""
+    if fetch_k is None:
+        return max(20, k * 4)
+    return max(fetch_k, k)
+
+
+def _filter_sql(filters: Optional[SearchFilters]) -> Tuple[str, Dict[str, Any]]:
+    if filters is None or filters.is_empty():
+        return "", {}
+    return filters.to_sql()
+
+
+async def _afetchall(sql: str, params: Dict[str, Any], **search_params) -> list:
+    """비동기 커넥션 풀에서 ANN 파라미터 설정 후 쿼리 실행 (트랜잭션 종료 시 설정 해제)"""
+    pool = await get_async_binary_pool()
+    async with pool.connection() as conn:
+        async with conn.cursor() as cur:
+            for statement, args in search_param_statements(**search_params):
+                await cur.execute(statement, args)
+            await cur.execute(sql, params)
+            return await cur.fetchall()
+
+
+def _hybrid_documents(rows, threshold: Optional[float]) -> List[Document]:
+    docs: List[Document] = []
+    for doc_id, content, metadata, distance, rrf_score, vector_rank, lexical_rank in rows:
+        # 어휘로만 찾은 문서도 임계값 판단은 실제 코사인 유사도로 한다
+        doc = _to_document(doc_id, content, metadata, distance, threshold)
+        if doc is None:
+            continue
+        doc.metadata.update(
+            {
+                "rrf_score": round(float(rrf_score), 6),
+                "vector_rank": vector_rank,
+                "lexical_rank": lexical_rank,
+            }
+        )
+        docs.append(doc)
+    return docs
+
+
+def _extract_c_id(metadata) -> Optional[str]:
+    # metadata가 JSONB이므로 dict로 파싱하여 c_id 추출
+    if metadata and isinstance(metadata, dict):
+        return metadata.get("c_id")
+    if metadata and isinstance(metadata, str):
+        # 문자열인 경우 JSON 파싱 시도
+        try:
+            metadata_dict = json.loads(metadata)
+            return metadata_dict.get("c_id") if isinstance(metadata_dict, dict) else None
+        except (json.JSONDecodeError, TypeError):
+            pass
+    return None
+
+
+def _to_document(doc_id, content, metadata, distance, threshold: Optional[float]) -> Optional[Document]:
+    # 코사인 거리(distance)를 유사도(similarity)로 변환
+    # distance: 0에 가까울수록 유사, 1에 가까울수록 비유사
+    # similarity: 1에 가까울수록 유사, 0에 가까울수록 비유사 (사용자가 보기에 더 직관적)
+    similarity = 1.0 - float(distance) if distance is not None else None
+
+    # 최소 유사도 임계값 필터링
+    if threshold is not None and similarity is not None and similarity < threshold:
+        return None
+
+    # 사용자와 LLM에게 전달할 Document 생성
+    # 유사도 정보를 포함하여 더 직관적인 정보 제공
+    return Document(
+        page_content=content,
+        metadata={
+            "id": doc_id,
+            "c_id": _extract_c_id(metadata),
+            "similarity": similarity,  # 거리 대신 유사도로 전달
+        },
+    )
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: Sequence[Sequence[Document]],
+    limit: int,
+    rrf_k: int = 60,
+) -> List[Document]:
+    """
+    여러 랭킹 결과를 RRF로 통합 (문서 id 기준 중복 제거)
+    통합 문서의 similarity는 쿼리별 최고값, rrf_score/matched_queries를 metadata에 추가
+    """
+    scores: Dict[Any, float] = {}
+    best: Dict[Any, Document] = {}
+    hits: Dict[Any, int] = {}
+    for ranked in ranked_lists:
+        for rank, doc in enumerate(ranked, 1):
+            key = doc.metadata.get("id") or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            hits[key] = hits.get(key, 0) + 1
+            current = best.get(key)
+            if current is None or (doc.metadata.get("similarity") or 0.0) > (current.metadata.get("similarity") or 0.0):
+                best[key] = doc
+
+    fused: List[Document] = []
+    for key in sorted(scores, key=scores.get, reverse=True)[:limit]:
+        doc = best[key]
+        fused.append(
+            Document(
+                page_content=doc.page_content,
+                metadata={
+                    **doc.metadata,
+                    "rrf_score": round(scores[key], 6),
+                    "matched_queries": hits[key],
+                },
             )
-        return docs
+        )
+    return fused
 
 
 _retriever: Optional[VectorRetriever] = None
 
 
+def _env_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
 def get_vector_retriever() -> VectorRetriever:
     global _retriever
     if _retriever is None:
-        _retriever = VectorRetriever()
-    return _retriever
\ No newline at end of file
+        _retriever = VectorRetriever(
+            ef_search=_env_int("HNSW_EF_SEARCH"),
+            probes=_env_int("IVFFLAT_PROBES"),
+            backend=os.getenv("VECTOR_BACKEND", "pgvector").lower(),
+        )
+    return _retriever
@@ -0,0 +1,40 @@
+'''
+목적: 프롬프트 토큰 수 계산 (gpt-4o / gpt-5 계열 토크나이저 o200k_base)
+역할:
+answer cache 절약량 추정, 대화 이력 / 검색 컨텍스트 토큰 예산 등에서 공용으로 사용
+tiktoken 미설치 환경에서는 글자 수 기반으로 추정
+'''
+try:
+    import tiktoken
+except ImportError:  # tiktoken 미설치 환경: 글자 수 기반 추정
+    tiktoken = None
+
+_tiktoken_encoding = None
+
+
+def _encoding():
+    global _tiktoken_encoding
+    if _tiktoken_encoding is None:
+        _tiktoken_encoding = tiktoken.get_encoding("o200k_base")
+    return _tiktoken_encoding
+
+
+def count_tokens(text: str) -> int:
+    """gpt-4o / gpt-5 계열 토크나이저(o200k_base) 기준 토큰 수 (미설치 시 2글자당 1토큰 추정)"""
+    if not text:
+        return 0
+    if tiktoken is None:
+        return len(text) // 2
+    return len(_encoding().encode(text))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """앞에서부터 max_tokens 토큰까지만 남김 (미설치 시 2글자당 1토큰 기준)"""
+    if max_tokens <= 0:
+        return ""
+    if tiktoken is None:
+        return text[: max_tokens * 2]
+    tokens = _encoding().encode(text)
+    if len(tokens) <= max_tokens:
+        return text
+    return _encoding().decode(tokens[:max_tokens])
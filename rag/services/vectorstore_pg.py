@@ -3,9 +3,15 @@ from langchain_core.documents import Document
 import psycopg2.extras
 import json
 
+try:
+    from .pg_pool import get_vector_pool
+except ImportError:
+    from rag.services.pg_pool import get_vector_pool
+
 class CustomPGVector:
-    def __init__(self, db, embedding_fn, table: str = "medical"):
-        self.db = db
+    def __init__(self, db=None, embedding_fn=None, table: str = "medical"):
+        # db를 지정하지 않으면 retriever와 같은 공용 커넥션 풀 사용
+        self.db = db if db is not None else get_vector_pool()
         self.embedding_fn = embedding_fn
         self.table = table
 
@@ -0,0 +1,128 @@
+"""
+벡터 단독 검색 vs 하이브리드(pg_trgm 어휘 + 벡터, RRF) 검색 비교 벤치마크
+사용법:
+    python scripts/bench_hybrid_search.py                       # 내장 질의 세트
+    python scripts/bench_hybrid_search.py --queries q.jsonl     # {"query": ..., "terms": [...]} 한 줄씩
+    python scripts/bench_hybrid_search.py --k 5 --repeat 5
+
+지표:
+    hit@k   : 상위 k개 중 하나라도 기대 용어(terms)를 모두 포함하면 적중 (대소문자 무시)
+    latency : 검색 호출 시간 (임베딩은 미리 캐시에 올려 두어 DB 검색 시간만 비교)
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from rag.services.embedder import warm_embedding_cache  # noqa: E402
+from rag.services.lexical import extract_lexical_terms  # noqa: E402
+from rag.services.retriever import get_vector_retriever  # noqa: E402
+
+load_dotenv()
+
+# 약물명/유전자 기호/약어처럼 정확 일치가 중요한 질의
+DEFAULT_QUERIES = [
+    {"query": "EGFR 변이 폐암에서 1차 TKI 치료 후 PFS는?", "terms": ["EGFR"]},
+    {"query": "MMP-9 발현과 위암 예후의 관계", "terms": ["MMP-9"]},
+    {"query": "TIMP-2 발현이 림프절 전이에 미치는 영향", "terms": ["TIMP-2"]},
+    {"query": "MMP-2와 MMP-9를 함께 분석한 연구", "terms": ["MMP-2", "MMP-9"]},
+    {"query": "HER2 양성 유방암 환자의 치료 성적", "terms": ["HER2"]},
+    {"query": "ECOG 수행도 0~2 환자 대상 임상시험", "terms": ["ECOG"]},
+    {"query": "5-FU 기반 항암화학요법 부작용", "terms": ["5-FU"]},
+    {"query": "CEA 수치와 대장암 재발", "terms": ["CEA"]},
+    {"query": "Helicobacter pylori 제균 치료 성공률", "terms": ["pylori"]},
+    {"query": "조기위암 내시경 점막하 박리술(ESD) 합병증", "terms": ["ESD"]},
+]
+
+
+def _load_queries(path: str) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _is_hit(docs, terms) -> bool:
+    wanted = [t.lower() for t in terms]
+    return any(all(t in doc.page_content.lower() for t in wanted) for doc in docs)
+
+
+def _run(name: str, search, cases: list, repeat: int) -> dict:
+    hits = 0
+    latencies = []
+    for case in cases:
+        docs = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            docs = search(case["query"])
+            latencies.append((time.perf_counter() - started) * 1000)
+        hits += _is_hit(docs, case["terms"])
+
+    ordered = sorted(latencies)
+    return {
+        "name": name,
+        "hit_rate": hits / len(cases) if cases else 0.0,
+        "hits": hits,
+        "mean_ms": statistics.mean(latencies),
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터 vs 하이브리드 검색 hit rate / latency 비교")
+    parser.add_argument("--queries", help="JSONL 질의 파일 (query, terms 필드)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--candidate-k", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--verbose", action="store_true", help="질의별 어휘 검색어/적중 여부 출력")
+    args = parser.parse_args()
+
+    cases = _load_queries(args.queries) if args.queries else DEFAULT_QUERIES
+    retriever = get_vector_retriever()
+
+    # 임베딩 API 지연이 비교에 섞이지 않도록 미리 캐시에 적재
+    warm_embedding_cache([case["query"] for case in cases])
+
+    def vector_search(query):
+        return retriever.search(query, top_k=args.k)
+
+    def hybrid_search(query):
+        return retriever.search_hybrid(query, top_k=args.k, candidate_k=args.candidate_k)
+
+    # 콜드 캐시 영향 제거용 1회 실행
+    for case in cases:
+        vector_search(case["query"])
+        hybrid_search(case["query"])
+
+    if args.verbose:
+        for case in cases:
+            print(
+                f"- {case['query'][:40]:<40} terms={extract_lexical_terms(case['query'])} "
+                f"vector={_is_hit(vector_search(case['query']), case['terms'])} "
+                f"hybrid={_is_hit(hybrid_search(case['query']), case['terms'])}"
+            )
+
+    results = [
+        _run("vector", vector_search, cases, args.repeat),
+        _run("hybrid", hybrid_search, cases, args.repeat),
+    ]
+
+    print(f"\n[hybrid search] queries={len(cases)}, k={args.k}, repeat={args.repeat}")
+    print(f"{'method':<10} {'hit@k':>8} {'hits':>6} {'mean_ms':>10} {'p50_ms':>10} {'p95_ms':>10}")
+    for r in results:
+        print(
+            f"{r['name']:<10} {r['hit_rate']:>8.2%} {r['hits']:>6} "
+            f"{r['mean_ms']:>10.1f} {r['p50_ms']:>10.1f} {r['p95_ms']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
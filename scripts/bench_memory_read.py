@@ -0,0 +1,166 @@
+"""
+대화 메모리 읽기(memory_read) 벤치마크 - 대용량 합성 conversation_memory 테이블
+사용법:
+    python scripts/bench_memory_read.py                              # 20만 행, 대화창 2000개
+    python scripts/bench_memory_read.py --rows 1000000 --conversations 10000 --repeat 500
+
+비교 대상 (임시 SQLite 파일 2개에 같은 데이터 적재):
+    legacy  : ISO 문자열 timestamp, 인덱스 없음, COUNT(*) + ORDER BY timestamp DESC LIMIT (기존 _read_memory)
+    indexed : epoch 초(REAL) timestamp, (conversation_id, timestamp) 인덱스, LIMIT 조회 1회 (SQLiteMemoryStore.recent)
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from graph.memory_store import SQLiteMemoryStore  # noqa: E402
+
+LEGACY_SCHEMA = '''
+    CREATE TABLE conversation_memory (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        conversation_id TEXT,
+        timestamp TEXT NOT NULL,
+        original_question TEXT NOT NULL,
+        assistant_answer TEXT NOT NULL,
+        question_summary TEXT,
+        answer_summary TEXT,
+        conversation_type TEXT NOT NULL
+    )
+'''
+
+
+def _synthetic_rows(rows: int, conversations: int, seed: int = 42):
+    """(conversation_id, epoch 초, 질문, 답변, 질문 요약, 답변 요약, 유형)"""
+    rng = random.Random(seed)
+    started = time.time() - 90 * 86400
+    for i in range(rows):
+        conv_id = f"conv-{rng.randrange(conversations)}"
+        ts = started + i * (90 * 86400 / rows)
+        yield (
+            conv_id,
+            ts,
+            f"질문 {i}: 두통이 계속되는데 원인이 뭘까요?",
+            f"답변 {i}: " + "긴장성 두통, 편두통 등 여러 원인이 있습니다. " * 8,
+            f"질문 요약 {i}",
+            f"답변 요약 {i}",
+            "medical",
+        )
+
+
+def _load(path: str, legacy: bool, rows: int, conversations: int) -> None:
+    if legacy:
+        conn = sqlite3.connect(path)
+        conn.execute(LEGACY_SCHEMA)
+    else:
+        SQLiteMemoryStore(path).init_schema()
+        conn = sqlite3.connect(path)
+    data = _synthetic_rows(rows, conversations)
+    if legacy:
+        data = ((c, datetime.fromtimestamp(ts).isoformat(), *rest) for c, ts, *rest in data)
+    with conn:
+        conn.executemany('''
+            INSERT INTO conversation_memory
+            (conversation_id, timestamp, original_question, assistant_answer, question_summary, answer_summary, conversation_type)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', data)
+    conn.execute("ANALYZE")
+    conn.close()
+
+
+def _legacy_read(conn: sqlite3.Connection, conversation_id: str, limit: int):
+    total_count = conn.execute(
+        'SELECT COUNT(*) FROM conversation_memory WHERE conversation_id = ?', (conversation_id,)
+    ).fetchone()[0]
+    actual_limit = min(limit, total_count)
+    if actual_limit == 0:
+        return []
+    return conn.execute('''
+        SELECT question_summary, answer_summary, original_question, assistant_answer
+        FROM conversation_memory
+        WHERE conversation_id = ?
+        ORDER BY timestamp DESC
+        LIMIT ?
+    ''', (conversation_id, actual_limit)).fetchall()
+
+
+def _timeit(fn, conversation_ids, limit: int) -> list:
+    samples = []
+    for conversation_id in conversation_ids:
+        started = time.perf_counter()
+        fn(conversation_id, limit)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _print_row(name: str, samples: list):
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"{name:<10} {statistics.mean(samples):>10.3f} {statistics.median(samples):>10.3f} {p95:>10.3f}")
+
+
+def _print_plan(conn: sqlite3.Connection, sql: str, params):
+    for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params):
+        print(f"    {row[-1]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="conversation_memory 읽기 벤치마크")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--conversations", type=int, default=2_000)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_memory_")
+    legacy_path = os.path.join(workdir, "legacy.db")
+    indexed_path = os.path.join(workdir, "indexed.db")
+
+    print(f"[load] rows={args.rows}, conversations={args.conversations} → {workdir}")
+    started = time.perf_counter()
+    _load(legacy_path, True, args.rows, args.conversations)
+    _load(indexed_path, False, args.rows, args.conversations)
+    print(f"[load] done in {time.perf_counter() - started:.1f}s")
+
+    rng = random.Random(7)
+    conversation_ids = [f"conv-{rng.randrange(args.conversations)}" for _ in range(args.repeat)]
+
+    legacy_conn = sqlite3.connect(legacy_path)
+    store = SQLiteMemoryStore(indexed_path)
+
+    # 결과 동일성 확인 (같은 데이터, 같은 순서)
+    for conversation_id in conversation_ids[:20]:
+        assert _legacy_read(legacy_conn, conversation_id, args.limit) == store.recent(conversation_id, args.limit)
+
+    print("\n[query plan]")
+    print("  legacy:")
+    _print_plan(legacy_conn, "SELECT COUNT(*) FROM conversation_memory WHERE conversation_id = ?", ("conv-0",))
+    _print_plan(
+        legacy_conn,
+        "SELECT * FROM conversation_memory WHERE conversation_id = ? ORDER BY timestamp DESC LIMIT ?",
+        ("conv-0", args.limit),
+    )
+    print("  indexed:")
+    _print_plan(
+        sqlite3.connect(indexed_path),
+        "SELECT * FROM conversation_memory WHERE conversation_id = ? ORDER BY timestamp DESC LIMIT ?",
+        ("conv-0", args.limit),
+    )
+
+    print(f"\n[memory_read] limit={args.limit}, repeat={args.repeat}")
+    print(f"{'method':<10} {'mean_ms':>10} {'p50_ms':>10} {'p95_ms':>10}")
+    _print_row("legacy", _timeit(lambda c, n: _legacy_read(legacy_conn, c, n), conversation_ids, args.limit))
+    _print_row("indexed", _timeit(store.recent, conversation_ids, args.limit))
+
+
+if __name__ == "__main__":
+    main()
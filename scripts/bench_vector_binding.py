@@ -0,0 +1,138 @@
+"""
+쿼리 벡터 전달 방식별 직렬화 + 파싱 비용 마이크로 벤치마크
+사용법:
+    python scripts/bench_vector_binding.py                # 클라이언트 직렬화만 측정
+    python scripts/bench_vector_binding.py --db --k 5     # DB 왕복(파싱 포함)까지 측정
+
+비교 대상:
+    text_x2   : "[" + ",".join(map(str, v)) + "]" 문자열을 SELECT/ORDER BY에 두 번 전달 (기존 CustomVectorStore)
+    binary_x1 : numpy float32 → pgvector 바이너리 포맷으로 한 번만 바인딩 (BinaryVectorSearch)
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+from dotenv import load_dotenv
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from pgvector import Vector  # noqa: E402
+
+load_dotenv()
+
+
+def _timeit(fn, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return samples
+
+
+def _print_row(name: str, samples: list, payload_bytes: int = None):
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    payload = f"{payload_bytes:>8}" if payload_bytes is not None else f"{'-':>8}"
+    print(f"{name:<28} {statistics.mean(samples):>10.1f} {statistics.median(samples):>10.1f} {p95:>10.1f} {payload}")
+
+
+def bench_client(dim: int, repeat: int):
+    """클라이언트 측 직렬화 비용 (µs/query)"""
+    vec = np.random.rand(dim).astype(np.float32)
+    as_list = vec.tolist()
+
+    text_payload = "[" + ",".join(map(str, as_list)) + "]"
+    binary_payload = Vector(vec).to_binary()
+
+    print(f"\n[client serialization] dim={dim}, repeat={repeat}")
+    print(f"{'method':<28} {'mean_us':>10} {'p50_us':>10} {'p95_us':>10} {'bytes':>8}")
+    _print_row(
+        "text_x2 (str join x2)",
+        _timeit(lambda: ["[" + ",".join(map(str, as_list)) + "]" for _ in range(2)], repeat),
+        len(text_payload.encode()) * 2,
+    )
+    _print_row("binary_x1 (pgvector)", _timeit(lambda: Vector(vec).to_binary(), repeat), len(binary_payload))
+
+
+def bench_db(dim: int, repeat: int, k: int):
+    """DB 왕복 비용: 서버 파싱 + kNN 쿼리 (µs/query)"""
+    import psycopg2
+    from pgvector.psycopg2 import register_vector as register_vector_pg2
+
+    from rag.services.binary_search import BinaryVectorSearch, get_binary_pool
+
+    conn = psycopg2.connect(
+        host=os.getenv("POSTGRES_HOST", "localhost"),
+        port=os.getenv("POSTGRES_PORT", "5432"),
+        dbname=os.getenv("POSTGRES_DB", "sknproject4"),
+        user=os.getenv("POSTGRES_USER", "root"),
+        password=os.getenv("POSTGRES_PASSWORD", "root1234"),
+    )
+    register_vector_pg2(conn)
+    vec = np.random.rand(dim).astype(np.float32)
+    as_list = vec.tolist()
+
+    print(f"\n[server round trip] dim={dim}, repeat={repeat}")
+    print(f"{'method':<28} {'mean_us':>10} {'p50_us':>10} {'p95_us':>10} {'bytes':>8}")
+
+    # 1) 파싱만: SELECT vector 캐스팅
+    def text_parse():
+        embedding_str = "[" + ",".join(map(str, as_list)) + "]"
+        with conn.cursor() as cur:
+            cur.execute("SELECT %s::vector IS NOT NULL, %s::vector IS NOT NULL", (embedding_str, embedding_str))
+            cur.fetchone()
+
+    pool = get_binary_pool()
+
+    def binary_parse():
+        with pool.connection() as bconn, bconn.cursor() as cur:
+            cur.execute("SELECT %(q)b IS NOT NULL", {"q": vec}, prepare=True)
+            cur.fetchone()
+
+    _print_row("parse text_x2", _timeit(text_parse, repeat))
+    _print_row("parse binary_x1", _timeit(binary_parse, repeat))
+
+    # 2) 전체 kNN 쿼리 (기존 SQL vs BinaryVectorSearch)
+    legacy_sql = """
+        SELECT id, metadata->>'c_id' as c_id, content, 1 - (embedding <=> %s::vector) as similarity
+        FROM medical
+        ORDER BY embedding <=> %s::vector
+        LIMIT %s
+    """
+
+    def legacy_knn():
+        embedding_str = "[" + ",".join(map(str, as_list)) + "]"
+        with conn.cursor() as cur:
+            cur.execute(legacy_sql, (embedding_str, embedding_str, k))
+            cur.fetchall()
+
+    searcher = BinaryVectorSearch()
+    _print_row("knn text_x2 (legacy)", _timeit(legacy_knn, repeat))
+    _print_row("knn binary_x1", _timeit(lambda: searcher.search(vec, k=k), repeat))
+
+    conn.close()
+    pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="벡터 파라미터 바인딩 방식 벤치마크")
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--db", action="store_true", help="PostgreSQL 왕복 비용까지 측정")
+    args = parser.parse_args()
+
+    bench_client(args.dim, args.repeat)
+    if args.db:
+        bench_db(args.dim, args.repeat, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+evaluate_chunk 로컬 관련성 점수기(CrossEncoder) 보정 - LLM 판정(gpt-4o-mini)을 정답으로 사용
+사용법:
+    python scripts/calibrate_relevance.py                         # chat_message 최근 사용자 질문 100개
+    python scripts/calibrate_relevance.py --questions q.txt --limit 300
+
+절차:
+    1. 질문마다 retrieval과 같은 검색(top_k=5) 실행
+    2. chunk마다 gpt-4o-mini로 관련성(높음/낮음) 판정 → 라벨
+    3. CrossEncoder 원점수의 logit에 로지스틱 회귀(Platt scaling)로 a, b 적합
+    4. 보정 확률 기준 F1이 최대인 임계값과 LLM 판정 대비 정확도 출력
+출력된 RELEVANCE_CALIBRATION_A/B, RELEVANCE_THRESHOLD를 .env에 반영
+"""
+import argparse
+import math
+import os
+import sys
+
+import numpy as np
+from dotenv import load_dotenv
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from graph.llm_client import chat  # noqa: E402
+from rag.services.pg_pool import pg_connection  # noqa: E402
+from rag.services.relevance import DEFAULT_CROSS_ENCODER, CrossEncoderScorer  # noqa: E402
+from rag.services.retriever import get_vector_retriever  # noqa: E402
+
+load_dotenv()
+
+JUDGE_MODEL = "gpt-4o-mini"
+
+
+def _load_questions(path: str, limit: int):
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()][:limit]
+    with pg_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT content FROM (
+                    SELECT DISTINCT ON (content) content, created_at
+                    FROM chat_message
+                    WHERE role = 'user' AND length(content) > 5
+                    ORDER BY content, created_at DESC
+                ) q
+                ORDER BY created_at DESC
+                LIMIT %s
+                """,
+                (limit,),
+            )
+            return [row[0] for row in cur.fetchall()]
+
+
+def _judge(question: str, chunk: str) -> int:
+    result = chat(
+        JUDGE_MODEL,
+        f"""질문: {question}
+
+문서:
+---
+{chunk}
+---
+
+위 문서가 질문에 답변하는 데 관련이 있는지 평가하세요.
+다음 형식으로만 답변하세요:
+관련성: [높음/낮음]""",
+        temperature=0.0,
+    )
+    return 1 if "높음" in result else 0
+
+
+def _fit_platt(logits: np.ndarray, labels: np.ndarray, steps: int = 5000, lr: float = 0.1):
+    """sigmoid(a * logit + b) 로지스틱 회귀 (경사하강)"""
+    a, b = 1.0, 0.0
+    for _ in range(steps):
+        pred = 1.0 / (1.0 + np.exp(-(a * logits + b)))
+        grad = pred - labels
+        a -= lr * float(np.mean(grad * logits))
+        b -= lr * float(np.mean(grad))
+    return a, b
+
+
+def _best_threshold(probs: np.ndarray, labels: np.ndarray):
+    best = (0.5, -1.0, 0.0)
+    for threshold in np.arange(0.05, 0.96, 0.01):
+        pred = probs >= threshold
+        tp = float(np.sum(pred & (labels == 1)))
+        precision = tp / max(float(np.sum(pred)), 1.0)
+        recall = tp / max(float(np.sum(labels == 1)), 1.0)
+        f1 = 2 * precision * recall / max(precision + recall, 1e-9)
+        if f1 > best[1]:
+            best = (round(float(threshold), 2), f1, float(np.mean(pred == (labels == 1))))
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CrossEncoder 관련성 점수 보정")
+    parser.add_argument("--questions", default="", help="질문 파일 (한 줄에 하나, 없으면 chat_message 사용)")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--model", default=os.getenv("RELEVANCE_MODEL", DEFAULT_CROSS_ENCODER))
+    args = parser.parse_args()
+
+    questions = _load_questions(args.questions, args.limit)
+    print(f"[calibrate] {len(questions)} questions, model={args.model}")
+
+    retriever = get_vector_retriever()
+    scorer = CrossEncoderScorer(threshold=0.5, model_name=args.model)
+    raw_scores, labels = [], []
+    for i, question in enumerate(questions, 1):
+        docs = [
+            {"content": doc.page_content, "score": doc.metadata.get("similarity", 0.0)}
+            for doc in retriever.search(question, top_k=5)
+        ]
+        if not docs:
+            continue
+        raw_scores.extend(scorer.score(question, docs))
+        labels.extend(_judge(question, doc["content"]) for doc in docs)
+        print(f"  [{i}/{len(questions)}] {question[:40]}... ({len(docs)} chunks)")
+
+    if not labels or len(set(labels)) < 2:
+        print("[calibrate] 라벨이 한쪽으로만 나와 보정할 수 없습니다. 질문 수를 늘리세요.")
+        return
+
+    probs = np.clip(np.array(raw_scores), 1e-6, 1 - 1e-6)
+    logits = np.log(probs / (1 - probs))
+    y = np.array(labels, dtype=np.float64)
+    a, b = _fit_platt(logits, y)
+    calibrated = 1.0 / (1.0 + np.exp(-(a * logits + b)))
+    threshold, f1, accuracy = _best_threshold(calibrated, y)
+    _, raw_f1, raw_accuracy = _best_threshold(probs, y)
+
+    print(f"\n[calibrate] chunks={len(y)}, LLM 관련 비율={y.mean():.2%}")
+    print(f"  raw        : best F1={raw_f1:.3f}, accuracy={raw_accuracy:.3f}")
+    print(f"  calibrated : F1={f1:.3f}, accuracy={accuracy:.3f} (LLM 판정 대비)")
+    print("\n# .env")
+    print(f"RELEVANCE_CALIBRATION_A={a:.4f}")
+    print(f"RELEVANCE_CALIBRATION_B={b:.4f}")
+    print(f"RELEVANCE_THRESHOLD={threshold}")
+    if math.isclose(a, 0.0, abs_tol=1e-3):
+        print("# 경고: a≈0 - 모델 점수가 LLM 판정과 거의 무관합니다. 다른 RELEVANCE_MODEL을 검토하세요.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,104 @@
 # (선택) 임베딩 재생성/인덱스 리빌드 배치
+"""
+medical.embedding ANN 인덱스 관리 CLI
+사용법:
+    python scripts/embed_reindex.py build   --method hnsw --m 16 --ef-construction 64
+    python scripts/embed_reindex.py build   --method ivfflat --lists 100
+    python scripts/embed_reindex.py rebuild --method hnsw --m 24 --ef-construction 128
+    python scripts/embed_reindex.py verify  --method hnsw
+    python scripts/embed_reindex.py report  --method hnsw --values 10 20 40 80 160 --k 5 --samples 100
+    python scripts/embed_reindex.py drop    --method ivfflat
+"""
+import argparse
+import os
+import sys
+
+from dotenv import load_dotenv
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from rag.services.index_manager import (  # noqa: E402
+    IndexConfig,
+    VectorIndexManager,
+    format_report,
+    recommend_lists,
+    recommend_probes,
+)
+
+load_dotenv()
+
+
+def _parse_args():
+    parser = argparse.ArgumentParser(description="medical.embedding ANN 인덱스 관리")
+    parser.add_argument("command", choices=["build", "rebuild", "verify", "report", "drop", "list"])
+    parser.add_argument("--method", choices=["hnsw", "ivfflat"], default="hnsw")
+    parser.add_argument("--distance", choices=["cosine", "l2", "ip"], default=os.getenv("PGVECTOR_DISTANCE", "cosine"))
+    parser.add_argument("--table", default="medical")
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--lists", type=int, default=None)
+    parser.add_argument("--maintenance-work-mem", default=None)
+    parser.add_argument("--no-concurrently", action="store_true")
+    parser.add_argument("--values", type=int, nargs="+", default=None, help="ef_search 또는 probes 후보 값")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--samples", type=int, default=50)
+    return parser.parse_args()
+
 
 def main():
     """
     (선택) 벡터 임베딩 재생성 및 인덱스 리빌드 배치 작업을 수행하는 메인 함수.
-    - 문서/청크에 대한 임베딩을 다시 생성하거나 갱신
-    - 벡터 인덱스(예: ivfflat) 튜닝 및 재구축
-    - 대량 임베딩 및 인덱스 작업을 자동화/배치로 실행
+    - 벡터 인덱스(hnsw / ivfflat) 생성, 파라미터 튜닝 및 재구축
+    - 인덱스 유효성 및 플래너 사용 여부 검증
+    - exact 검색 대비 recall / latency 리포트 출력
     """
+    args = _parse_args()
+    manager = VectorIndexManager(table_name=args.table)
+    config = IndexConfig(
+        method=args.method,
+        distance=args.distance,
+        m=args.m,
+        ef_construction=args.ef_construction,
+        lists=args.lists,
+        maintenance_work_mem=args.maintenance_work_mem,
+    )
+
+    if args.command == "build":
+        manager.build(config, concurrently=not args.no_concurrently)
+    elif args.command == "rebuild":
+        manager.rebuild(config)
+    elif args.command == "drop":
+        manager.drop(args.method)
+    elif args.command == "list":
+        for index in manager.list_indexes():
+            print(f"{index['name']} ({index['method']}, valid={index['is_valid']}, size={index['size']})")
+            print(f"  {index['definition']}")
+    elif args.command == "verify":
+        result = manager.verify(args.method, distance=args.distance)
+        print(f"index: {result['name']}")
+        print(f"  exists: {result['exists']}")
+        print(f"  valid: {result['is_valid']}")
+        print(f"  used by planner: {result['used_by_planner']}")
+        if result.get("plan"):
+            print(result["plan"])
+    elif args.command == "report":
+        rows = manager.row_count()
+        if args.values:
+            values = args.values
+        elif args.method == "hnsw":
+            values = [args.k, 20, 40, 80, 160]
+        else:
+            lists = args.lists or recommend_lists(rows)
+            values = sorted({1, recommend_probes(lists), lists // 10 or 1, lists // 4 or 1, lists})
+        print(f"rows={rows}, method={args.method}, k={args.k}, samples={args.samples}")
+        report = manager.recall_report(
+            args.method, values, k=args.k, sample_size=args.samples, distance=args.distance
+        )
+        print(format_report(report))
 
-    pass
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
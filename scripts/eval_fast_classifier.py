@@ -0,0 +1,143 @@
+"""
+classifier 1차 분류(규칙 + kNN)와 LLM(gpt-5-nano) 분류 비교 - FAST_CLASSIFIER 임계값 조정용
+사용법:
+    python scripts/eval_fast_classifier.py                          # chat_message 최근 대화 50개의 사용자 질문
+    python scripts/eval_fast_classifier.py --input cases.jsonl      # {"question", "history": [...]} (history는 최신 → 오래된)
+    python scripts/eval_fast_classifier.py --conversations 200 --show-errors
+
+출력:
+    - 규칙 / kNN 단계별 처리 비율(coverage)과 LLM 대비 일치율 (conversation_type, is_follow_up)
+    - FAST_CLASSIFIER_MIN_SIMILARITY x _MIN_AGREEMENT 조합별 coverage / 일치율 표
+LLM 결과를 정답으로 보므로, 일치율이 충분히 높은(예: 98%+) 조합 중 coverage가 큰 값을 .env에 반영
+"""
+import argparse
+import json
+import os
+import sys
+from collections import Counter, defaultdict
+
+from dotenv import load_dotenv
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from graph.fast_classifier import DEFAULT_EXAMPLES_PATH, FastClassifier, load_examples  # noqa: E402
+from graph.llm_client import chat  # noqa: E402
+from graph.nodes.classifier import CLASSIFIER_MODEL, _apply_classifier, _prepare_classifier  # noqa: E402
+from rag.services.embedder import get_embedding  # noqa: E402
+from rag.services.pg_pool import pg_connection  # noqa: E402
+
+load_dotenv()
+
+SIMILARITY_GRID = (0.5, 0.55, 0.6, 0.65, 0.7)
+AGREEMENT_GRID = (0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+def _load_cases(path: str, conversations: int):
+    if path:
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    with pg_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT conversation_id, role, content
+                FROM chat_message
+                WHERE role IN ('user', 'assistant')
+                  AND conversation_id IN (
+                      SELECT conversation_id FROM chat_message
+                      GROUP BY conversation_id
+                      ORDER BY max(created_at) DESC
+                      LIMIT %s
+                  )
+                ORDER BY conversation_id, created_at
+                """,
+                (conversations,),
+            )
+            rows = cur.fetchall()
+
+    # 사용자 질문마다 그 시점까지의 최근 4개 메시지를 history로 (classifier와 같은 최신 → 오래된 순서)
+    cases, history_by_conversation = [], defaultdict(list)
+    for conversation_id, role, content in rows:
+        history = history_by_conversation[conversation_id]
+        if role == "user":
+            cases.append({"question": content, "history": list(reversed(history[-4:]))})
+        history.append({"role": role, "content": content})
+    return cases
+
+
+def _llm_label(case):
+    state = {"question": case["question"], "conversation_history": case.get("history", [])}
+    prompt = _prepare_classifier(state)
+    if prompt is None:
+        return state["conversation_type"], False
+    state = _apply_classifier(state, chat(CLASSIFIER_MODEL, prompt))
+    return state["conversation_type"], bool(state.get("is_follow_up"))
+
+
+def _match(decision, label):
+    return decision.conversation_type == label[0] and decision.is_follow_up == label[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="1차 분류기 vs LLM 분류 비교")
+    parser.add_argument("--input", default="", help="평가 케이스 jsonl (없으면 chat_message 사용)")
+    parser.add_argument("--conversations", type=int, default=50)
+    parser.add_argument("--examples", default=os.getenv("FAST_CLASSIFIER_EXAMPLES") or DEFAULT_EXAMPLES_PATH)
+    parser.add_argument("--k", type=int, default=int(os.getenv("FAST_CLASSIFIER_K", "5")))
+    parser.add_argument("--show-errors", action="store_true", help="LLM과 다르게 분류한 질문 출력")
+    args = parser.parse_args()
+
+    cases = _load_cases(args.input, args.conversations)
+    fast = FastClassifier(load_examples(args.examples), k=args.k)
+    print(f"[eval] cases={len(cases)}, examples={len(fast.examples)}, k={args.k}")
+
+    results = []
+    for i, case in enumerate(cases, 1):
+        question, history = case["question"].strip(), case.get("history", [])[:4]
+        label = _llm_label(case)
+        rule = fast.classify_rules(question, history)
+        vote = None
+        if rule is None and fast.wants_knn(question, history):
+            vote = fast.knn_vote(get_embedding(question))
+        results.append((question, label, rule, vote))
+        if i % 20 == 0:
+            print(f"  {i}/{len(cases)}")
+
+    total = len(results) or 1
+    rule_hits = [(q, label, rule) for q, label, rule, _ in results if rule is not None]
+    rule_ok = sum(_match(rule, label) for _, label, rule in rule_hits)
+    print(f"\n[rules] coverage={len(rule_hits) / total:.2%}, agreement={rule_ok / max(len(rule_hits), 1):.2%}")
+    print("  by rule:", dict(Counter(rule.source for _, _, rule in rule_hits)))
+
+    print("\n[knn] coverage / agreement (규칙 제외, is_follow_up=False로 결정)")
+    print("  min_sim \\ min_agree " + "".join(f"{a:>14}" for a in AGREEMENT_GRID))
+    for min_similarity in SIMILARITY_GRID:
+        cells = []
+        for min_agreement in AGREEMENT_GRID:
+            decided = [
+                (label, vote) for _, label, rule, vote in results
+                if rule is None and vote is not None and vote[1] >= min_similarity and vote[2] >= min_agreement
+            ]
+            ok = sum(vote[0] == label[0] and not label[1] for label, vote in decided)
+            cells.append(f"{len(decided) / total:>6.1%}/{ok / max(len(decided), 1):>6.1%}")
+        print(f"  {min_similarity:>18} " + "".join(f"{cell:>14}" for cell in cells))
+
+    if args.show_errors:
+        min_similarity = float(os.getenv("FAST_CLASSIFIER_MIN_SIMILARITY", "0.6"))
+        min_agreement = float(os.getenv("FAST_CLASSIFIER_MIN_AGREEMENT", "0.8"))
+        print(f"\n[errors] (min_similarity={min_similarity}, min_agreement={min_agreement} | 질문 | LLM | 1차 분류)")
+        for question, label, rule, vote in results:
+            if rule is not None:
+                if not _match(rule, label):
+                    print(f"  {question[:50]} | {label} | {rule.source}:{rule.conversation_type}")
+            elif vote is not None and vote[1] >= min_similarity and vote[2] >= min_agreement:
+                if vote[0] != label[0] or label[1]:
+                    print(f"  {question[:50]} | {label} | knn:{vote[0]} (sim={vote[1]:.2f}, agree={vote[2]:.2f})")
+
+
+if __name__ == "__main__":
+    main()
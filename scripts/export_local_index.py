@@ -0,0 +1,80 @@
+"""
+medical 테이블 임베딩을 로컬 mmap 인덱스로 export (VECTOR_BACKEND=local 용)
+사용법:
+    python scripts/export_local_index.py                    # 버전(max id, count)이 같으면 건너뜀
+    python scripts/export_local_index.py --dtype float16    # 파일/페이지 캐시 크기 절반
+    python scripts/export_local_index.py --force
+    python scripts/export_local_index.py --bench --k 5      # 로컬 정확 검색 vs pgvector latency 비교
+
+ETL 적재(embed_runner) 직후 또는 cron으로 실행한다.
+웹 워커는 CURRENT 파일 변경을 감지해 새 버전을 다시 mmap 한다.
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from dotenv import load_dotenv
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from rag.services.local_index import DEFAULT_INDEX_DIR, LocalVectorIndex, export_local_index  # noqa: E402
+
+load_dotenv()
+
+
+def _bench(index_dir: str, k: int, repeat: int):
+    import numpy as np
+
+    from rag.services.retriever import VectorRetriever
+
+    local = LocalVectorIndex(index_dir=index_dir, refresh_interval=0)
+    retriever = VectorRetriever()
+    dim = local._maybe_reload().embeddings.shape[1]
+
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((repeat, dim)).astype(np.float32)
+
+    def _measure(fn):
+        samples = []
+        for vec in queries:
+            started = time.perf_counter()
+            fn(vec)
+            samples.append((time.perf_counter() - started) * 1000)
+        ordered = sorted(samples)
+        return statistics.mean(samples), ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+    print(f"\n[search latency] k={k}, repeat={repeat}")
+    print(f"{'backend':<10} {'mean_ms':>10} {'p95_ms':>10}")
+    for name, fn in (
+        ("local", lambda vec: local.search(vec, k=k)),
+        ("pgvector", lambda vec: retriever._pgvector_rows(vec, k, None, False, None, None)),
+    ):
+        mean_ms, p95_ms = _measure(fn)
+        print(f"{name:<10} {mean_ms:>10.2f} {p95_ms:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 mmap 벡터 인덱스 export")
+    parser.add_argument("--dir", default=os.getenv("LOCAL_INDEX_DIR", DEFAULT_INDEX_DIR))
+    parser.add_argument("--dtype", choices=["float32", "float16"], default=os.getenv("LOCAL_INDEX_DTYPE", "float32"))
+    parser.add_argument("--force", action="store_true", help="버전이 같아도 다시 export")
+    parser.add_argument("--bench", action="store_true", help="export 후 검색 latency 비교")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+
+    manifest = export_local_index(args.dir, dtype=args.dtype, force=args.force)
+    status = "skipped (up to date)" if manifest["skipped"] else f"exported in {manifest['export_seconds']}s"
+    print(f"✅ {manifest['version']} ({manifest['count']} rows, {manifest['dtype']}) - {status}")
+
+    if args.bench:
+        _bench(args.dir, args.k, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
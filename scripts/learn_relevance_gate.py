@@ -0,0 +1,142 @@
+"""
+evaluate_chunk 유사도 게이트 임계값 학습 (RELEVANCE_GATE_ACCEPT / RELEVANCE_GATE_REJECT)
+사용법:
+    python scripts/learn_relevance_gate.py
+    python scripts/learn_relevance_gate.py --precision 0.97 --min-support 30
+
+데이터 (chat_message assistant 메시지):
+    특징: metadata.chunk_scores의 최고 검색 유사도
+    라벨: 1) MessageFeedback reason_code (positive → 관련, 사실과 다름/참고문헌 오기/질문을 이해 못함 → 비관련)
+          2) 없으면 Message.feedback (positive / negative)
+          3) 없으면 점수기가 판정한 턴(relevance_tier=judge)의 relevance_score >= --judge-threshold
+    게이트가 결정한 턴(accept / reject)은 피드백이 있을 때만 사용 (게이트 자신의 결정으로 학습하지 않도록)
+
+accept: 이 값 이상에서 관련 비율이 precision 이상인 최소 유사도
+reject: 이 값 미만에서 비관련 비율이 precision 이상인 최대 유사도
+"""
+import argparse
+import os
+import sys
+from collections import Counter
+
+import numpy as np
+from dotenv import load_dotenv
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from rag.services.pg_pool import pg_connection  # noqa: E402
+
+load_dotenv()
+
+POSITIVE_REASONS = {"positive"}
+# 검색(관련성) 문제로 볼 수 있는 부정 피드백 - too_vague / other는 답변 문체 문제일 수 있어 제외
+NEGATIVE_REASONS = {"incorrect_fact", "wrong_reference", "misunderstood"}
+
+
+def _load_rows():
+    with pg_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT m.relevance_score, m.metadata, m.feedback,
+                       array_remove(array_agg(f.reason_code), NULL)
+                FROM chat_message m
+                LEFT JOIN chat_messagefeedback f ON f.message_id = m.id
+                WHERE m.role = 'assistant' AND m.metadata ? 'chunk_scores'
+                GROUP BY m.id
+                """
+            )
+            return cur.fetchall()
+
+
+def _feedback_label(feedback: str, reasons):
+    votes = Counter()
+    for reason in reasons or []:
+        if reason in POSITIVE_REASONS:
+            votes[1] += 1
+        elif reason in NEGATIVE_REASONS:
+            votes[0] += 1
+    if votes and votes[1] != votes[0]:
+        return 1 if votes[1] > votes[0] else 0
+    if feedback == "positive":
+        return 1
+    if feedback == "negative":
+        return 0
+    return None
+
+
+def _examples(rows, judge_threshold: float):
+    similarities, labels = [], []
+    sources = Counter()
+    for relevance_score, metadata, feedback, reasons in rows:
+        metadata = metadata or {}
+        chunk_similarities = [c.get("similarity") for c in metadata.get("chunk_scores") or [] if c.get("similarity") is not None]
+        if not chunk_similarities:
+            continue
+        label = _feedback_label(feedback, reasons)
+        if label is not None:
+            sources["feedback"] += 1
+        elif metadata.get("relevance_tier", "judge") == "judge" and relevance_score is not None:
+            label = 1 if float(relevance_score) >= judge_threshold else 0
+            sources["judge"] += 1
+        else:
+            continue
+        similarities.append(max(chunk_similarities))
+        labels.append(label)
+    return np.array(similarities), np.array(labels), sources
+
+
+def _learn(similarities, labels, precision: float, min_support: int):
+    candidates = np.unique(np.round(similarities, 3))
+    accept = reject = None
+    for t in candidates:
+        above = labels[similarities >= t]
+        if len(above) >= min_support and above.mean() >= precision:
+            accept = float(t)
+            break
+    for t in candidates[::-1]:
+        below = labels[similarities < t]
+        if len(below) >= min_support and 1 - below.mean() >= precision:
+            reject = float(t)
+            break
+    if accept is not None and reject is not None and reject > accept:
+        reject = accept
+    return accept, reject
+
+
+def main():
+    parser = argparse.ArgumentParser(description="관련성 유사도 게이트 임계값 학습")
+    parser.add_argument("--precision", type=float, default=0.95, help="자동 결정 구간의 목표 정확도")
+    parser.add_argument("--min-support", type=int, default=20, help="구간별 최소 표본 수")
+    parser.add_argument("--judge-threshold", type=float, default=0.5, help="relevance_score 라벨 기준")
+    args = parser.parse_args()
+
+    similarities, labels, sources = _examples(_load_rows(), args.judge_threshold)
+    print(f"[gate] samples={len(labels)} (feedback={sources['feedback']}, judge={sources['judge']})")
+    if len(labels) < args.min_support or len(set(labels.tolist())) < 2:
+        print("[gate] 표본이 부족하거나 라벨이 한쪽으로만 있습니다. 로그가 더 쌓인 뒤 다시 실행하세요.")
+        return
+
+    accept, reject = _learn(similarities, labels, args.precision, args.min_support)
+    print(f"  관련 비율={labels.mean():.2%}, 유사도 범위={similarities.min():.3f}~{similarities.max():.3f}")
+
+    accepted = similarities >= accept if accept is not None else np.zeros_like(labels, dtype=bool)
+    rejected = similarities < reject if reject is not None else np.zeros_like(labels, dtype=bool)
+    if accepted.any():
+        print(f"  accept: {accepted.mean():.2%} of turns, precision={labels[accepted].mean():.3f}")
+    if rejected.any():
+        print(f"  reject: {rejected.mean():.2%} of turns, precision={1 - labels[rejected].mean():.3f}")
+    print(f"  점수기(LLM) 호출 절약 예상: {(accepted | rejected).mean():.2%}")
+
+    print("\n# .env")
+    print(f"RELEVANCE_GATE_ACCEPT={accept if accept is not None else ''}")
+    print(f"RELEVANCE_GATE_REJECT={reject if reject is not None else ''}")
+    if accept is None or reject is None:
+        print("# 목표 정확도를 만족하는 구간이 없어 비워 둔 값이 있습니다 (둘 다 설정돼야 게이트 동작).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+대화 메모리 요약 워커 - 요약이 비어 있는(question_summary IS NULL) 턴을 배치로 요약
+사용법:
+    python scripts/summarize_memory.py                    # 대기 중인 턴을 모두 처리하고 종료 (cron용)
+    python scripts/summarize_memory.py --loop --interval 5  # 5초마다 반복 처리
+
+웹 프로세스에서 MEMORY_SUMMARY_MODE=worker로 설정하면 memory_write는 저장만 하고,
+요약은 이 워커가 처리한다 (저장소는 웹과 같은 MEMORY_BACKEND 설정 사용).
+행은 요약 전에 선점하므로 워커를 여러 개 띄워도 같은 턴을 중복 요약하지 않는다.
+"""
+import argparse
+import os
+import sys
+import time
+
+# 프로젝트 루트 디렉토리를 Python 경로에 추가
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from graph.memory_store import get_memory_store  # noqa: E402
+from graph.memory_summarizer import MemorySummarizer  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대화 메모리 요약 워커")
+    parser.add_argument("--batch", type=int, default=int(os.getenv("MEMORY_SUMMARY_BATCH", "8")))
+    parser.add_argument("--loop", action="store_true", help="종료하지 않고 interval초마다 반복")
+    parser.add_argument("--interval", type=float, default=5.0)
+    args = parser.parse_args()
+
+    summarizer = MemorySummarizer(
+        get_memory_store(),
+        batch_size=args.batch,
+        background=False,
+        claim_timeout=float(os.getenv("MEMORY_SUMMARY_CLAIM_TIMEOUT", "300")),
+    )
+    while True:
+        summarized = summarizer.drain()
+        if summarized:
+            print(f"[summarize_memory] summarized {summarized} turns")
+        if not args.loop:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()